@@ -1,16 +1,67 @@
-from flask import Flask, jsonify, request
+from __future__ import annotations
+
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 import os
+import sys
 import json
 import logging
-from sqlalchemy import create_engine, text, inspect
-from sqlalchemy.exc import SQLAlchemyError
+import importlib
 import traceback
 from datetime import datetime
-import httpx
 from typing import Dict, Any
 import time
+import csv
+import io
+import zlib
+import hashlib
+import sqlite3
+import threading
+import atexit
+import uuid
+import fnmatch
+import asyncio
+import queue
+import contextlib
+import random
+import contextvars
+import cProfile
+import pstats
+import hmac
+import re
+import secrets
+import math
+import itertools
+import string
+import base64
+import bisect
+from email.utils import parsedate_to_datetime
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from dotenv import load_dotenv
 
+class LazyImport:
+    """Stand-in for a module that imports it on first attribute access.
+    
+    Keeps SQLAlchemy and httpx (and the database drivers SQLAlchemy loads) off the
+    startup path until a request or the warm-up needs them. importlib's per-module
+    import locks make the first access thread-safe.
+    """
+    
+    def __init__(self, module_name: str):
+        self._module_name = module_name
+        self._module = None
+    
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._module_name)
+        return self._module
+    
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+sqlalchemy = LazyImport('sqlalchemy')
+httpx = LazyImport('httpx')
+
 # Load environment variables from .env file (for local development)
 load_dotenv()
 
@@ -26,39 +77,365 @@ logger = logging.getLogger(__name__)
 
 # Global variables for lazy loading
 _db_engine = None
+_db_engine_lock = threading.Lock()
 _config = None
-_prompts = None
+_prompt_registry = None
+_prompt_registry_lock = threading.Lock()
+_analysis_cache_initialized = False
+_analysis_cache_lock = threading.Lock()
+_engine_registry = OrderedDict()
+_engine_registry_lock = threading.Lock()
+_export_store_initialized = False
+_export_store_lock = threading.Lock()
+_job_executor = None
+_job_executor_lock = threading.Lock()
+_job_lock = threading.RLock()
+_job_store_initialized = False
+_job_futures = {}
+_job_cancel_events = {}
+_job_owner = None
+_job_lease_thread = None
+_stream_executor = None
+_stream_executor_lock = threading.Lock()
+_http_client = None
+_http_client_lock = threading.Lock()
+_http_stats = {"requests": 0, "in_flight": 0, "errors": 0}
+_async_http_client = None
+_async_http_client_loop = None
+_retry_policy = None
+_retry_policy_lock = threading.Lock()
+_circuit_breakers = OrderedDict()
+_circuit_breakers_lock = threading.Lock()
+_profile_lock = threading.Lock()
+_warmup_state = {"state": "pending", "mode": None, "steps": {}, "started_at": None, "finished_at": None}
+_warmup_lock = threading.Lock()
+_dependency_probes = None
+_dependency_probes_lock = threading.Lock()
+_schema_snapshots = {}
+_schema_snapshots_lock = threading.Lock()
+_schema_snapshot_key_locks = OrderedDict()
+_schema_snapshot_store_initialized = False
+_engine_key_secret = None
+_engine_key_secret_lock = threading.Lock()
+
+# Route label for metrics recorded while handling a request (or running a job)
+_metrics_route = contextvars.ContextVar('metrics_route', default='none')
+# Profilers of the worker threads serving the profiled request in this context (see run_profiled)
+_request_worker_profiles = contextvars.ContextVar('request_worker_profiles', default=None)
 
-def load_prompts():
-    """Load prompt templates from prompts.json file"""
-    global _prompts
-    if _prompts is not None:
-        return _prompts
+# Latency buckets in seconds, wide enough to place a 90s p99 upstream call
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+                   20.0, 30.0, 45.0, 60.0, 90.0, 120.0, 180.0, 300.0)
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(label_names: tuple, label_values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape_label_value(value)}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class MetricCounter:
+    """Monotonic counter with labels, rendered in Prometheus text format."""
     
-    try:
-        with open('prompts.json', 'r') as f:
-            _prompts = json.load(f)
-        logger.info("Prompt templates loaded successfully")
-        return _prompts
-    except FileNotFoundError:
-        logger.warning("prompts.json not found, using default prompt")
-        _prompts = {
-            "default": {
-                "name": "Default Business Glossary",
-                "description": "Default business glossary generator",
-                "template": ('Analyze this database schema and create a comprehensive business data glossary. '
-                           'Based on the table names, column names, and their relationships, analyze the business at hand, '
-                           'and organize the business terms into a hierarchical structure. '
-                           'Return ONLY valid JSON in this exact format: '
-                           '{{ "Root Glossary Name": [ {{ "Category Under Root": [ "Simple Leaf Term", '
-                           '{{ "Parent Leaf Term": [ "Nested Leaf Term" ] }} ] }} ] }}. '
-                           'Use meaningful business terms derived from the schema. Schema to analyze: {schema_summary}')
+    def __init__(self, name: str, help_text: str, label_names: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.values = {}
+        self.lock = threading.Lock()
+        METRICS.append(self)
+    
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+    
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value}")
+        return lines
+
+class MetricHistogram:
+    """Histogram with labels and cumulative buckets, rendered in Prometheus text format."""
+    
+    def __init__(self, name: str, help_text: str, label_names: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.values = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+        METRICS.append(self)
+    
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+    
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, series in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), series):
+                    cumulative += count
+                    bucket_label = f'le="{bound}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, bucket_label)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {series[-1]}")
+                lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+METRICS = []
+REQUEST_SECONDS = MetricHistogram(
+    'glossary_request_duration_seconds', 'Time to produce a response, by route, method and status.',
+    ('route', 'method', 'status'))
+REFLECTION_SECONDS = MetricHistogram(
+    'glossary_schema_reflection_seconds', 'Schema reflection latency (catalog queries).', ('route',))
+PROMPT_BUILD_SECONDS = MetricHistogram(
+    'glossary_prompt_build_seconds', 'Time to load and format a prompt template.', ('route', 'prompt_template'))
+LLM_ATTEMPT_SECONDS = MetricHistogram(
+    'glossary_llm_attempt_seconds', 'Latency of each upstream AI call attempt, by outcome.',
+    ('route', 'prompt_template', 'outcome'))
+JSON_PARSE_SECONDS = MetricHistogram(
+    'glossary_json_parse_seconds', 'Time spent cleaning and parsing AI responses as JSON.', ('route', 'prompt_template'))
+CSV_TRANSFORM_SECONDS = MetricHistogram(
+    'glossary_csv_transform_seconds', 'Time spent building CSV export rows, excluding time waiting on the client.', ('route',))
+LLM_RETRIES = MetricCounter(
+    'glossary_llm_retries_total', 'Upstream AI call retries.', ('route', 'prompt_template'))
+ANALYSIS_CACHE_LOOKUPS = MetricCounter(
+    'glossary_analysis_cache_lookups_total', 'Analysis cache lookups by result (hit, miss, refresh, disabled).',
+    ('route', 'result'))
+SCHEMA_SNAPSHOT_LOOKUPS = MetricCounter(
+    'glossary_schema_snapshot_lookups_total',
+    'Schema snapshot lookups by result (fresh, unchanged, changed, unverified, miss, refresh, disabled).',
+    ('route', 'result'))
+COLUMN_PROFILE_SECONDS = MetricHistogram(
+    'glossary_column_profile_seconds', 'Column profiling sample query time per table.', ('route',))
+COLUMN_PROFILE_TABLES = MetricCounter(
+    'glossary_column_profile_tables_total', 'Tables column-profiled by result (cached, profiled, failed, timeout).',
+    ('route', 'result'))
+LLM_TOKENS = MetricCounter(
+    'glossary_llm_tokens_total', 'Tokens reported in AI response usage blocks.', ('route', 'prompt_template', 'kind'))
+ERRORS = MetricCounter(
+    'glossary_errors_total', 'Errors by type.', ('route', 'type'))
+
+def current_route() -> str:
+    """Route label for metrics recorded in the current request or job context."""
+    return _metrics_route.get()
+
+def record_token_usage(usage: dict, prompt_template: str):
+    """Count the prompt and completion tokens from an AI response usage block."""
+    if not isinstance(usage, dict):
+        return
+    for kind in ('prompt', 'completion'):
+        tokens = usage.get(f'{kind}_tokens')
+        if tokens:
+            LLM_TOKENS.inc(tokens, route=current_route(), prompt_template=prompt_template, kind=kind)
+
+def render_metrics() -> str:
+    """All metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+# Placeholders each route prompt is formatted with; templates using anything else are rejected at load time
+PROMPT_PLACEHOLDERS = {
+    'default': {'schema_summary'},
+    'analyze': {'schema_summary'},
+    'merge': {'glossaries'},
+    'generate': {'input_data'},
+}
+
+# Used when prompts.json does not exist
+DEFAULT_PROMPTS = {
+    "default": {
+        "name": "Default Business Glossary",
+        "description": "Default business glossary generator",
+        "template": ('Analyze this database schema and create a comprehensive business data glossary. '
+                   'Based on the table names, column names, and their relationships, analyze the business at hand, '
+                   'and organize the business terms into a hierarchical structure. '
+                   'Return ONLY valid JSON in this exact format: '
+                   '{{ "Root Glossary Name": [ {{ "Category Under Root": [ "Simple Leaf Term", '
+                   '{{ "Parent Leaf Term": [ "Nested Leaf Term" ] }} ] }} ] }}. '
+                   'Use meaningful business terms derived from the schema. Schema to analyze: {schema_summary}')
+    }
+}
+
+class PromptTemplate:
+    """One version of a prompt template, validated and split into literal text and placeholders."""
+    
+    def __init__(self, key: str, version: str, text: str, name: str = None, description: str = ''):
+        self.key = key
+        self.version = version
+        self.text = text
+        self.name = name or key
+        self.description = description
+        self.segments = []
+        self.placeholders = set()
+        for literal, field, format_spec, conversion in string.Formatter().parse(text):
+            if field is not None:
+                if not field.isidentifier() or format_spec or conversion:
+                    raise ValueError(f"prompt '{key}' version '{version}' has an unsupported placeholder {{{field}}}")
+                self.placeholders.add(field)
+            self.segments.append((literal, field))
+        unknown = self.placeholders - PROMPT_PLACEHOLDERS.get(key, self.placeholders)
+        if unknown:
+            raise ValueError(f"prompt '{key}' version '{version}' uses unknown placeholders: {', '.join(sorted(unknown))}")
+    
+    def render(self, variables: dict) -> str:
+        """Fill the placeholders (same result as str.format on the template text)."""
+        return ''.join(literal + (str(variables[field]) if field is not None else '') for literal, field in self.segments)
+
+def prompt_content_version(text: str) -> str:
+    """Version name for a template without an explicit "version": a short hash of its text."""
+    return 'sha-' + hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+
+def compile_prompts(raw: dict) -> dict:
+    """Validate and precompile prompts.json entries.
+    
+    Each entry's "template" is its current version, named by "version" (or a hash
+    of the text). Older or alternative versions go in "versions" as a mapping of
+    version name to template text. Raises ValueError on any invalid template.
+    """
+    templates = {}
+    for key, info in raw.items():
+        name, description = info.get('name', key), info.get('description', '')
+        versions = {
+            str(version): PromptTemplate(key, str(version), text, name, description)
+            for version, text in (info.get('versions') or {}).items()
+        }
+        if 'template' in info:
+            default_version = str(info.get('version') or prompt_content_version(info['template']))
+            versions[default_version] = PromptTemplate(key, default_version, info['template'], name, description)
+        else:
+            default_version = str(info.get('version', ''))
+            if default_version not in versions:
+                raise ValueError(f"prompt '{key}' has no template for its version '{default_version}'")
+        templates[key] = {
+            "name": name,
+            "description": description,
+            "default_version": default_version,
+            "versions": versions
+        }
+    return templates
+
+class PromptRegistry:
+    """Prompt templates from prompts.json, reloaded when the file's modification time changes.
+    
+    A reload compiles the whole file before swapping it in, so readers see either
+    the old or the new set of templates; an invalid file keeps the previous set.
+    """
+    
+    def __init__(self, path: str, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.templates = {}
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.next_check = 0.0
+        self.loaded_at = None
+        self.reloads = 0
+        self.last_error = None
+        self.refresh()
+    
+    def refresh(self):
+        """Reload the file if it changed, checking at most once per check_interval."""
+        if time.monotonic() < self.next_check:
+            return
+        with self.lock:
+            now = time.monotonic()
+            if now < self.next_check:
+                return
+            self.next_check = now + self.check_interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime == self.mtime and self.loaded_at is not None:
+                return
+            self.mtime = mtime
+            try:
+                if mtime is None:
+                    logger.warning(f"{self.path} not found, using default prompt")
+                    raw = DEFAULT_PROMPTS
+                else:
+                    with open(self.path, 'r') as f:
+                        raw = json.load(f)
+                templates = compile_prompts(raw)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Error loading prompt templates from {self.path}, keeping the previous templates: {e}")
+                return
+            self.templates = templates
+            self.loaded_at = time.time()
+            self.reloads += 1
+            self.last_error = None
+            logger.info(f"Prompt templates loaded successfully from {self.path} ({len(templates)} templates)")
+    
+    def get(self, key: str, version: str = None):
+        """The requested version of a template (its current version by default), or None."""
+        self.refresh()
+        entry = self.templates.get(key)
+        if entry is None:
+            return None
+        return entry["versions"].get(version or entry["default_version"])
+    
+    def catalog(self) -> dict:
+        """Template names, descriptions and versions."""
+        self.refresh()
+        return {
+            key: {
+                "name": entry["name"],
+                "description": entry["description"],
+                "version": entry["default_version"],
+                "versions": sorted(entry["versions"])
             }
+            for key, entry in self.templates.items()
         }
-        return _prompts
-    except Exception as e:
-        logger.error(f"Error loading prompt templates: {e}")
-        return None
+    
+    def snapshot(self) -> dict:
+        return {
+            "path": self.path,
+            "loaded_at": datetime.utcfromtimestamp(self.loaded_at).isoformat() + "Z" if self.loaded_at else None,
+            "reloads": self.reloads,
+            "last_error": self.last_error
+        }
+
+def get_prompt_registry() -> PromptRegistry:
+    """Get the prompt template registry (lazy loading).
+    
+    Relative PROMPTS_PATH values resolve against the application directory, not
+    the working directory.
+    """
+    global _prompt_registry
+    if _prompt_registry is not None:
+        return _prompt_registry
+    with _prompt_registry_lock:
+        if _prompt_registry is None:
+            config = load_config() or {}
+            path = config.get('prompts_path', 'prompts.json')
+            if not os.path.isabs(path):
+                path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+            _prompt_registry = PromptRegistry(path, config.get('prompts_reload_interval', 2.0))
+        return _prompt_registry
+
+def get_prompt_template(key: str, version: str = None):
+    """Look up a prompt template version in the registry (None if unknown)."""
+    return get_prompt_registry().get(key, version)
 
 def load_config():
     """Load configuration from environment variables with defaults (lazy loading)"""
@@ -84,6 +461,101 @@ def load_config():
             'api_temperature': float(os.getenv('API_TEMPERATURE', '0.7')),
             'api_timeout': float(os.getenv('API_TIMEOUT', '60.0')),
             'api_max_retries': int(os.getenv('API_MAX_RETRIES', '3')),
+            'api_stream': os.getenv('API_STREAM', 'false').lower() in ('true', '1', 'yes'),
+            
+            # Prompt template registry (reloaded when the file changes)
+            'prompts_path': os.getenv('PROMPTS_PATH', 'prompts.json'),
+            'prompts_reload_interval': float(os.getenv('PROMPTS_RELOAD_INTERVAL', '2.0')),
+            
+            # Upstream retry policy and circuit breaker configuration
+            'retry_base_delay': float(os.getenv('RETRY_BASE_DELAY', '0.5')),
+            'retry_max_delay': float(os.getenv('RETRY_MAX_DELAY', '30.0')),
+            'retry_max_retry_after': float(os.getenv('RETRY_MAX_RETRY_AFTER', '60.0')),
+            'retry_budget_ratio': float(os.getenv('RETRY_BUDGET_RATIO', '0.2')),
+            'retry_budget_min_per_second': float(os.getenv('RETRY_BUDGET_MIN_PER_SECOND', '1.0')),
+            'circuit_failure_threshold': int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5')),
+            'circuit_reset_timeout': float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30.0')),
+            
+            # Upstream HTTP connection pool configuration
+            'api_connect_timeout': float(os.getenv('API_CONNECT_TIMEOUT', '10.0')),
+            'http_max_connections': int(os.getenv('HTTP_MAX_CONNECTIONS', '20')),
+            'http_max_keepalive_connections': int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '10')),
+            'http_keepalive_expiry': float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30.0')),
+            'http2_enabled': os.getenv('HTTP2_ENABLED', 'false').lower() in ('true', '1', 'yes'),
+            
+            # ASGI entry point (asgi.py): threads serving the Flask routes behind the WSGI bridge
+            'asgi_wsgi_workers': int(os.getenv('ASGI_WSGI_WORKERS', '10')),
+            
+            # Request-supplied database engine registry configuration
+            'engine_registry_max_engines': int(os.getenv('ENGINE_REGISTRY_MAX_ENGINES', '8')),
+            'engine_idle_timeout': float(os.getenv('ENGINE_IDLE_TIMEOUT', '600')),
+            'engine_pool_size': int(os.getenv('ENGINE_POOL_SIZE', '5')),
+            'engine_max_overflow': int(os.getenv('ENGINE_MAX_OVERFLOW', '5')),
+            
+            # Map-reduce chunking limits for request-supplied chunking options
+            'chunk_max_concurrency': int(os.getenv('CHUNK_MAX_CONCURRENCY', '8')),
+            'chunk_min_tokens': int(os.getenv('CHUNK_MIN_TOKENS', '1000')),
+            
+            # CSV export configuration
+            'id_strategy': os.getenv('ID_STRATEGY', 'random'),
+            
+            'export_store_path': os.getenv('EXPORT_STORE_PATH', 'data/exports.db'),
+            'export_store_max_exports': int(os.getenv('EXPORT_STORE_MAX_EXPORTS', '50')),
+            
+            # Multi-schema analysis configuration
+            'multi_schema_llm_concurrency': int(os.getenv('MULTI_SCHEMA_LLM_CONCURRENCY', '2')),
+            'multi_schema_max_llm_concurrency': int(os.getenv('MULTI_SCHEMA_MAX_LLM_CONCURRENCY', '8')),
+            'llm_tokens_per_minute': int(os.getenv('LLM_TOKENS_PER_MINUTE', '0')),
+            
+            # Background job configuration
+            'job_workers': int(os.getenv('JOB_WORKERS', '2')),
+            'job_queue_max': int(os.getenv('JOB_QUEUE_MAX', '20')),
+            'job_store_path': os.getenv('JOB_STORE_PATH', 'data/jobs.db'),
+            'job_lease_seconds': float(os.getenv('JOB_LEASE_SECONDS', '30')),
+            'stream_workers': int(os.getenv('STREAM_WORKERS', '16')),
+            
+            # Startup warm-up: background (after the server binds), blocking (before serving) or off
+            'startup_warmup': os.getenv('STARTUP_WARMUP', 'background').lower(),
+            
+            # Background dependency health probes (interval 0 disables a probe)
+            'health_probe_db_interval': float(os.getenv('HEALTH_PROBE_DB_INTERVAL', '10')),
+            'health_probe_db_timeout': float(os.getenv('HEALTH_PROBE_DB_TIMEOUT', '3')),
+            'health_probe_llm_interval': float(os.getenv('HEALTH_PROBE_LLM_INTERVAL', '30')),
+            'health_probe_llm_timeout': float(os.getenv('HEALTH_PROBE_LLM_TIMEOUT', '5')),
+            
+            # Per-request profiling (disabled unless PROFILE_ADMIN_KEY is set)
+            'profile_admin_key': os.getenv('PROFILE_ADMIN_KEY'),
+            'profile_store_dir': os.getenv('PROFILE_STORE_DIR', 'data/profiles'),
+            'profile_store_max_profiles': int(os.getenv('PROFILE_STORE_MAX_PROFILES', '20')),
+            'profile_top_n': int(os.getenv('PROFILE_TOP_N', '30')),
+            
+            # Analysis result cache configuration
+            'analysis_cache_enabled': os.getenv('ANALYSIS_CACHE_ENABLED', 'true').lower() in ('true', '1', 'yes'),
+            'analysis_cache_path': os.getenv('ANALYSIS_CACHE_PATH', 'cache/analysis_cache.db'),
+            'analysis_cache_ttl': int(os.getenv('ANALYSIS_CACHE_TTL', '86400')),
+            'analysis_cache_max_bytes': int(os.getenv('ANALYSIS_CACHE_MAX_BYTES', '104857600')),
+            
+            # Schema summary compression (0 = no token budget)
+            'summary_token_budget': int(os.getenv('SUMMARY_TOKEN_BUDGET', '0')),
+            'summary_strategies': [
+                strategy.strip() for strategy in os.getenv('SUMMARY_STRATEGIES', ','.join(SUMMARY_STRATEGIES)).split(',')
+                if strategy.strip()
+            ],
+            
+            # Schema reflection snapshots (reused until the catalog fingerprint changes)
+            'schema_snapshot_enabled': os.getenv('SCHEMA_SNAPSHOT_ENABLED', 'true').lower() in ('true', '1', 'yes'),
+            'schema_snapshot_path': os.getenv('SCHEMA_SNAPSHOT_PATH', 'data/schema_snapshots.db'),
+            'schema_snapshot_check_interval': float(os.getenv('SCHEMA_SNAPSHOT_CHECK_INTERVAL', '5')),
+            # Partition/shard/copy clusters of at least this many tables are reflected once (0 = off)
+            'schema_cluster_min_members': int(os.getenv('SCHEMA_CLUSTER_MIN_MEMBERS', '2')),
+            
+            # Sampled column profiling for /analyze prompts (off unless enabled)
+            'column_profiling_enabled': os.getenv('COLUMN_PROFILING_ENABLED', 'false').lower() in ('true', '1', 'yes'),
+            'column_profiling_sample_rows': int(os.getenv('COLUMN_PROFILING_SAMPLE_ROWS', '1000')),
+            'column_profiling_max_tables': int(os.getenv('COLUMN_PROFILING_MAX_TABLES', '100')),
+            'column_profiling_concurrency': int(os.getenv('COLUMN_PROFILING_CONCURRENCY', '4')),
+            'column_profiling_statement_timeout': float(os.getenv('COLUMN_PROFILING_STATEMENT_TIMEOUT', '5')),
+            'column_profiling_cache_ttl': float(os.getenv('COLUMN_PROFILING_CACHE_TTL', '86400')),
             
             # Server configuration
             'port': int(os.getenv('PORT', '5000'))
@@ -105,118 +577,439 @@ def load_config():
         logger.error(f"Error loading configuration: {e}")
         return None
 
-def transform_to_csv(hierarchical_data):
-    """Transform hierarchical glossary data directly to CSV format without AI"""
-    import csv
-    import io
-    from datetime import datetime
+# CSV headers for PDC format
+CSV_HEADERS = ['_id','name','type','fqdn','parentId','rootId','resourceId','createdAt','updatedAt','createdBy','updatedBy','attributes']
+
+# Attributes column for exported nodes (JSON, escaped by the CSV writer)
+DRAFT_ATTRIBUTES = '{"info":{"status":"Draft"}}'
+
+# Delta exports append this column to CSV_HEADERS
+DELTA_CSV_HEADERS = CSV_HEADERS + ['change']
+
+# Columns compared to decide whether a node present in both exports changed
+DELTA_COMPARED_COLUMNS = (1, 2, 4, 5, 11)  # name, type, parentId, rootId, attributes
+
+# Flush streamed CSV output once the buffer reaches this many characters
+CSV_STREAM_CHUNK_SIZE = 64 * 1024
+
+# Node ID strategies for CSV export
+ID_STRATEGIES = ('random', 'batched', 'stable', 'uuid7')
+
+# Default UUIDv5 namespace for stable IDs (override per request with id_namespace)
+DEFAULT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'urn:glossary-generator:pdc-export')
+
+# Random bytes drawn per os.urandom call in the batched and uuid7 strategies
+ID_BATCH_SIZE = 4096
+
+def _format_uuid_hex(hex_digits: str, version: str) -> str:
+    """Format 32 hex digits as a UUID string with the given version and the RFC 4122 variant."""
+    return (f"{hex_digits[:8]}-{hex_digits[8:12]}-{version}{hex_digits[13:16]}-"
+            f"{'89ab'[int(hex_digits[16], 16) & 3]}{hex_digits[17:20]}-{hex_digits[20:32]}")
+
+def _random_hex_batches(digits_per_id: int):
+    """Yield random hex strings of digits_per_id digits, drawn from os.urandom in large batches."""
+    bytes_per_id = (digits_per_id + 1) // 2
+    while True:
+        block = os.urandom(bytes_per_id * ID_BATCH_SIZE).hex()
+        step = bytes_per_id * 2
+        for offset in range(0, len(block), step):
+            yield block[offset:offset + digits_per_id]
+
+def make_id_factory(strategy: str = 'random', namespace: str = None):
+    """Build an id_factory(fqdn) for walk_glossary.
     
-    # CSV headers for PDC format
-    headers = ['_id','name','type','fqdn','parentId','rootId','resourceId','createdAt','updatedAt','createdBy','updatedBy','attributes']
+    random  - uuid4 per node (default)
+    batched - random version 4 UUIDs formatted from batched os.urandom output
+    stable  - UUIDv5 of namespace + FQDN, so re-exports keep the same IDs
+    uuid7   - time-ordered UUIDv7 (millisecond timestamp + monotonic counter)
     
-    # Prepare CSV data
-    rows = []
-    current_time = datetime.utcnow().isoformat() + 'Z'
+    Factories hold no per-node state; walk_glossary makes the keys of duplicate
+    FQDNs unique before they reach the stable strategy.
+    """
+    if strategy == 'random':
+        return lambda fqdn: str(uuid.uuid4())
     
-    def generate_guid():
-        import uuid
-        return str(uuid.uuid4())
+    if strategy == 'batched':
+        random_hex = _random_hex_batches(32)
+        return lambda fqdn: _format_uuid_hex(next(random_hex), '4')
     
-    def process_hierarchy(data, parent_id=None, root_id=None, parent_fqdn=""):
-        """Recursively process the hierarchical data structure"""
+    if strategy == 'stable':
+        if namespace is None:
+            namespace_uuid = DEFAULT_ID_NAMESPACE
+        else:
+            try:
+                namespace_uuid = uuid.UUID(str(namespace))
+            except ValueError:
+                namespace_uuid = uuid.uuid5(uuid.NAMESPACE_URL, str(namespace))
+        namespace_hash = hashlib.sha1(namespace_uuid.bytes)
         
-        if isinstance(data, dict):
-            for key, value in data.items():
-                # Generate IDs
-                item_id = generate_guid()
-                current_root_id = root_id if root_id else item_id
-                
-                # Build FQDN with forward slashes
-                if parent_fqdn:
-                    fqdn = f"{parent_fqdn}/{key}"
-                else:
-                    fqdn = key
-                
-                # Determine type based on hierarchy level and content (lowercase)
-                if parent_id is None:
-                    item_type = "glossary"
-                elif isinstance(value, list) and any(isinstance(item, dict) for item in value):
-                    item_type = "category"
+        def stable_id(fqdn):
+            # Same result as uuid.uuid5(namespace, fqdn) without rehashing the namespace
+            digest = namespace_hash.copy()
+            digest.update(fqdn.encode('utf-8'))
+            return _format_uuid_hex(digest.hexdigest(), '5')
+        
+        return stable_id
+    
+    if strategy == 'uuid7':
+        random_hex = _random_hex_batches(16)
+        last_ms = 0
+        counter = 0
+        prefix = ''
+        
+        def uuid7_id(fqdn):
+            nonlocal last_ms, counter, prefix
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > last_ms:
+                last_ms, counter = now_ms, 0
+                prefix = f"{last_ms >> 16:08x}-{last_ms & 0xffff:04x}-7"
+            else:
+                # Same (or earlier) millisecond: keep IDs strictly increasing
+                counter += 1
+                if counter > 0xfff:
+                    last_ms, counter = last_ms + 1, 0
+                    prefix = f"{last_ms >> 16:08x}-{last_ms & 0xffff:04x}-7"
+            rand_b = next(random_hex)
+            return f"{prefix}{counter:03x}-{'89ab'[int(rand_b[0], 16) & 3]}{rand_b[1:4]}-{rand_b[4:16]}"
+        
+        return uuid7_id
+    
+    raise ValueError(f"Unknown ID strategy '{strategy}', expected one of: {', '.join(ID_STRATEGIES)}")
+
+def _sibling_key(name: str, siblings: set) -> str:
+    """First of name#2, name#3, ... not yet used among a node's children (recorded in siblings)."""
+    occurrence = 2
+    while f"{name}#{occurrence}" in siblings:
+        occurrence += 1
+    unique_name = f"{name}#{occurrence}"
+    siblings.add(unique_name)
+    return unique_name
+
+def walk_glossary(hierarchical_data, id_factory=None):
+    """Walk hierarchical glossary data depth-first with an explicit stack.
+    
+    Yields one (id, name, type, fqdn, parent_id, root_id) tuple per node, in the
+    same pre-order as the glossary JSON. Dict keys become glossary (top level),
+    category (children include a dict) or term nodes; strings are leaf terms.
+    The stack holds one iterator per open list or dict, so siblings are never
+    copied or re-queued, leaf strings are emitted inline, and each FQDN extends
+    its parent's FQDN once. Handles any nesting depth. id_factory(key) supplies
+    node IDs (random UUIDs by default), always in pre-order.
+    
+    A node whose children are a list is typed while its children are walked: it
+    is held back, with any leaf terms ahead of its first dict child, until that
+    dict child turns up (category) or the list ends (term), so no child list is
+    scanned twice.
+    
+    The key is the node's FQDN, except that a name repeated among the children of
+    one node becomes name#2, name#3, ... and the keys of that node's descendants
+    follow it, so deterministic factories still give every node its own ID. Only
+    the names of the children of the nodes on the current path are remembered, not
+    every FQDN of the export. FQDNs that coincide only because a name contains "/"
+    are not told apart.
+    """
+    if id_factory is None:
+        id_factory = lambda fqdn: str(uuid.uuid4())
+    
+    def release(pending, item_type):
+        # pending: [(id, name, fqdn, parent_id, root_id), held leaf rows...]
+        item_id, name, fqdn, parent_id, root_id = pending[0]
+        yield (item_id, name, item_type, fqdn, parent_id, root_id)
+        yield from pending[1:]
+        pending.clear()
+    
+    # Each frame: (is_dict, iterator over children, parent_id, root_id, parent_fqdn, parent_key,
+    # whether parent_key is still the parent's FQDN (no duplicate on the path), names already
+    # used by the parent's children, parent node still waiting for its type or None)
+    stack = [(False, iter((hierarchical_data,)), None, None, "", "", True, set(), None)]
+    while stack:
+        is_dict, children, parent_id, root_id, parent_fqdn, parent_key, key_is_fqdn, siblings, pending = stack[-1]
+        
+        for child in children:
+            if is_dict:
+                key, value = child
+                fqdn = f"{parent_fqdn}/{key}" if parent_fqdn else key
+                if key in siblings:
+                    unique_name = _sibling_key(key, siblings)
+                    id_key = f"{parent_key}/{unique_name}" if parent_key else unique_name
+                    child_key_is_fqdn = False
                 else:
-                    item_type = "term"
-                
-                # Create attributes with proper JSON escaping
-                attributes = '{"info":{"status":"Draft"}}'
-                
-                # Add row
-                row = [
-                    item_id,                    # _id
-                    key,                        # name
-                    item_type,                  # type
-                    fqdn,                       # fqdn
-                    parent_id or '',            # parentId
-                    current_root_id,            # rootId
-                    '',                         # resourceId
-                    current_time,               # createdAt
-                    current_time,               # updatedAt
-                    'system',                   # createdBy
-                    'system',                   # updatedBy
-                    attributes                  # attributes
-                ]
-                rows.append(row)
+                    siblings.add(key)
+                    # Below a duplicate the key path differs from the FQDN
+                    id_key = fqdn if key_is_fqdn else f"{parent_key}/{key}"
+                    child_key_is_fqdn = key_is_fqdn
+                item_id = id_factory(id_key)
+                current_root_id = root_id if root_id else item_id
                 
-                # Process children
+                # Descend into the children before continuing with this node's siblings
                 if isinstance(value, list):
-                    for item in value:
-                        process_hierarchy(item, item_id, current_root_id, fqdn)
-                elif isinstance(value, dict):
-                    process_hierarchy(value, item_id, current_root_id, fqdn)
-        
-        elif isinstance(data, list):
-            for item in data:
-                process_hierarchy(item, parent_id, root_id, parent_fqdn)
-        
-        elif isinstance(data, str):
-            # This is a leaf term
-            item_id = generate_guid()
-            current_root_id = root_id if root_id else item_id
+                    if parent_id is None:
+                        yield (item_id, key, "glossary", fqdn, parent_id, current_root_id)
+                        child_pending = None
+                    else:
+                        # category or term: decided in the child frame
+                        child_pending = [(item_id, key, fqdn, parent_id, current_root_id)]
+                    stack.append((False, iter(value), item_id, current_root_id, fqdn, id_key, child_key_is_fqdn,
+                                  set(), child_pending))
+                    break
+                
+                yield (item_id, key, "glossary" if parent_id is None else "term", fqdn, parent_id, current_root_id)
+                if isinstance(value, dict):
+                    stack.append((True, iter(value.items()), item_id, current_root_id, fqdn, id_key, child_key_is_fqdn,
+                                  set(), None))
+                    break
             
-            # Build FQDN with forward slashes
-            if parent_fqdn:
-                fqdn = f"{parent_fqdn}/{data}"
-            else:
-                fqdn = data
+            elif isinstance(child, str):
+                # This is a leaf term
+                fqdn = f"{parent_fqdn}/{child}" if parent_fqdn else child
+                if child in siblings:
+                    unique_name = _sibling_key(child, siblings)
+                    id_key = f"{parent_key}/{unique_name}" if parent_key else unique_name
+                else:
+                    siblings.add(child)
+                    id_key = fqdn if key_is_fqdn else f"{parent_key}/{child}"
+                item_id = id_factory(id_key)
+                row = (item_id, child, "term", fqdn, parent_id, root_id if root_id else item_id)
+                if pending:
+                    pending.append(row)
+                else:
+                    yield row
             
-            # Create attributes with proper JSON escaping
-            attributes = '{"info":{"status":"Draft"}}'
+            elif isinstance(child, dict):
+                # A dict among the children makes the parent a category
+                if pending:
+                    yield from release(pending, "category")
+                # Nested containers share their parent's children scope
+                stack.append((True, iter(child.items()), parent_id, root_id, parent_fqdn, parent_key, key_is_fqdn,
+                              siblings, None))
+                break
             
-            # Add row
-            row = [
-                item_id,                    # _id
-                data,                       # name
-                "term",                     # type (lowercase)
-                fqdn,                       # fqdn
-                parent_id or '',            # parentId
-                current_root_id,            # rootId
-                '',                         # resourceId
-                current_time,               # createdAt
-                current_time,               # updatedAt
-                'system',                   # createdBy
-                'system',                   # updatedBy
-                attributes                  # attributes
-            ]
-            rows.append(row)
-    
-    # Process the input data
-    process_hierarchy(hierarchical_data)
-    
-    # Generate CSV
-    output = io.StringIO()
-    writer = csv.writer(output, quoting=csv.QUOTE_MINIMAL)
+            elif isinstance(child, list):
+                if pending:
+                    # Only direct dict children count, and the parent must be yielded before
+                    # this list's nodes, so look ahead through the rest of its children once
+                    rest = list(children)
+                    yield from release(pending, "category" if any(isinstance(item, dict) for item in rest) else "term")
+                    stack[-1] = (is_dict, iter(rest), parent_id, root_id, parent_fqdn, parent_key, key_is_fqdn,
+                                 siblings, None)
+                stack.append((False, iter(child), parent_id, root_id, parent_fqdn, parent_key, key_is_fqdn,
+                              siblings, None))
+                break
+        else:
+            # Iterator exhausted: this list or dict is finished; a parent still waiting has no dict children
+            if pending:
+                item_id, name, fqdn, parent_id, root_id = pending[0]
+                yield (item_id, name, "term", fqdn, parent_id, root_id)
+                yield from itertools.islice(pending, 1, None)
+            stack.pop()
+
+def build_export_row(item_id, name, item_type, fqdn, parent_id, root_id, created_at, updated_at):
+    """Build one PDC CSV row in CSV_HEADERS order."""
+    return [
+        item_id,                    # _id
+        name,                       # name
+        item_type,                  # type
+        fqdn,                       # fqdn
+        parent_id or '',            # parentId
+        root_id,                    # rootId
+        '',                         # resourceId
+        created_at,                 # createdAt
+        updated_at,                 # updatedAt
+        'system',                   # createdBy
+        'system',                   # updatedBy
+        DRAFT_ATTRIBUTES            # attributes
+    ]
+
+def iter_glossary_rows(hierarchical_data, id_factory=None):
+    """Yield PDC CSV rows for hierarchical glossary data, one node at a time."""
+    current_time = datetime.utcnow().isoformat() + 'Z'
+    
+    for item_id, name, item_type, fqdn, parent_id, root_id in walk_glossary(hierarchical_data, id_factory):
+        yield build_export_row(item_id, name, item_type, fqdn, parent_id, root_id, current_time, current_time)
+
+def write_csv_chunks(rows, headers: list = CSV_HEADERS, chunk_size: int = CSV_STREAM_CHUNK_SIZE):
+    """Yield CSV text in chunks of about chunk_size characters as rows are consumed.
+    
+    Time spent building rows and CSV text (not time the consumer holds a chunk)
+    is recorded in the CSV transform histogram once the stream is exhausted.
+    """
+    route = current_route()
+    busy_start = time.perf_counter()
+    busy_seconds = 0.0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_MINIMAL)
     writer.writerow(headers)
-    writer.writerows(rows)
     
-    return output.getvalue()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            busy_seconds += time.perf_counter() - busy_start
+            yield buffer.getvalue()
+            busy_start = time.perf_counter()
+            buffer.seek(0)
+            buffer.truncate(0)
+    
+    busy_seconds += time.perf_counter() - busy_start
+    CSV_TRANSFORM_SECONDS.observe(busy_seconds, route=route)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def stream_csv(hierarchical_data, chunk_size: int = CSV_STREAM_CHUNK_SIZE, id_factory=None):
+    """Yield the PDC CSV export in chunks while walking the hierarchy (flat memory use)."""
+    return write_csv_chunks(iter_glossary_rows(hierarchical_data, id_factory), chunk_size=chunk_size)
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header value allows a gzip-encoded response."""
+    qualities = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    for coding in ('gzip', 'x-gzip'):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return qualities.get('*', 0) > 0
+
+def gzip_stream(chunks):
+    """Gzip-compress a stream of text chunks incrementally."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode('utf-8'))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def transform_to_csv(hierarchical_data, id_factory=None):
+    """The whole CSV export of a glossary as one string.
+    
+    Kept as a thin wrapper over stream_csv for callers that need the full text;
+    routes stream the rows instead, so there is a single CSV code path.
+    """
+    return ''.join(stream_csv(hierarchical_data, id_factory=id_factory))
+
+def index_export_rows(rows) -> dict:
+    """Index export rows (pre-order, parents first) by the ID key walk_glossary gives their node.
+    
+    Replays walk_glossary's sibling numbering, so a name repeated among one node's
+    children is keyed name#2, name#3, ... exactly as in the walk and every row is
+    kept. A row whose parentId is not in the export is placed by its FQDN.
+    """
+    keys_by_id = {}
+    siblings_by_parent = {}
+    index = {}
+    for row in rows:
+        item_id, name, parent_id = row[0], row[1], row[4]
+        parent_key = keys_by_id.get(parent_id) if parent_id else ''
+        if parent_key is None:
+            parent_key = row[3].rpartition('/')[0]
+        siblings = siblings_by_parent.setdefault(parent_key, set())
+        if name in siblings:
+            name = _sibling_key(name, siblings)
+        else:
+            siblings.add(name)
+        key = f"{parent_key}/{name}" if parent_key else name
+        keys_by_id[item_id] = key
+        index.setdefault(key, row)
+    return index
+
+def parse_export_csv(csv_text: str) -> dict:
+    """Index a previous PDC CSV export by node ID key (see index_export_rows)."""
+    reader = csv.reader(io.StringIO(csv_text))
+    header = next(reader, None)
+    if not header or 'fqdn' not in header:
+        raise ValueError("Previous export must be a PDC CSV with a header row including 'fqdn'")
+    positions = [header.index(column) if column in header else None for column in CSV_HEADERS]
+    
+    return index_export_rows(
+        [record[position] if position is not None and position < len(record) else '' for position in positions]
+        for record in reader if record
+    )
+
+def iter_delta_rows(hierarchical_data, previous_index: dict, id_factory=None, summary: dict = None, on_row=None):
+    """Yield only the added, changed and removed rows of a new export against a previous one.
+    
+    previous_index is keyed like index_export_rows. Nodes whose ID key exists in it
+    keep their previous ID, so unchanged nodes (and the parentId/rootId references
+    to them) stay stable, including nodes whose FQDN is repeated. Each yielded row
+    ends with a change column (added, changed or removed). summary, if given, is
+    filled with per-change counts; on_row, if given, receives every row of the new
+    full export (including unchanged ones). Linear in the size of both exports.
+    """
+    if id_factory is None:
+        id_factory = make_id_factory()
+    if summary is None:
+        summary = {}
+    summary.update({"added": 0, "changed": 0, "removed": 0, "unchanged": 0})
+    current_time = datetime.utcnow().isoformat() + 'Z'
+    claimed = set()
+    # Previous rows whose ID was handed out, until their node is yielded
+    matched = {}
+    
+    def reuse_previous_id(key):
+        previous = previous_index.get(key)
+        if previous is not None and key not in claimed:
+            claimed.add(key)
+            matched[previous[0]] = previous
+            return previous[0]
+        return id_factory(key)
+    
+    for item_id, name, item_type, fqdn, parent_id, root_id in walk_glossary(hierarchical_data, reuse_previous_id):
+        previous = matched.pop(item_id, None)
+        if previous is None:
+            row = build_export_row(item_id, name, item_type, fqdn, parent_id, root_id, current_time, current_time)
+            change = "added"
+        else:
+            row = build_export_row(item_id, name, item_type, fqdn, parent_id, root_id, previous[7], previous[8])
+            if all(row[column] == previous[column] for column in DELTA_COMPARED_COLUMNS):
+                change = None
+            else:
+                row[8] = current_time
+                change = "changed"
+        
+        if on_row:
+            on_row(row)
+        if change is None:
+            summary["unchanged"] += 1
+        else:
+            summary[change] += 1
+            yield row + [change]
+    
+    for key, previous in previous_index.items():
+        if key not in claimed:
+            summary["removed"] += 1
+            yield previous + ["removed"]
+
+def create_database_engine(database_url: str, pool_size: int = None, max_overflow: int = None):
+    """Create an engine with connection timeout and pooling options suited to its dialect."""
+    url = sqlalchemy.engine.make_url(database_url)
+    engine_kwargs = {
+        'pool_recycle': 3600,
+        'pool_pre_ping': True
+    }
+    
+    # In-memory SQLite uses a singleton pool that takes no sizing options,
+    # and sqlite3 has no connect_timeout argument
+    is_sqlite = url.get_backend_name() == 'sqlite'
+    if not (is_sqlite and url.database in (None, '', ':memory:')):
+        engine_kwargs['pool_timeout'] = 10
+        if pool_size is not None:
+            engine_kwargs['pool_size'] = pool_size
+        if max_overflow is not None:
+            engine_kwargs['max_overflow'] = max_overflow
+    if not is_sqlite:
+        engine_kwargs['connect_args'] = {"connect_timeout": 10}
+    
+    return sqlalchemy.create_engine(url, **engine_kwargs)
 
 def get_database_engine():
     """Get database engine with lazy loading and connection pooling"""
@@ -224,33 +1017,421 @@ def get_database_engine():
     if _db_engine is not None:
         return _db_engine
     
-    try:
-        config = load_config()
-        if not config or not config.get('database_url'):
-            logger.error("No database URL configured")
+    with _db_engine_lock:
+        if _db_engine is not None:
+            return _db_engine
+        try:
+            config = load_config()
+            if not config or not config.get('database_url'):
+                logger.error("No database URL configured")
+                return None
+            
+            # Create engine with connection timeout and retry logic
+            engine = create_database_engine(config['database_url'])
+            
+            # Test connection
+            with engine.connect() as conn:
+                conn.execute(sqlalchemy.text("SELECT 1"))
+            
+            logger.info("Database connection established successfully")
+            _db_engine = engine
+            return _db_engine
+            
+        except Exception as e:
+            logger.error(f"Database connection failed: {e}")
             return None
-        
-        # Create engine with connection timeout and retry logic
-        _db_engine = create_engine(
-            config['database_url'],
-            pool_timeout=10,
-            pool_recycle=3600,
-            pool_pre_ping=True,
-            connect_args={"connect_timeout": 10}
+
+def _get_analysis_cache_connection():
+    """Open the analysis cache database, creating it on first use (returns None when disabled)."""
+    global _analysis_cache_initialized
+    config = load_config()
+    if not config or not config.get('analysis_cache_enabled'):
+        return None
+    
+    cache_path = config['analysis_cache_path']
+    if not _analysis_cache_initialized:
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    conn = sqlite3.connect(cache_path, timeout=5)
+    if not _analysis_cache_initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            "cache_key TEXT PRIMARY KEY, data TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, last_accessed REAL NOT NULL)"
         )
-        
-        # Test connection
-        with _db_engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        
-        logger.info("Database connection established successfully")
-        return _db_engine
-        
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_cache_lru ON analysis_cache (last_accessed)")
+        conn.commit()
+        _analysis_cache_initialized = True
+    return conn
+
+def analysis_cache_key(schema_summary: str, prompt_template: str, api_config: dict, options: dict = None,
+                       prompt_version: str = None) -> str:
+    """Content-addressed cache key over the schema summary, prompt template text and version, and model parameters.
+    
+    options holds any other settings that change the result (e.g. map-reduce chunking).
+    """
+    model_params = {
+        param: api_config.get(param)
+        for param in ('base_url', 'deployment_id', 'api_version', 'model', 'max_tokens',
+                      'temperature', 'top_p', 'frequency_penalty', 'presence_penalty')
+    }
+    fingerprint = json.dumps({
+        "schema_summary": schema_summary,
+        "prompt_template": prompt_template,
+        "prompt_version": prompt_version,
+        "model_params": model_params,
+        "options": options
+    }, sort_keys=True)
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+def analysis_cache_get(cache_key: str):
+    """Return the cached glossary for a key, or None on miss or expiry."""
+    config = load_config()
+    try:
+        with _analysis_cache_lock:
+            conn = _get_analysis_cache_connection()
+            if conn is None:
+                return None
+            try:
+                now = time.time()
+                row = conn.execute(
+                    "SELECT data, created_at FROM analysis_cache WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if now - row[1] > config['analysis_cache_ttl']:
+                    conn.execute("DELETE FROM analysis_cache WHERE cache_key = ?", (cache_key,))
+                    conn.commit()
+                    return None
+                conn.execute("UPDATE analysis_cache SET last_accessed = ? WHERE cache_key = ?", (now, cache_key))
+                conn.commit()
+                return json.loads(row[0])
+            finally:
+                conn.close()
     except Exception as e:
-        logger.error(f"Database connection failed: {e}")
-        _db_engine = None
+        logger.warning(f"Analysis cache lookup failed: {e}")
         return None
 
+def analysis_cache_put(cache_key: str, data) -> None:
+    """Store a glossary in the cache, then evict expired and least recently used entries over the size limit."""
+    config = load_config()
+    try:
+        payload = json.dumps(data)
+        with _analysis_cache_lock:
+            conn = _get_analysis_cache_connection()
+            if conn is None:
+                return
+            try:
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO analysis_cache (cache_key, data, size, created_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (cache_key, payload, len(payload), now, now)
+                )
+                conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (now - config['analysis_cache_ttl'],))
+                
+                # Keep the most recently used entries that fit in the size budget
+                total_size = 0
+                evicted = []
+                for key, size in conn.execute("SELECT cache_key, size FROM analysis_cache ORDER BY last_accessed DESC"):
+                    total_size += size
+                    if total_size > config['analysis_cache_max_bytes']:
+                        evicted.append((key,))
+                if evicted:
+                    conn.executemany("DELETE FROM analysis_cache WHERE cache_key = ?", evicted)
+                    logger.info(f"Analysis cache evicted {len(evicted)} least recently used entries")
+                conn.commit()
+            finally:
+                conn.close()
+    except Exception as e:
+        logger.warning(f"Analysis cache store failed: {e}")
+
+def _get_engine_key_secret() -> bytes:
+    """Random secret keying the credential digests in engine keys, kept in the schema snapshot store.
+    
+    Stored once per installation so persisted snapshots stay shared across workers and
+    restarts; if the store cannot be opened, a per-process secret is used instead.
+    """
+    global _engine_key_secret
+    with _engine_key_secret_lock:
+        if _engine_key_secret is not None:
+            return _engine_key_secret
+        try:
+            conn = _get_schema_snapshot_connection()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT secret FROM engine_key_secret").fetchone()
+                if row is None:
+                    row = (secrets.token_hex(32),)
+                    conn.execute("INSERT INTO engine_key_secret (secret) VALUES (?)", row)
+                conn.commit()
+            finally:
+                conn.close()
+            _engine_key_secret = bytes.fromhex(row[0])
+        except Exception as e:
+            logger.warning(f"Engine key secret unavailable from the snapshot store, using a per-process one: {e}")
+            _engine_key_secret = secrets.token_bytes(32)
+        return _engine_key_secret
+
+def engine_registry_key(database_url: str) -> str:
+    """Normalize a database URL into a registry key with the credentials replaced by a keyed digest (HMAC)."""
+    url = sqlalchemy.engine.make_url(database_url)
+    credentials = f"{url.username or ''}:{url.password or ''}"
+    credentials_hash = hmac.new(_get_engine_key_secret(), credentials.encode('utf-8'), hashlib.sha256).hexdigest()[:16]
+    normalized = sqlalchemy.engine.URL.create(
+        drivername=url.drivername.lower(),
+        host=url.host.lower() if url.host else url.host,
+        port=url.port,
+        database=url.database,
+        query=dict(sorted(url.query.items()))
+    ).render_as_string(hide_password=False)
+    return f"{normalized}#{credentials_hash}"
+
+def engine_display_key(key: str) -> str:
+    """An engine registry key for logs and /metrics/engines: the normalized URL without the credential digest."""
+    return key.split('#', 1)[0]
+
+def _dispose_registered_engine(key: str, entry: dict, reason: str):
+    """Dispose a registry engine's connection pool."""
+    try:
+        entry["engine"].dispose()
+        logger.info(f"Disposed request database engine {engine_display_key(key)} ({reason})")
+    except Exception as e:
+        logger.warning(f"Error disposing request database engine {engine_display_key(key)}: {e}")
+
+def _evict_idle_engines():
+    """Dispose registry engines that have been idle longer than the configured timeout."""
+    config = load_config() or {}
+    idle_timeout = config.get('engine_idle_timeout', 600)
+    now = time.time()
+    with _engine_registry_lock:
+        expired = [
+            (key, entry) for key, entry in _engine_registry.items()
+            if now - entry["last_used"] > idle_timeout
+        ]
+        for key, _ in expired:
+            del _engine_registry[key]
+    for key, entry in expired:
+        _dispose_registered_engine(key, entry, "idle timeout")
+
+def get_registered_engine(database_url: str):
+    """Get a pooled engine for a request-supplied database URL from the bounded LRU registry.
+    
+    Engines are keyed on the normalized URL (credentials hashed), tested with SELECT 1
+    only when first created, and disposed when evicted for idleness or capacity.
+    """
+    config = load_config() or {}
+    key = engine_registry_key(database_url)
+    _evict_idle_engines()
+    
+    with _engine_registry_lock:
+        entry = _engine_registry.get(key)
+        if entry is not None:
+            _engine_registry.move_to_end(key)
+            entry["last_used"] = time.time()
+            entry["requests"] += 1
+            return entry["engine"]
+    
+    engine = create_database_engine(
+        database_url,
+        pool_size=config.get('engine_pool_size', 5),
+        max_overflow=config.get('engine_max_overflow', 5)
+    )
+    try:
+        with engine.connect() as conn:
+            conn.execute(sqlalchemy.text("SELECT 1"))
+    except Exception:
+        engine.dispose()
+        raise
+    
+    evicted = []
+    with _engine_registry_lock:
+        existing = _engine_registry.get(key)
+        if existing is not None:
+            # Another request registered the same database while we were connecting
+            evicted.append((key, {"engine": engine}))
+            _engine_registry.move_to_end(key)
+            existing["last_used"] = time.time()
+            existing["requests"] += 1
+            engine = existing["engine"]
+        else:
+            now = time.time()
+            _engine_registry[key] = {
+                "engine": engine,
+                "created_at": now,
+                "last_used": now,
+                "requests": 1
+            }
+            while len(_engine_registry) > config.get('engine_registry_max_engines', 8):
+                evicted.append(_engine_registry.popitem(last=False))
+    for evicted_key, evicted_entry in evicted:
+        _dispose_registered_engine(evicted_key, evicted_entry, "registry capacity")
+    
+    logger.info(f"Registered request database engine {engine_display_key(key)}")
+    return engine
+
+def get_engine_registry_stats() -> list:
+    """Describe the live registry engines and their connection pool usage."""
+    _evict_idle_engines()
+    now = time.time()
+    with _engine_registry_lock:
+        entries = list(_engine_registry.items())
+    
+    def pool_stat(pool, name):
+        # Only QueuePool-style pools expose sizing and checkout counters as methods
+        stat = getattr(pool, name, None)
+        return stat() if callable(stat) else None
+    
+    engines = []
+    for key, entry in reversed(entries):
+        pool = entry["engine"].pool
+        engines.append({
+            "key": engine_display_key(key),
+            "dialect": entry["engine"].dialect.name,
+            "created_at": datetime.utcfromtimestamp(entry["created_at"]).isoformat() + "Z",
+            "idle_seconds": round(now - entry["last_used"], 1),
+            "requests": entry["requests"],
+            "pool": {
+                "class": type(pool).__name__,
+                "size": pool_stat(pool, 'size'),
+                "checked_out": pool_stat(pool, 'checkedout'),
+                "checked_in": pool_stat(pool, 'checkedin'),
+                "overflow": pool_stat(pool, 'overflow')
+            }
+        })
+    return engines
+
+def _get_export_store_connection():
+    """Open the export store database, creating it on first use."""
+    global _export_store_initialized
+    config = load_config() or {}
+    store_path = config.get('export_store_path', 'data/exports.db')
+    if not _export_store_initialized:
+        store_dir = os.path.dirname(store_path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+    
+    conn = sqlite3.connect(store_path, timeout=10)
+    if not _export_store_initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS exports ("
+            "export_id TEXT PRIMARY KEY, status TEXT NOT NULL, row_count INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, completed_at REAL)"
+        )
+        # Stores created before rows were keyed by id (one row per FQDN) are rebuilt
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(export_rows)")}
+        if columns and 'item_id' not in columns:
+            conn.execute("ALTER TABLE export_rows RENAME TO export_rows_by_fqdn")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS export_rows ("
+            "export_id TEXT NOT NULL, item_id TEXT NOT NULL, row TEXT NOT NULL, PRIMARY KEY (export_id, item_id))"
+        )
+        if columns and 'item_id' not in columns:
+            conn.executemany(
+                "INSERT OR IGNORE INTO export_rows (export_id, item_id, row) VALUES (?, ?, ?)",
+                ((export_id, json.loads(row)[0], row)
+                 for export_id, row in conn.execute("SELECT export_id, row FROM export_rows_by_fqdn ORDER BY rowid").fetchall())
+            )
+            conn.execute("DROP TABLE export_rows_by_fqdn")
+        conn.commit()
+        _export_store_initialized = True
+    return conn
+
+def create_export() -> str:
+    """Register a new stored export and drop the oldest ones beyond the retention limit."""
+    config = load_config() or {}
+    export_id = uuid.uuid4().hex
+    with _export_store_lock:
+        conn = _get_export_store_connection()
+        try:
+            conn.execute(
+                "INSERT INTO exports (export_id, status, created_at) VALUES (?, 'writing', ?)",
+                (export_id, time.time())
+            )
+            stale = conn.execute(
+                "SELECT export_id FROM exports ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+                (config.get('export_store_max_exports', 50),)
+            ).fetchall()
+            if stale:
+                conn.executemany("DELETE FROM export_rows WHERE export_id = ?", stale)
+                conn.executemany("DELETE FROM exports WHERE export_id = ?", stale)
+            conn.commit()
+        finally:
+            conn.close()
+    return export_id
+
+def open_export_recorder(export_id: str, batch_size: int = 1000):
+    """Return (record, finish) callables that persist export rows in batches.
+    
+    record(row) buffers one CSV row; finish() flushes the rest and marks the export
+    complete. Exports that are never finished are not loadable.
+    """
+    batch = []
+    row_count = [0]
+    
+    def flush():
+        if not batch:
+            return
+        with _export_store_lock:
+            conn = _get_export_store_connection()
+            try:
+                stored = conn.executemany(
+                    "INSERT OR IGNORE INTO export_rows (export_id, item_id, row) VALUES (?, ?, ?)", batch
+                ).rowcount
+                conn.commit()
+            finally:
+                conn.close()
+        row_count[0] += stored
+        batch.clear()
+    
+    def record(row):
+        batch.append((export_id, row[0], json.dumps(row)))
+        if len(batch) >= batch_size:
+            flush()
+    
+    def finish():
+        flush()
+        with _export_store_lock:
+            conn = _get_export_store_connection()
+            try:
+                conn.execute(
+                    "UPDATE exports SET status = 'complete', row_count = ?, completed_at = ? WHERE export_id = ?",
+                    (row_count[0], time.time(), export_id)
+                )
+                conn.commit()
+            finally:
+                conn.close()
+        logger.info(f"Stored export {export_id} ({row_count[0]} rows)")
+    
+    return record, finish
+
+def record_export_rows(rows, export_id: str):
+    """Pass rows through unchanged while persisting them as a stored export."""
+    record, finish = open_export_recorder(export_id)
+    for row in rows:
+        record(row)
+        yield row
+    finish()
+
+def load_export_index(export_id: str):
+    """Load a complete stored export as a row index keyed like index_export_rows, or None if unavailable."""
+    with _export_store_lock:
+        conn = _get_export_store_connection()
+        try:
+            status = conn.execute("SELECT status FROM exports WHERE export_id = ?", (export_id,)).fetchone()
+            if status is None or status[0] != 'complete':
+                return None
+            return index_export_rows(
+                json.loads(row)
+                for row, in conn.execute("SELECT row FROM export_rows WHERE export_id = ? ORDER BY rowid", (export_id,))
+            )
+        finally:
+            conn.close()
+
 def clean_and_validate_json(response_text: str) -> dict:
     """Clean API response and validate it's proper JSON."""
     if not response_text:
@@ -279,144 +1460,680 @@ def clean_and_validate_json(response_text: str) -> dict:
         logger.warning(f"Invalid JSON in API response: {e}")
         return None
 
-def make_api_call(schema_summary: str, api_config: dict = None, prompt_template_name: str = "default") -> dict:
-    """Make an API call with the schema summary and configured prompt."""
-    config = load_config()
-    if not config:
-        logger.error("No configuration available")
-        return None
-    
-    # Start with defaults from environment configuration
-    default_api_config = {
-        'base_url': config.get('api_base_url'),
-        'api_key': config.get('api_key'),
-        'deployment_id': config.get('api_deployment_id', 'model-router'),
-        'api_version': config.get('api_version', '2025-01-01-preview'),
-        'max_tokens': config.get('api_max_tokens', 8192),
-        'temperature': config.get('api_temperature', 0.7),
-        'timeout': config.get('api_timeout', 60.0),
-        'max_retries': config.get('api_max_retries', 3),
-        'top_p': 0.95,
-        'frequency_penalty': 0,
-        'presence_penalty': 0,
-        'model': 'model-router'
-    }
+class StreamedJSONError(ValueError):
+    """Raised by IncrementalJSONParser as soon as streamed text cannot be valid JSON."""
     
-    # Merge with any provided overrides
-    if api_config:
-        # Update defaults with any provided overrides
-        default_api_config.update(api_config)
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} at character {position}")
+        self.position = position
+
+# Characters that may appear in a JSON number or true/false/null literal
+JSON_LITERAL_CHARS = frozenset('0123456789+-.eEtrufalsn')
+JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+class IncrementalJSONParser:
+    """Validate a streamed JSON completion as it arrives and report glossary nodes.
     
-    # Use the merged configuration
-    api_config = default_api_config
+    feed() takes text deltas in order, strips a leading ```json / ``` fence and a
+    trailing ``` fence on the fly, and raises StreamedJSONError at the first
+    character that cannot belong to a valid JSON document, so the caller can
+    abort the upstream request instead of paying for the rest of a bad
+    generation. on_node, if given, is called with {"name", "fqdn", "level"} for
+    each object key and each string array item as soon as it is complete, using
+    the same "/"-joined FQDNs as the CSV export. close() returns the parsed value.
+    """
     
-    base_url = api_config.get('base_url')
-    deployment_id = api_config.get('deployment_id', 'model-router')
-    api_version = api_config.get('api_version', '2025-01-01-preview')
-    api_key = api_config.get('api_key')
-    max_retries = api_config.get('max_retries', 3)
+    def __init__(self, on_node=None):
+        self.on_node = on_node
+        self.position = 0
+        self.state = 'prefix'     # prefix, fence, value, key_or_end, key, colon, comma_or_end, value_or_end, done
+        self.stack = []           # one [container, current key] frame per open object/array
+        self.prefix = ''
+        self.string_chars = None  # characters of the string being read, None outside strings
+        self.string_is_key = False
+        self.escape = None        # None, '' after a backslash, or the hex digits of a \u escape
+        self.literal = ''
+        self.text = []            # the JSON document without fences
     
-    if not all([base_url, api_key]):
-        logger.error("Missing required API configuration (base_url, api_key)")
-        return None
+    def fail(self, message: str):
+        raise StreamedJSONError(message, self.position)
     
-    # Load prompt template from prompts.json
-    prompts = load_prompts()
-    if not prompts:
-        logger.error("Failed to load prompt templates")
-        return None
+    def feed(self, chunk: str):
+        """Consume the next text delta; raises StreamedJSONError on a structural error."""
+        for char in chunk:
+            self.position += 1
+            self._feed_char(char)
     
-    # Get the specified prompt template
-    if prompt_template_name not in prompts:
-        logger.error(f"Prompt template '{prompt_template_name}' not found in prompts.json")
-        return None
+    def _feed_char(self, char: str):
+        if self.state in ('prefix', 'fence'):
+            if self.state == 'prefix' and (char == '`' or self.prefix):
+                # Opening markdown fence: three backticks and an optional language tag
+                if len(self.prefix) < 3:
+                    if char != '`':
+                        self.fail("Unexpected text before JSON")
+                    self.prefix += char
+                    return
+                if char == '\n':
+                    self.state = 'fence'
+                    return
+                if char.isalnum() or char in ' \t\r':
+                    self.prefix += char
+                    return
+            elif char.isspace():
+                return
+            self.state = 'value'
+            if char not in '{[':
+                self.fail(f"Expected '{{' or '[' to start the JSON document, got {char!r}")
+        
+        if self.string_chars is not None:
+            self._feed_string_char(char)
+            return
+        
+        if self.state == 'done':
+            if not (char.isspace() or char == '`'):
+                self.fail(f"Unexpected {char!r} after the JSON document")
+            return
+        
+        if self.literal:
+            if char in JSON_LITERAL_CHARS:
+                self.literal += char
+                self.text.append(char)
+                return
+            self._end_literal()
+        
+        if char.isspace():
+            self.text.append(char)
+            return
+        
+        state = self.state
+        self.text.append(char)
+        if state in ('value', 'value_or_end'):
+            if char == ']' and state == 'value_or_end':
+                self._close('array')
+            elif char == '{':
+                self.stack.append(['object', None])
+                self.state = 'key_or_end'
+            elif char == '[':
+                self.stack.append(['array', None])
+                self.state = 'value_or_end'
+            elif char == '"':
+                self.string_chars = []
+                self.string_is_key = False
+            elif char in JSON_LITERAL_CHARS:
+                self.literal = char
+            else:
+                self.fail(f"Unexpected {char!r} where a value was expected")
+        elif state in ('key_or_end', 'key'):
+            if char == '}' and state == 'key_or_end':
+                self._close('object')
+            elif char == '"':
+                self.string_chars = []
+                self.string_is_key = True
+            else:
+                self.fail(f"Unexpected {char!r} where an object key was expected")
+        elif state == 'colon':
+            if char != ':':
+                self.fail(f"Expected ':' after object key, got {char!r}")
+            self.state = 'value'
+        elif state == 'comma_or_end':
+            container = self.stack[-1][0]
+            if char == ',':
+                self.state = 'key' if container == 'object' else 'value'
+            elif char == '}' and container == 'object':
+                self._close('object')
+            elif char == ']' and container == 'array':
+                self._close('array')
+            else:
+                self.fail(f"Unexpected {char!r} in {container}")
     
-    prompt_info = prompts[prompt_template_name]
-    prompt_template = prompt_info["template"]
+    def _feed_string_char(self, char: str):
+        self.text.append(char)
+        if self.escape is not None:
+            if self.escape == '' and char != 'u':
+                if char not in JSON_ESCAPES:
+                    self.fail(f"Invalid escape '\\{char}'")
+                self.string_chars.append(JSON_ESCAPES[char])
+                self.escape = None
+            elif self.escape == '':
+                self.escape = 'u'
+            else:
+                self.escape += char
+                if char not in '0123456789abcdefABCDEF':
+                    self.fail("Invalid \\u escape")
+                if len(self.escape) == 5:
+                    code = int(self.escape[1:], 16)
+                    previous = self.string_chars[-1] if self.string_chars else ''
+                    if 0xDC00 <= code <= 0xDFFF and '\ud800' <= previous <= '\udbff':
+                        # Low half of a \uD83D\uDE00-style surrogate pair: combine, as json.loads does
+                        code = 0x10000 + ((ord(previous) - 0xD800) << 10) + (code - 0xDC00)
+                        self.string_chars.pop()
+                    self.string_chars.append(chr(code))
+                    self.escape = None
+        elif char == '\\':
+            self.escape = ''
+        elif char == '"':
+            self._end_string(''.join(self.string_chars))
+        elif char < ' ':
+            self.fail("Unescaped control character in string")
+        else:
+            self.string_chars.append(char)
     
-    logger.info(f"Using prompt template: {prompt_info['name']} - {prompt_info['description']}")
+    def _end_string(self, value: str):
+        self.string_chars = None
+        if self.string_is_key:
+            self.stack[-1][1] = value
+            self._emit(value)
+            self.state = 'colon'
+        else:
+            if self.stack and self.stack[-1][0] == 'array':
+                self._emit(value)
+            self._end_value()
     
-    formatted_prompt = prompt_template.format(schema_summary=schema_summary)
+    def _end_literal(self):
+        try:
+            json.loads(self.literal)
+        except json.JSONDecodeError:
+            self.fail(f"Invalid literal {self.literal!r}")
+        self.literal = ''
+        self._end_value()
     
-    # Log the first 300 characters of the formatted prompt for debugging
-    logger.info(f"Generated prompt for AI ({len(formatted_prompt)} chars): {formatted_prompt[:300]}{'...' if len(formatted_prompt) > 300 else ''}")
+    def _close(self, container: str):
+        self.stack.pop()
+        self._end_value()
     
-    message = {
-        "messages": [
-            {
-                "role": "user",
-                "content": formatted_prompt
-            }
-        ],
-        "max_tokens": api_config.get("max_tokens", 8192),
-        "temperature": api_config.get("temperature", 0.7),
-        "top_p": api_config.get("top_p", 0.95),
-        "frequency_penalty": api_config.get("frequency_penalty", 0),
-        "presence_penalty": api_config.get("presence_penalty", 0),
-        "model": api_config.get("model", "model-router")
-    }
+    def _end_value(self):
+        self.state = 'comma_or_end' if self.stack else 'done'
     
-    for attempt in range(1, max_retries + 1):
-        logger.info(f"Making API call attempt {attempt}/{max_retries} to: {base_url}")
+    def _emit(self, name: str):
+        if self.on_node is None:
+            return
+        # FQDN from the keys of the enclosing objects, as walk_glossary builds it
+        parents = [key for container, key in self.stack[:-1] if container == 'object']
+        fqdn = '/'.join(parents + [name])
+        self.on_node({"name": name, "fqdn": fqdn, "level": len(parents)})
+    
+    def close(self):
+        """Finish the stream and return the parsed JSON value."""
+        if self.literal and not self.stack:
+            self._end_literal()
+        if self.state != 'done':
+            self.fail("Incomplete JSON document")
+        return json.loads(''.join(self.text))
+
+def get_http_client() -> httpx.Client:
+    """Get the process-wide pooled HTTP client for upstream API calls (lazy loading)."""
+    global _http_client
+    if _http_client is not None:
+        return _http_client
+    
+    with _http_client_lock:
+        if _http_client is not None:
+            return _http_client
+        
+        config = load_config() or {}
+        http2 = config.get('http2_enabled', False)
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed, using HTTP/1.1")
+                http2 = False
         
+        _http_client = httpx.Client(http2=http2, **_http_client_settings())
+        logger.info(f"HTTP client pool created (http2={http2}, max_connections={config.get('http_max_connections', 20)})")
+        return _http_client
+
+def close_http_client():
+    """Close the pooled HTTP client and its connections."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+atexit.register(close_http_client)
+
+def api_post(url: str, api_config: dict, **kwargs) -> httpx.Response:
+    """POST to the upstream API over the pooled client, reusing warm keep-alive connections."""
+    config = load_config() or {}
+    timeout = httpx.Timeout(
+        api_config.get('timeout', 60.0),
+        connect=api_config.get('connect_timeout', config.get('api_connect_timeout', 10.0))
+    )
+    with _http_client_lock:
+        _http_stats["requests"] += 1
+        _http_stats["in_flight"] += 1
+    try:
+        return get_http_client().post(url, timeout=timeout, **kwargs)
+    except Exception:
+        with _http_client_lock:
+            _http_stats["errors"] += 1
+        raise
+    finally:
+        with _http_client_lock:
+            _http_stats["in_flight"] -= 1
+
+def _http_client_settings() -> dict:
+    """Connection limits and timeouts shared by the sync and async HTTP clients."""
+    config = load_config() or {}
+    return {
+        "limits": httpx.Limits(
+            max_connections=config.get('http_max_connections', 20),
+            max_keepalive_connections=config.get('http_max_keepalive_connections', 10),
+            keepalive_expiry=config.get('http_keepalive_expiry', 30.0)
+        ),
+        "timeout": httpx.Timeout(
+            config.get('api_timeout', 60.0),
+            connect=config.get('api_connect_timeout', 10.0)
+        )
+    }
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the pooled async HTTP client for the running event loop (lazy loading).
+    
+    An AsyncClient is bound to the event loop it was first used on, so a new client
+    is created if the ASGI server runs a different loop (e.g. after a reload).
+    """
+    global _async_http_client, _async_http_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_http_client is None or _async_http_client_loop is not loop:
+        _async_http_client = httpx.AsyncClient(**_http_client_settings())
+        _async_http_client_loop = loop
+        logger.info("Async HTTP client pool created")
+    return _async_http_client
+
+async def close_async_http_client():
+    """Close the async HTTP client (called on ASGI lifespan shutdown)."""
+    global _async_http_client, _async_http_client_loop
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
+        _async_http_client_loop = None
+
+async def api_post_async(url: str, api_config: dict, **kwargs) -> httpx.Response:
+    """POST to the upstream API over the pooled async client."""
+    config = load_config() or {}
+    timeout = httpx.Timeout(
+        api_config.get('timeout', 60.0),
+        connect=api_config.get('connect_timeout', config.get('api_connect_timeout', 10.0))
+    )
+    with _http_client_lock:
+        _http_stats["requests"] += 1
+        _http_stats["in_flight"] += 1
+    try:
+        return await get_async_http_client().post(url, timeout=timeout, **kwargs)
+    except Exception:
+        with _http_client_lock:
+            _http_stats["errors"] += 1
+        raise
+    finally:
+        with _http_client_lock:
+            _http_stats["in_flight"] -= 1
+
+@contextlib.contextmanager
+def api_stream(url: str, api_config: dict, **kwargs):
+    """Streaming POST to the upstream API over the pooled client (context manager yielding the response)."""
+    config = load_config() or {}
+    timeout = httpx.Timeout(
+        api_config.get('timeout', 60.0),
+        connect=api_config.get('connect_timeout', config.get('api_connect_timeout', 10.0))
+    )
+    with _http_client_lock:
+        _http_stats["requests"] += 1
+        _http_stats["in_flight"] += 1
+    try:
+        with get_http_client().stream('POST', url, timeout=timeout, **kwargs) as response:
+            yield response
+    except Exception:
+        with _http_client_lock:
+            _http_stats["errors"] += 1
+        raise
+    finally:
+        with _http_client_lock:
+            _http_stats["in_flight"] -= 1
+
+@contextlib.asynccontextmanager
+async def api_stream_async(url: str, api_config: dict, **kwargs):
+    """Streaming POST to the upstream API over the pooled async client."""
+    config = load_config() or {}
+    timeout = httpx.Timeout(
+        api_config.get('timeout', 60.0),
+        connect=api_config.get('connect_timeout', config.get('api_connect_timeout', 10.0))
+    )
+    with _http_client_lock:
+        _http_stats["requests"] += 1
+        _http_stats["in_flight"] += 1
+    try:
+        async with get_async_http_client().stream('POST', url, timeout=timeout, **kwargs) as response:
+            yield response
+    except Exception:
+        with _http_client_lock:
+            _http_stats["errors"] += 1
+        raise
+    finally:
+        with _http_client_lock:
+            _http_stats["in_flight"] -= 1
+
+def _pool_connections(client) -> list:
+    """Live connections of a client's default and mounted transports, or None if they cannot be read.
+    
+    httpx has no public API for pool state, so this reads httpcore's connection pool
+    defensively: a custom transport, a proxy mount without a pool or a renamed
+    attribute after an upgrade yields None instead of an error.
+    """
+    transports = [getattr(client, '_transport', None)]
+    transports.extend((getattr(client, '_mounts', None) or {}).values())
+    connections = None
+    for transport in transports:
+        pool_connections = getattr(getattr(transport, '_pool', None), 'connections', None)
+        if pool_connections is None:
+            continue
+        try:
+            connections = (connections or []) + list(pool_connections)
+        except TypeError:
+            continue
+    return connections
+
+def _count_connections(connections: list):
+    """Total, idle, active and HTTP/2 counts for httpcore connections (None if they lack the interface)."""
+    try:
+        return {
+            "total": len(connections),
+            "idle": sum(1 for conn in connections if conn.is_idle()),
+            "active": sum(1 for conn in connections if not conn.is_idle() and not conn.is_closed()),
+            "http2": sum(1 for conn in connections if 'HTTP/2' in conn.info())
+        }
+    except (AttributeError, TypeError):
+        return None
+
+def get_http_pool_stats() -> dict:
+    """Snapshot of the pooled HTTP client's connections and request counters."""
+    config = load_config() or {}
+    with _http_client_lock:
+        stats = {
+            "requests_total": _http_stats["requests"],
+            "requests_in_flight": _http_stats["in_flight"],
+            "errors_total": _http_stats["errors"]
+        }
+        client = _http_client
+    
+    stats["limits"] = {
+        "max_connections": config.get('http_max_connections', 20),
+        "max_keepalive_connections": config.get('http_max_keepalive_connections', 10),
+        "keepalive_expiry": config.get('http_keepalive_expiry', 30.0),
+        "http2_enabled": config.get('http2_enabled', False)
+    }
+    stats["client_initialized"] = client is not None
+    
+    connections = [] if client is None else _pool_connections(client)
+    # None when the transport does not expose its pool; the request counters above still apply
+    stats["connections"] = None if connections is None else _count_connections(connections)
+    return stats
+
+# Upstream status codes worth retrying; any other non-200 status is treated as fatal
+RETRYABLE_STATUS_CODES = frozenset({408, 425, 429, 500, 502, 503, 504})
+# Most retries the budget can bank for a burst
+RETRY_BUDGET_CAPACITY = 10.0
+# Circuit breakers kept for request-supplied upstreams (least recently used go first)
+CIRCUIT_BREAKER_MAX_UPSTREAMS = 32
+
+def parse_retry_after(response: httpx.Response):
+    """Seconds to wait from a response's retry-after-ms or Retry-After header (None if absent)."""
+    retry_after_ms = response.headers.get('retry-after-ms')
+    if retry_after_ms:
         try:
-            response = httpx.post(
-                f'http://{base_url}/deployments/{deployment_id}/chat/completions?api-version={api_version}',
-                headers={
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Credentials': 'true',
-                    'api-key': api_key
-                },
-                json=message,
-                timeout=api_config.get("timeout", 60.0)
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+    retry_after = response.headers.get('retry-after')
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        # HTTP-date form
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class CircuitBreaker:
+    """Per-upstream circuit breaker.
+    
+    Opens after failure_threshold consecutive failures (retryable statuses,
+    timeouts and connection errors) and rejects calls until reset_timeout has
+    passed; then lets a single probe call through (half-open) and closes again
+    on its success. allow_request returns a token for each admitted call; callers
+    hand it back to release_probe when the call ends, so a probe that ends without
+    an outcome (e.g. a cancelled request) cannot wedge the breaker, and a call
+    that is not the current probe cannot release it.
+    """
+    
+    def __init__(self, upstream: str, failure_threshold: int, reset_timeout: float):
+        self.upstream = upstream
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probe = None
+        self.stats = {"successes": 0, "failures": 0, "rejections": 0, "opened": 0}
+        self.lock = threading.Lock()
+    
+    @property
+    def probe_in_flight(self) -> bool:
+        return self.probe is not None
+    
+    def allow_request(self):
+        """A token for an admitted call (truthy; the probe's own object when half-open), or None."""
+        with self.lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self.probe = None
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and self.probe is None:
+                self.probe = object()
+                return self.probe
+            self.stats["rejections"] += 1
+            return None
+    
+    def record_success(self):
+        with self.lock:
+            self.stats["successes"] += 1
+            self.consecutive_failures = 0
+            if self.state != "closed":
+                logger.info(f"Circuit breaker for {self.upstream} closed")
+            self.state = "closed"
+            self.probe = None
+    
+    def release_probe(self, token):
+        """Let another call probe a half-open upstream if token is the current probe's; no-op otherwise."""
+        with self.lock:
+            if token is self.probe:
+                self.probe = None
+    
+    def record_failure(self):
+        with self.lock:
+            self.stats["failures"] += 1
+            self.consecutive_failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.probe = None
+                self.stats["opened"] += 1
+                logger.warning(f"Circuit breaker for {self.upstream} opened after {self.consecutive_failures} consecutive failures")
+    
+    def snapshot(self) -> dict:
+        with self.lock:
+            retry_in = None
+            if self.state == "open":
+                retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 2)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "half_open_in": retry_in,
+                **self.stats
+            }
+
+class RetryPolicy:
+    """Shared retry policy for upstream AI calls.
+    
+    Retries wait with exponential backoff and full jitter, or for the upstream's
+    Retry-After when it sends one. A process-wide retry budget (token bucket fed
+    by retry_budget_ratio per call plus retry_budget_min_per_second) caps retries
+    so throttling cannot multiply load on the gateway.
+    """
+    
+    def __init__(self, base_delay: float, max_delay: float, max_retry_after: float,
+                 budget_ratio: float, budget_min_per_second: float):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget_ratio = budget_ratio
+        self.budget_min_per_second = budget_min_per_second
+        self.budget = RETRY_BUDGET_CAPACITY
+        self.budget_updated = time.monotonic()
+        self.stats = {
+            "calls": 0, "retries": 0, "retry_after_honored": 0, "budget_exhausted": 0,
+            "retry_after_too_long": 0, "fatal_responses": 0, "circuit_open_rejections": 0
+        }
+        self.lock = threading.Lock()
+    
+    def is_retryable_status(self, status_code: int) -> bool:
+        return status_code in RETRYABLE_STATUS_CODES
+    
+    def count(self, stat: str):
+        with self.lock:
+            self.stats[stat] += 1
+    
+    def _refill_budget(self, deposit: float = 0.0):
+        now = time.monotonic()
+        self.budget = min(
+            RETRY_BUDGET_CAPACITY,
+            self.budget + deposit + (now - self.budget_updated) * self.budget_min_per_second
+        )
+        self.budget_updated = now
+    
+    def record_call(self):
+        """Count a new upstream call and deposit its share of the retry budget."""
+        with self.lock:
+            self.stats["calls"] += 1
+            self._refill_budget(self.budget_ratio)
+    
+    def retry_delay(self, attempt: int, max_retries: int, response: httpx.Response = None, backoff: bool = True):
+        """Seconds to wait before the next attempt, or None to give up.
+        
+        response is the failed HTTP response, if any, for Retry-After. backoff=False
+        retries immediately (e.g. after an unparseable completion).
+        """
+        if attempt >= max_retries:
+            return None
+        retry_after = parse_retry_after(response) if response is not None else None
+        if retry_after is not None and retry_after > self.max_retry_after:
+            logger.warning(f"Upstream asked to retry after {retry_after:.1f}s (limit {self.max_retry_after}s), giving up")
+            self.count("retry_after_too_long")
+            return None
+        with self.lock:
+            self._refill_budget()
+            if self.budget < 1:
+                self.stats["budget_exhausted"] += 1
+                logger.warning("Retry budget exhausted, not retrying")
+                return None
+            self.budget -= 1
+            self.stats["retries"] += 1
+            if retry_after is not None:
+                self.stats["retry_after_honored"] += 1
+        if retry_after is not None:
+            return retry_after
+        if not backoff:
+            return 0.0
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+    
+    def snapshot(self) -> dict:
+        with self.lock:
+            self._refill_budget()
+            return {
+                **self.stats,
+                "budget_available": round(self.budget, 2),
+                "budget_capacity": RETRY_BUDGET_CAPACITY,
+                "budget_ratio": self.budget_ratio,
+                "budget_min_per_second": self.budget_min_per_second,
+                "base_delay": self.base_delay,
+                "max_delay": self.max_delay,
+                "max_retry_after": self.max_retry_after
+            }
+
+def get_retry_policy() -> RetryPolicy:
+    """Get the process-wide retry policy (lazy loading)."""
+    global _retry_policy
+    if _retry_policy is not None:
+        return _retry_policy
+    with _retry_policy_lock:
+        if _retry_policy is None:
+            config = load_config() or {}
+            _retry_policy = RetryPolicy(
+                config.get('retry_base_delay', 0.5),
+                config.get('retry_max_delay', 30.0),
+                config.get('retry_max_retry_after', 60.0),
+                config.get('retry_budget_ratio', 0.2),
+                config.get('retry_budget_min_per_second', 1.0)
             )
-            
-            logger.info(f"API response status: {response.status_code}")
-            
-            if response.status_code == 200:
-                logger.info(f"API call attempt {attempt} successful")
-                response_data = response.json()
-                content = response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                
-                # Log the first 200 characters of the response for debugging
-                logger.info(f"AI response received ({len(content)} chars): {content[:200]}{'...' if len(content) > 200 else ''}")
-                
-                # Clean and validate JSON
-                parsed_json = clean_and_validate_json(content)
-                if parsed_json is not None:
-                    logger.info(f"Valid JSON parsed successfully on attempt {attempt}")
-                    return parsed_json
-                else:
-                    logger.warning(f"Invalid JSON received on attempt {attempt}, retrying...")
-                    if attempt < max_retries:
-                        # Modify the prompt slightly for retry to encourage better JSON
-                        message["messages"][0]["content"] = formatted_prompt + " Please ensure your response is valid JSON only, without any markdown formatting or extra text."
-                    continue
-            else:
-                logger.error(f"API call attempt {attempt} failed with status {response.status_code}: {response.text}")
-                if attempt < max_retries:
-                    continue
-                
-        except Exception as e:
-            logger.error(f"API call attempt {attempt} error: {e}")
-            if attempt < max_retries:
-                continue
+        return _retry_policy
+
+def get_circuit_breaker(upstream: str) -> CircuitBreaker:
+    """Get the circuit breaker for an upstream base URL, creating it on first use.
     
-    logger.error(f"All {max_retries} API call attempts failed")
-    return None
+    The configured upstream's breaker is always kept; breakers of request-supplied
+    base URLs beyond CIRCUIT_BREAKER_MAX_UPSTREAMS are dropped least recently used first.
+    """
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get(upstream)
+        if breaker is not None:
+            _circuit_breakers.move_to_end(upstream)
+            return breaker
+        config = load_config() or {}
+        breaker = CircuitBreaker(
+            upstream,
+            config.get('circuit_failure_threshold', 5),
+            config.get('circuit_reset_timeout', 30.0)
+        )
+        _circuit_breakers[upstream] = breaker
+        configured = config.get('api_base_url')
+        if len(_circuit_breakers) > CIRCUIT_BREAKER_MAX_UPSTREAMS + (configured in _circuit_breakers):
+            oldest = next(key for key in _circuit_breakers if key != configured)
+            del _circuit_breakers[oldest]
+        return breaker
 
-def make_api_call_for_generate(input_data: str, api_config: dict = None, prompt_template_name: str = 'generate'):
-    """Make API call for generate endpoint with input data transformation."""
+def get_retry_stats() -> dict:
+    """Retry counters, budget and the configured upstream's circuit breaker state.
     
-    # Load configuration
-    config = load_config()
-    if not config:
-        logger.error("Failed to load configuration")
-        return None
+    Breakers of request-supplied base URLs are only counted, so client-chosen
+    hosts are not listed on the unauthenticated health and metrics endpoints.
+    """
+    configured = (load_config() or {}).get('api_base_url')
+    with _circuit_breakers_lock:
+        breakers = dict(_circuit_breakers)
+    others = [breaker.snapshot()["state"] for upstream, breaker in breakers.items() if upstream != configured]
+    return {
+        "retry_policy": get_retry_policy().snapshot(),
+        "circuit_breakers": {upstream: breaker.snapshot() for upstream, breaker in breakers.items() if upstream == configured},
+        "request_upstream_breakers": {
+            "tracked": len(others),
+            "open": others.count("open"),
+            "limit": CIRCUIT_BREAKER_MAX_UPSTREAMS
+        }
+    }
+
+def get_api_config(api_config: dict = None) -> dict:
+    """Merge per-request API overrides with defaults from environment configuration."""
+    config = load_config() or {}
     
-    # Set up default API configuration from environment
-    default_api_config = {
+    # Start with defaults from environment configuration
+    merged_config = {
         'base_url': config.get('api_base_url'),
         'api_key': config.get('api_key'),
         'deployment_id': config.get('api_deployment_id', 'model-router'),
@@ -425,237 +2142,2807 @@ def make_api_call_for_generate(input_data: str, api_config: dict = None, prompt_
         'temperature': config.get('api_temperature', 0.7),
         'timeout': config.get('api_timeout', 60.0),
         'max_retries': config.get('api_max_retries', 3),
+        'stream': config.get('api_stream', False),
         'top_p': 0.95,
         'frequency_penalty': 0,
         'presence_penalty': 0,
         'model': 'model-router'
     }
     
-    # Merge with any provided overrides
+    # Update defaults with any provided overrides
     if api_config:
-        default_api_config.update(api_config)
+        merged_config.update(api_config)
+    
+    return merged_config
+
+# Appended to the prompt when a retry follows an unparseable response
+JSON_RETRY_HINT = " Please ensure your response is valid JSON only, without any markdown formatting or extra text."
+
+def build_completion_request(api_config: dict = None, prompt_template_name: str = "default",
+                             prompt_variables: dict = None, prompt_version: str = None) -> dict:
+    """Build the chat completions URL, headers and message for a prompt template.
+    
+    Shared by the sync and async API callers. prompt_version selects a template
+    version (the current one by default). Returns None if the API configuration
+    or the prompt template is missing.
+    """
+    build_start = time.perf_counter()
+    config = load_config()
+    if not config:
+        logger.error("No configuration available")
+        return None
     
-    # Use the merged configuration
-    api_config = default_api_config
+    # Merge request overrides with defaults from environment configuration
+    api_config = get_api_config(api_config)
     
     base_url = api_config.get('base_url')
     deployment_id = api_config.get('deployment_id', 'model-router')
     api_version = api_config.get('api_version', '2025-01-01-preview')
     api_key = api_config.get('api_key')
-    max_retries = api_config.get('max_retries', 3)
     
     if not all([base_url, api_key]):
         logger.error("Missing required API configuration (base_url, api_key)")
         return None
     
-    # Load prompt template from prompts.json
-    prompts = load_prompts()
-    if not prompts:
-        logger.error("Failed to load prompt templates")
-        return None
-    
-    # Get the specified prompt template
-    if prompt_template_name not in prompts:
-        logger.error(f"Prompt template '{prompt_template_name}' not found in prompts.json")
+    # Get the specified prompt template version from the registry
+    prompt = get_prompt_template(prompt_template_name, prompt_version)
+    if prompt is None:
+        logger.error(f"Prompt template '{prompt_template_name}' (version {prompt_version or 'current'}) not found in prompts.json")
         return None
     
-    prompt_info = prompts[prompt_template_name]
-    prompt_template = prompt_info["template"]
+    logger.info(f"Using prompt template: {prompt.name} ({prompt.version}) - {prompt.description}")
     
-    logger.info(f"Using prompt template: {prompt_info['name']} - {prompt_info['description']}")
-    
-    formatted_prompt = prompt_template.format(input_data=input_data)
+    formatted_prompt = prompt.render(prompt_variables or {})
     
     # Log the first 300 characters of the formatted prompt for debugging
     logger.info(f"Generated prompt for AI ({len(formatted_prompt)} chars): {formatted_prompt[:300]}{'...' if len(formatted_prompt) > 300 else ''}")
     
-    message = {
-        "messages": [
-            {
-                "role": "user",
-                "content": formatted_prompt
-            }
-        ],
-        "max_tokens": api_config.get("max_tokens", 8192),
-        "temperature": api_config.get("temperature", 0.7),
-        "top_p": api_config.get("top_p", 0.95),
-        "frequency_penalty": api_config.get("frequency_penalty", 0),
-        "presence_penalty": api_config.get("presence_penalty", 0),
-        "model": api_config.get("model", "model-router")
+    PROMPT_BUILD_SECONDS.observe(time.perf_counter() - build_start, route=current_route(), prompt_template=prompt_template_name)
+    return {
+        "api_config": api_config,
+        "url": f'http://{base_url}/deployments/{deployment_id}/chat/completions?api-version={api_version}',
+        "headers": {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Credentials': 'true',
+            'api-key': api_key
+        },
+        "message": {
+            "messages": [
+                {
+                    "role": "user",
+                    "content": formatted_prompt
+                }
+            ],
+            "max_tokens": api_config.get("max_tokens", 8192),
+            "temperature": api_config.get("temperature", 0.7),
+            "top_p": api_config.get("top_p", 0.95),
+            "frequency_penalty": api_config.get("frequency_penalty", 0),
+            "presence_penalty": api_config.get("presence_penalty", 0),
+            "model": api_config.get("model", "model-router")
+        },
+        "prompt": formatted_prompt,
+        "prompt_template": prompt_template_name,
+        "prompt_version": prompt.version,
+        "max_retries": api_config.get('max_retries', 3)
     }
+
+def parse_completion_response(response: httpx.Response, attempt: int, prompt_template: str = ''):
+    """Extract and validate the glossary JSON from a completions response (None if invalid)."""
+    logger.info(f"API call attempt {attempt} successful")
+    parse_start = time.perf_counter()
+    response_data = response.json()
+    record_token_usage(response_data.get("usage"), prompt_template)
+    content = response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
+    
+    # Log the first 200 characters of the response for debugging
+    logger.info(f"AI response received ({len(content)} chars): {content[:200]}{'...' if len(content) > 200 else ''}")
+    
+    # Clean and validate JSON
+    parsed_json = clean_and_validate_json(content)
+    JSON_PARSE_SECONDS.observe(time.perf_counter() - parse_start, route=current_route(), prompt_template=prompt_template)
+    if parsed_json is not None:
+        logger.info(f"Valid JSON parsed successfully on attempt {attempt}")
+    return parsed_json
+
+def feed_stream_line(parser: IncrementalJSONParser, line: str, prompt_template: str = '') -> float:
+    """Feed the content delta from one server-sent event line of a streaming completion to parser.
+    
+    Records token usage from the final usage chunk. Returns the seconds spent parsing.
+    """
+    if not line.startswith('data:'):
+        return 0.0
+    data = line[5:].strip()
+    if not data or data == '[DONE]':
+        return 0.0
+    parse_start = time.perf_counter()
+    event = json.loads(data)
+    record_token_usage(event.get('usage'), prompt_template)
+    choices = event.get('choices') or []
+    delta = (choices[0].get('delta') or {}).get('content') if choices else None
+    if delta:
+        parser.feed(delta)
+    return time.perf_counter() - parse_start
+
+def _attempt_node_callback(on_node, attempt: int):
+    """Tag streamed glossary nodes with the attempt that produced them, so clients can discard aborted attempts."""
+    if on_node is None:
+        return None
+    return lambda node: on_node({**node, "attempt": attempt})
+
+def stream_completion(completion: dict, message: dict, attempt: int, on_node=None):
+    """Stream a completion and validate its JSON incrementally.
+    
+    Returns (parsed JSON or None, response); the JSON is None on a non-200 response.
+    Raises StreamedJSONError at the first structural error; leaving the stream closes
+    the connection, which cuts the generation short instead of paying for the
+    remaining tokens.
+    """
+    parser = IncrementalJSONParser(_attempt_node_callback(on_node, attempt))
+    with api_stream(completion["url"], completion["api_config"], headers=completion["headers"], json=message) as response:
+        logger.info(f"API response status: {response.status_code}")
+        if response.status_code != 200:
+            response.read()
+            return None, response
+        parse_seconds = 0.0
+        for line in response.iter_lines():
+            parse_seconds += feed_stream_line(parser, line, completion["prompt_template"])
+    close_start = time.perf_counter()
+    parsed_json = parser.close()
+    parse_seconds += time.perf_counter() - close_start
+    JSON_PARSE_SECONDS.observe(parse_seconds, route=current_route(), prompt_template=completion["prompt_template"])
+    logger.info(f"Valid JSON streamed successfully on attempt {attempt} ({parser.position} chars)")
+    return parsed_json, response
+
+async def stream_completion_async(completion: dict, message: dict, attempt: int, on_node=None):
+    """Async counterpart of stream_completion."""
+    parser = IncrementalJSONParser(_attempt_node_callback(on_node, attempt))
+    async with api_stream_async(completion["url"], completion["api_config"], headers=completion["headers"], json=message) as response:
+        logger.info(f"API response status: {response.status_code}")
+        if response.status_code != 200:
+            await response.aread()
+            return None, response
+        parse_seconds = 0.0
+        async for line in response.aiter_lines():
+            parse_seconds += feed_stream_line(parser, line, completion["prompt_template"])
+    close_start = time.perf_counter()
+    parsed_json = parser.close()
+    parse_seconds += time.perf_counter() - close_start
+    JSON_PARSE_SECONDS.observe(parse_seconds, route=current_route(), prompt_template=completion["prompt_template"])
+    logger.info(f"Valid JSON streamed successfully on attempt {attempt} ({parser.position} chars)")
+    return parsed_json, response
+
+def observe_llm_attempt(prompt_template: str, outcome: str, attempt_start: float):
+    """Record one upstream AI call attempt's latency and outcome, counting failures as errors."""
+    route = current_route()
+    LLM_ATTEMPT_SECONDS.observe(time.perf_counter() - attempt_start, route=route, prompt_template=prompt_template, outcome=outcome)
+    if outcome != "success":
+        ERRORS.inc(route=route, type=f"llm_{outcome}")
+
+def admit_llm_attempt(breaker: CircuitBreaker, policy: RetryPolicy, upstream: str):
+    """The circuit breaker token for the next upstream attempt, or None (counted and logged) if it is open."""
+    token = breaker.allow_request()
+    if not token:
+        logger.error(f"Circuit breaker open for {upstream}, failing fast")
+        policy.count("circuit_open_rejections")
+        ERRORS.inc(route=current_route(), type="llm_circuit_open")
+    return token
+
+def classify_llm_attempt(breaker: CircuitBreaker, policy: RetryPolicy, attempt: int,
+                         response: httpx.Response = None, error: BaseException = None, valid: bool = True):
+    """Classify one finished upstream attempt and record it on the circuit breaker.
+    
+    response is the HTTP response (None if the attempt raised error); valid is False
+    when a 200 response held unusable output. Returns (outcome, action): outcome is
+    the attempt metrics label and action one of "return" (use the response), "retry",
+    "retry_now" (retry at once with the JSON hint), "fail" (a non-retryable status)
+    or "raise" (re-raise error).
+    """
+    if error is not None:
+        if isinstance(error, AnalysisCancelled) or not isinstance(error, Exception):
+            # The caller gave up (a streamed request's client went away, an interrupt): not an upstream failure
+            return "cancelled", "raise"
+        if isinstance(error, StreamedJSONError):
+            breaker.record_success()
+            logger.warning(f"Invalid JSON streamed on attempt {attempt}, aborted the generation: {error}")
+            return "invalid_json", "retry_now"
+        breaker.record_failure()
+        logger.error(f"API call attempt {attempt} error: {error}")
+        return ("timeout" if isinstance(error, httpx.TimeoutException) else "error"), "retry"
+    
+    status_code = response.status_code
+    if status_code == 200:
+        breaker.record_success()
+        if valid:
+            return "success", "return"
+        logger.warning(f"Invalid JSON received on attempt {attempt}, retrying...")
+        return "invalid_json", "retry_now"
+    if policy.is_retryable_status(status_code):
+        breaker.record_failure()
+        logger.error(f"API call attempt {attempt} failed with status {status_code}: {response.text}")
+        return f"http_{status_code}", "retry"
+    # The upstream answered, so it is reachable; the request itself is at fault
+    breaker.record_success()
+    logger.error(f"API call attempt {attempt} failed with non-retryable status {status_code}: {response.text}")
+    policy.count("fatal_responses")
+    return f"http_{status_code}", "fail"
+
+def finish_llm_attempt(breaker: CircuitBreaker, token, policy: RetryPolicy, prompt_template: str, attempt: int,
+                       attempt_start: float, response: httpx.Response = None, error: BaseException = None,
+                       valid: bool = True) -> str:
+    """Classify an attempt, release its breaker token and record its metrics; returns the action.
     
+    The token is released even if classification fails, so the breaker cannot wedge.
+    """
+    outcome = "error"
+    try:
+        outcome, action = classify_llm_attempt(breaker, policy, attempt, response, error, valid)
+        return action
+    finally:
+        breaker.release_probe(token)
+        observe_llm_attempt(prompt_template, outcome, attempt_start)
+
+def next_llm_retry_delay(policy: RetryPolicy, attempt: int, max_retries: int, prompt_template: str,
+                         response: httpx.Response = None, backoff: bool = True):
+    """Seconds to wait before retrying an upstream call (counted as a retry), or None to give up."""
+    delay = policy.retry_delay(attempt, max_retries, response, backoff)
+    if delay is not None:
+        LLM_RETRIES.inc(route=current_route(), prompt_template=prompt_template)
+        if delay:
+            logger.info(f"Retrying in {delay:.2f}s")
+    return delay
+
+def make_api_call(schema_summary: str, api_config: dict = None, prompt_template_name: str = "default",
+                  prompt_variables: dict = None, on_node=None, prompt_version: str = None) -> dict:
+    """Make an API call with the schema summary and configured prompt.
+    
+    prompt_variables replaces the default {schema_summary} placeholder values for
+    templates that take other inputs (e.g. the "merge" template). With streaming
+    enabled (api "stream" option or on_node given) the completion is parsed as it
+    arrives, malformed output aborts the attempt early, and on_node receives each
+    glossary node as soon as it is complete.
+    """
+    completion = build_completion_request(
+        api_config, prompt_template_name, prompt_variables or {'schema_summary': schema_summary}, prompt_version
+    )
+    if not completion:
+        return None
+    
+    message = completion["message"]
+    max_retries = completion["max_retries"]
+    streaming = bool(completion["api_config"].get('stream')) or on_node is not None
+    if streaming:
+        message["stream"] = True
+        message["stream_options"] = {"include_usage": True}
+    upstream = completion["api_config"].get('base_url')
+    breaker = get_circuit_breaker(upstream)
+    policy = get_retry_policy()
+    policy.record_call()
     for attempt in range(1, max_retries + 1):
-        logger.info(f"Making API call attempt {attempt}/{max_retries} to: {base_url}")
+        token = admit_llm_attempt(breaker, policy, upstream)
+        if not token:
+            return None
+        logger.info(f"Making API call attempt {attempt}/{max_retries} to: {upstream}")
         
+        response = parsed_json = error = None
+        attempt_start = time.perf_counter()
         try:
-            response = httpx.post(
-                f'http://{base_url}/deployments/{deployment_id}/chat/completions?api-version={api_version}',
-                headers={
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Credentials': 'true',
-                    'api-key': api_key
-                },
-                json=message,
-                timeout=api_config.get('timeout', 60.0)
-            )
-            
-            response.raise_for_status()
-            response_data = response.json()
-            
-            logger.info("API call successful")
-            content = response_data.get('choices', [{}])[0].get('message', {}).get('content', '')
-            
-            try:
-                # For generate endpoint, detect the output format
-                if prompt_template_name == 'generate':
-                    content_stripped = content.strip()
-                    
-                    # Check if it's CSV format (starts with _id,name,type,fqdn...)
-                    if content_stripped.startswith('_id,name,type,fqdn') or content_stripped.startswith('"_id","name","type","fqdn"'):
-                        logger.info("Response detected as CSV format")
-                        return {"csv_content": content_stripped}
-                    
-                    # Try JSON Lines format
-                    lines = content_stripped.split('\n')
-                    parsed_objects = []
-                    for line in lines:
-                        if line.strip():
-                            try:
-                                parsed_objects.append(json.loads(line))
-                            except json.JSONDecodeError:
-                                # If JSON Lines parsing fails, try regular JSON
-                                pass
-                    
-                    if parsed_objects:
-                        logger.info(f"Response successfully parsed as JSON Lines ({len(parsed_objects)} objects)")
-                        # Return the raw JSON Lines text format
-                        return {"json_lines_text": content_stripped}
-                
-                # Try to parse as regular JSON
-                content_json = json.loads(content)
-                logger.info("Response successfully parsed as JSON")
-                return content_json
-            except json.JSONDecodeError:
-                logger.warning("Response is not valid JSON, returning as text")
-                return {"generated_content": content}
-                
-        except httpx.TimeoutException:
-            logger.warning(f"API call attempt {attempt} timed out")
-        except httpx.HTTPStatusError as e:
-            logger.error(f"API call attempt {attempt} failed with status {e.response.status_code}: {e.response.text}")
-        except Exception as e:
-            logger.error(f"API call attempt {attempt} failed with unexpected error: {e}")
-            
-        if attempt < max_retries:
-            continue
+            if streaming:
+                parsed_json, response = stream_completion(completion, message, attempt, on_node)
+            else:
+                response = api_post(completion["url"], completion["api_config"], headers=completion["headers"], json=message)
+                logger.info(f"API response status: {response.status_code}")
+                parsed_json = parse_completion_response(response, attempt, prompt_template_name) if response.status_code == 200 else None
+        except BaseException as e:
+            error = e
+            response = None
+        action = finish_llm_attempt(breaker, token, policy, prompt_template_name, attempt, attempt_start,
+                                    response, error, parsed_json is not None)
+        if action == "return":
+            return parsed_json
+        if action == "fail":
+            return None
+        if action == "raise":
+            raise error
+        if action == "retry_now":
+            # Modify the prompt slightly for retry to encourage better JSON
+            message["messages"][0]["content"] = completion["prompt"] + JSON_RETRY_HINT
+        
+        delay = next_llm_retry_delay(policy, attempt, max_retries, prompt_template_name, response, action == "retry")
+        if delay is None:
+            break
+        if delay:
+            time.sleep(delay)
     
-    logger.error(f"All {max_retries} API call attempts failed")
+    logger.error(f"API call to {upstream} failed after {attempt} attempt(s)")
     return None
 
-def create_schema_summary(engine, schema_name: str = None) -> str:
-    """Create a concise summary of the database schema for API consumption."""
-    try:
-        with engine.connect() as conn:
-            inspector = inspect(engine)
-            
-            if schema_name:
-                tables = inspector.get_table_names(schema=schema_name)
+async def make_api_call_async(schema_summary: str, api_config: dict = None, prompt_template_name: str = "default",
+                              prompt_variables: dict = None, on_node=None, prompt_version: str = None) -> dict:
+    """Async counterpart of make_api_call for the ASGI entry point.
+    
+    The upstream request is awaited on the shared httpx.AsyncClient, so a slow
+    completion holds a coroutine instead of an OS thread.
+    """
+    completion = build_completion_request(
+        api_config, prompt_template_name, prompt_variables or {'schema_summary': schema_summary}, prompt_version
+    )
+    if not completion:
+        return None
+    
+    message = completion["message"]
+    max_retries = completion["max_retries"]
+    streaming = bool(completion["api_config"].get('stream')) or on_node is not None
+    if streaming:
+        message["stream"] = True
+        message["stream_options"] = {"include_usage": True}
+    upstream = completion["api_config"].get('base_url')
+    breaker = get_circuit_breaker(upstream)
+    policy = get_retry_policy()
+    policy.record_call()
+    for attempt in range(1, max_retries + 1):
+        token = admit_llm_attempt(breaker, policy, upstream)
+        if not token:
+            return None
+        logger.info(f"Making async API call attempt {attempt}/{max_retries} to: {upstream}")
+        
+        response = parsed_json = error = None
+        attempt_start = time.perf_counter()
+        try:
+            if streaming:
+                parsed_json, response = await stream_completion_async(completion, message, attempt, on_node)
             else:
-                tables = inspector.get_table_names()
-            
-            table_count = len(tables)
-            schema_prefix = f"Schema '{schema_name}': " if schema_name else "Database: "
-            
-            summary_parts = [f"{schema_prefix}{table_count} tables"]
-            
-            # Add table details
-            table_details = []
-            for table_name in tables:
-                columns = inspector.get_columns(table_name, schema=schema_name)
-                column_names = [col['name'] for col in columns]
-                
-                # Limit column names to keep summary concise
-                if len(column_names) > 10:
-                    column_summary = f"{', '.join(column_names[:10])}... ({len(column_names)} total columns)"
-                else:
-                    column_summary = ', '.join(column_names)
-                
-                table_details.append(f"Table {table_name}: {column_summary}")
+                response = await api_post_async(completion["url"], completion["api_config"], headers=completion["headers"], json=message)
+                logger.info(f"API response status: {response.status_code}")
+                parsed_json = parse_completion_response(response, attempt, prompt_template_name) if response.status_code == 200 else None
+        except BaseException as e:
+            error = e
+            response = None
+        action = finish_llm_attempt(breaker, token, policy, prompt_template_name, attempt, attempt_start,
+                                    response, error, parsed_json is not None)
+        if action == "return":
+            return parsed_json
+        if action == "fail":
+            return None
+        if action == "raise":
+            raise error
+        if action == "retry_now":
+            message["messages"][0]["content"] = completion["prompt"] + JSON_RETRY_HINT
+        
+        delay = next_llm_retry_delay(policy, attempt, max_retries, prompt_template_name, response, action == "retry")
+        if delay is None:
+            break
+        if delay:
+            await asyncio.sleep(delay)
+    
+    logger.error(f"API call to {upstream} failed after {attempt} attempt(s)")
+    return None
+
+def parse_generate_content(content: str, prompt_template_name: str):
+    """Interpret a /generate completion as CSV, JSON Lines, JSON or plain text."""
+    try:
+        # For generate endpoint, detect the output format
+        if prompt_template_name == 'generate':
+            content_stripped = content.strip()
             
-            summary_parts.extend(table_details)
-            schema_summary = '\n'.join(summary_parts)
+            # Check if it's CSV format (starts with _id,name,type,fqdn...)
+            if content_stripped.startswith('_id,name,type,fqdn') or content_stripped.startswith('"_id","name","type","fqdn"'):
+                logger.info("Response detected as CSV format")
+                return {"csv_content": content_stripped}
             
-            # Log the first 500 characters of the schema summary for debugging
-            logger.info(f"Generated schema summary ({len(schema_summary)} chars): {schema_summary[:500]}{'...' if len(schema_summary) > 500 else ''}")
-            return schema_summary
+            # Try JSON Lines format
+            lines = content_stripped.split('\n')
+            parsed_objects = []
+            for line in lines:
+                if line.strip():
+                    try:
+                        parsed_objects.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # If JSON Lines parsing fails, try regular JSON
+                        pass
             
-    except Exception as e:
-        logger.error(f"Error creating schema summary: {e}")
-        return f"Error: Unable to create schema summary - {str(e)}"
+            if parsed_objects:
+                logger.info(f"Response successfully parsed as JSON Lines ({len(parsed_objects)} objects)")
+                # Return the raw JSON Lines text format
+                return {"json_lines_text": content_stripped}
+        
+        # Try to parse as regular JSON
+        content_json = json.loads(content)
+        logger.info("Response successfully parsed as JSON")
+        return content_json
+    except json.JSONDecodeError:
+        logger.warning("Response is not valid JSON, returning as text")
+        return {"generated_content": content}
 
-@app.route('/health')
-def health():
-    """Health check endpoint with database connectivity test"""
-    health_status = {
-        "status": "healthy",
-        "message": "Service is running",
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "checks": {
-            "service": "ok"
-        }
-    }
+def make_api_call_for_generate(input_data: str, api_config: dict = None, prompt_template_name: str = 'generate'):
+    """Make API call for generate endpoint with input data transformation."""
+    completion = build_completion_request(api_config, prompt_template_name, {'input_data': input_data})
+    if not completion:
+        return None
     
-    # Test database connection (non-blocking)
-    try:
-        engine = get_database_engine()
-        if engine:
-            with engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
-            health_status["checks"]["database"] = "ok"
-        else:
-            health_status["checks"]["database"] = "unavailable"
-            health_status["status"] = "degraded"
-    except Exception as e:
-        health_status["checks"]["database"] = f"error: {str(e)[:100]}"
-        health_status["status"] = "degraded"
+    max_retries = completion["max_retries"]
+    upstream = completion["api_config"].get('base_url')
+    breaker = get_circuit_breaker(upstream)
+    policy = get_retry_policy()
+    policy.record_call()
+    for attempt in range(1, max_retries + 1):
+        token = admit_llm_attempt(breaker, policy, upstream)
+        if not token:
+            return None
+        logger.info(f"Making API call attempt {attempt}/{max_retries} to: {upstream}")
+        
+        response = response_data = error = None
+        attempt_start = time.perf_counter()
+        try:
+            response = api_post(
+                completion["url"], completion["api_config"],
+                headers=completion["headers"], json=completion["message"]
+            )
+            if response.status_code == 200:
+                response_data = response.json()
+        except BaseException as e:
+            error = e
+            response = None
+        action = finish_llm_attempt(breaker, token, policy, prompt_template_name, attempt, attempt_start, response, error)
+        if action == "return":
+            record_token_usage(response_data.get("usage"), prompt_template_name)
+            logger.info("API call successful")
+            content = response_data.get('choices', [{}])[0].get('message', {}).get('content', '')
+            return parse_generate_content(content, prompt_template_name)
+        if action == "fail":
+            return None
+        if action == "raise":
+            raise error
+        
+        delay = next_llm_retry_delay(policy, attempt, max_retries, prompt_template_name, response)
+        if delay is None:
+            break
+        if delay:
+            time.sleep(delay)
     
-    return jsonify(health_status)
+    logger.error(f"API call to {upstream} failed after {attempt} attempt(s)")
+    return None
 
-@app.route('/')
-def home():
-    """Basic home endpoint with configuration info"""
-    config = load_config()
-    
-    return jsonify({
-        "service": "Database Schema Glossary Generator",
-        "status": "running",
-        "version": "v2.1-unified-config-static",
-        "endpoints": [
-            "/health - Health check with database connectivity",
-            "/config - Complete configuration with sources (env vars vs defaults)",
-            "/analyze - POST: Generate AI-powered business glossary from database schema",
-            "/generate - POST: Transform glossary data to PDC-compatible CSV format",
-            "/docs - API documentation"
-        ],
-        "database_configured": bool(config and config.get('database_url')),
-        "api_configured": bool(config and config.get('api_base_url') and config.get('api_key'))
-    })
+# Dialects whose information_schema exposes columns and key usage in a form we can
+# read with a handful of set-based queries
+INFORMATION_SCHEMA_DIALECTS = ('mysql', 'mariadb', 'mssql')
 
-@app.route('/config')
-def show_config():
-    """Show complete configuration with sources and security masking"""
-    config = load_config()
+def _reflect_sqlite(conn, schema_name: str = None, table_names: list = None) -> dict:
+    """Reflect all tables (or just table_names) in one pass using SQLite's table-valued pragma functions."""
+    master = f"{_sqlite_schema_prefix(schema_name)}sqlite_master"
+    schema_arg = ', :schema' if schema_name else ''
+    params = {'schema': schema_name} if schema_name else {}
+    name_filter = ''
+    if table_names is not None:
+        name_filter = " AND m.name IN (SELECT value FROM json_each(:table_names))"
+        params['table_names'] = json.dumps(list(table_names))
     
-    if not config:
-        return jsonify({
-            "error": "Configuration not loaded",
-            "message": "Please check your environment variables or .env file",
-            "required_env_vars": ["DATABASE_URL", "API_BASE_URL", "API_KEY"],
-            "help": "Copy .env.example to .env and fill in your values"
-        }), 500
+    tables = {}
+    table_rows = conn.execute(sqlalchemy.text(
+        f"SELECT m.name FROM {master} m WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite~_%' ESCAPE '~'"
+        f"{name_filter} ORDER BY m.name"
+    ), params)
+    for (table_name,) in table_rows:
+        tables[table_name] = {"columns": [], "primary_key": [], "foreign_keys": [], "indexes": []}
     
-    # Track which values come from environment vs defaults
+    column_rows = conn.execute(sqlalchemy.text(
+        f"SELECT m.name, p.name, p.type, p.\"notnull\", p.dflt_value, p.pk FROM {master} m "
+        f"JOIN pragma_table_info(m.name{schema_arg}) p "
+        f"WHERE m.type = 'table'{name_filter} ORDER BY m.name, p.cid"
+    ), params)
+    primary_keys = {}
+    for table_name, column_name, column_type, not_null, default, pk_position in column_rows:
+        if table_name not in tables:
+            continue
+        tables[table_name]["columns"].append({
+            "name": column_name,
+            "type": column_type,
+            "nullable": not not_null,
+            "default": default,
+            "comment": None
+        })
+        if pk_position:
+            primary_keys.setdefault(table_name, []).append((pk_position, column_name))
+    for table_name, pk_columns in primary_keys.items():
+        tables[table_name]["primary_key"] = [name for _, name in sorted(pk_columns)]
+    
+    fk_rows = conn.execute(sqlalchemy.text(
+        f"SELECT m.name, f.id, f.\"table\", f.\"from\", f.\"to\" FROM {master} m "
+        f"JOIN pragma_foreign_key_list(m.name{schema_arg}) f "
+        f"WHERE m.type = 'table'{name_filter} ORDER BY m.name, f.id, f.seq"
+    ), params)
+    foreign_keys = {}
+    for table_name, fk_id, referred_table, from_column, to_column in fk_rows:
+        if table_name not in tables:
+            continue
+        fk = foreign_keys.setdefault((table_name, fk_id), {
+            "name": None,
+            "constrained_columns": [],
+            "referred_schema": schema_name,
+            "referred_table": referred_table,
+            "referred_columns": []
+        })
+        fk["constrained_columns"].append(from_column)
+        fk["referred_columns"].append(to_column)
+    for (table_name, _), fk in foreign_keys.items():
+        tables[table_name]["foreign_keys"].append(fk)
+    
+    # Explicit indexes only: SQLite's automatic indexes back PRIMARY KEY and UNIQUE constraints
+    index_rows = conn.execute(sqlalchemy.text(
+        f"SELECT m.name, il.name, il.\"unique\", ii.name FROM {master} m "
+        f"JOIN pragma_index_list(m.name{schema_arg}) il "
+        f"JOIN pragma_index_info(il.name{schema_arg}) ii "
+        f"WHERE m.type = 'table'{name_filter} AND il.name NOT LIKE 'sqlite~_autoindex~_%' ESCAPE '~' "
+        f"ORDER BY m.name, il.name, ii.seqno"
+    ), params)
+    _collect_indexes(tables, index_rows)
+    
+    return tables
+
+def _collect_indexes(tables: dict, index_rows):
+    """Group (table, index, unique, column) rows ordered by index and column position into table indexes."""
+    indexes = {}
+    for table_name, index_name, unique, column_name in index_rows:
+        if table_name not in tables:
+            continue
+        index = indexes.get((table_name, index_name))
+        if index is None:
+            index = indexes[(table_name, index_name)] = {"name": index_name, "column_names": [], "unique": bool(unique)}
+            tables[table_name]["indexes"].append(index)
+        index["column_names"].append(column_name)
+
+def _catalog_query(sql: str, table_names: list = None):
+    """Text catalog query; with table_names, :table_names is bound as an expanding IN list."""
+    statement = sqlalchemy.text(sql)
+    if table_names is not None:
+        statement = statement.bindparams(sqlalchemy.bindparam('table_names', expanding=True))
+    return statement
+
+def _table_name_filter(column: str, table_names: list = None) -> str:
+    """SQL condition restricting a catalog query to table_names (empty for all tables)."""
+    return f"AND {column} IN :table_names " if table_names is not None else ''
+
+def _reflect_information_schema(conn, dialect_name: str, schema_name: str = None, table_names: list = None) -> dict:
+    """Reflect all tables (or just table_names) with set-based information_schema queries (MySQL/MariaDB, SQL Server)."""
+    current_schema = 'SCHEMA_NAME()' if dialect_name == 'mssql' else 'DATABASE()'
+    schema_filter = ':schema' if schema_name else current_schema
+    params = {'schema': schema_name} if schema_name else {}
+    if table_names is not None:
+        params['table_names'] = list(table_names)
+    
+    tables = {}
+    column_comment = 'NULL' if dialect_name == 'mssql' else 'c.column_comment'
+    column_rows = conn.execute(_catalog_query(
+        f"SELECT c.table_name, c.column_name, c.data_type, c.is_nullable, c.column_default, {column_comment} "
+        "FROM information_schema.columns c "
+        "JOIN information_schema.tables t "
+        "ON t.table_schema = c.table_schema AND t.table_name = c.table_name "
+        f"WHERE c.table_schema = {schema_filter} AND t.table_type = 'BASE TABLE' "
+        f"{_table_name_filter('c.table_name', table_names)}"
+        "ORDER BY c.table_name, c.ordinal_position", table_names
+    ), params)
+    for table_name, column_name, data_type, is_nullable, default, comment in column_rows:
+        table = tables.setdefault(table_name, {"columns": [], "primary_key": [], "foreign_keys": [], "indexes": []})
+        table["columns"].append({
+            "name": column_name,
+            "type": data_type,
+            "nullable": str(is_nullable).upper() == 'YES',
+            "default": default,
+            "comment": comment or None
+        })
+    
+    if dialect_name == 'mssql':
+        pk_rows = conn.execute(_catalog_query(
+            "SELECT kcu.table_name, kcu.column_name "
+            "FROM information_schema.table_constraints tc "
+            "JOIN information_schema.key_column_usage kcu "
+            "ON kcu.constraint_schema = tc.constraint_schema AND kcu.constraint_name = tc.constraint_name "
+            f"WHERE tc.table_schema = {schema_filter} AND tc.constraint_type = 'PRIMARY KEY' "
+            f"{_table_name_filter('kcu.table_name', table_names)}"
+            "ORDER BY kcu.table_name, kcu.ordinal_position", table_names
+        ), params)
+        index_rows = conn.execute(_catalog_query(
+            "SELECT t.name, i.name, i.is_unique, c.name FROM sys.indexes i "
+            "JOIN sys.tables t ON t.object_id = i.object_id "
+            "JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id "
+            "JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id "
+            f"WHERE t.schema_id = {'SCHEMA_ID(:schema)' if schema_name else 'SCHEMA_ID()'} "
+            "AND i.is_primary_key = 0 AND i.type > 0 AND ic.is_included_column = 0 "
+            f"{_table_name_filter('t.name', table_names)}"
+            "ORDER BY t.name, i.name, ic.key_ordinal", table_names
+        ), params)
+        fk_rows = conn.execute(_catalog_query(
+            "SELECT fk.table_name, fk.constraint_name, fk.column_name, "
+            "pk.table_schema, pk.table_name, pk.column_name "
+            "FROM information_schema.referential_constraints rc "
+            "JOIN information_schema.key_column_usage fk "
+            "ON fk.constraint_schema = rc.constraint_schema AND fk.constraint_name = rc.constraint_name "
+            "JOIN information_schema.key_column_usage pk "
+            "ON pk.constraint_schema = rc.unique_constraint_schema AND pk.constraint_name = rc.unique_constraint_name "
+            "AND pk.ordinal_position = fk.ordinal_position "
+            f"WHERE fk.table_schema = {schema_filter} "
+            f"{_table_name_filter('fk.table_name', table_names)}"
+            "ORDER BY fk.table_name, fk.constraint_name, fk.ordinal_position", table_names
+        ), params)
+    else:
+        key_rows = conn.execute(_catalog_query(
+            "SELECT table_name, constraint_name, column_name, "
+            "referenced_table_schema, referenced_table_name, referenced_column_name "
+            "FROM information_schema.key_column_usage "
+            f"WHERE table_schema = {schema_filter} "
+            f"{_table_name_filter('table_name', table_names)}"
+            "ORDER BY table_name, constraint_name, ordinal_position", table_names
+        ), params).fetchall()
+        pk_rows = [(row[0], row[2]) for row in key_rows if row[1] == 'PRIMARY']
+        fk_rows = [(row[0], row[1], row[2], row[3], row[4], row[5]) for row in key_rows if row[4]]
+        index_rows = conn.execute(_catalog_query(
+            "SELECT table_name, index_name, non_unique = 0, column_name "
+            "FROM information_schema.statistics "
+            f"WHERE table_schema = {schema_filter} AND index_name <> 'PRIMARY' "
+            f"{_table_name_filter('table_name', table_names)}"
+            "ORDER BY table_name, index_name, seq_in_index", table_names
+        ), params)
+    _collect_indexes(tables, index_rows)
+    
+    for table_name, column_name in pk_rows:
+        if table_name in tables:
+            tables[table_name]["primary_key"].append(column_name)
+    
+    foreign_keys = {}
+    for table_name, constraint_name, column_name, referred_schema, referred_table, referred_column in fk_rows:
+        if table_name not in tables:
+            continue
+        fk = foreign_keys.setdefault((table_name, constraint_name), {
+            "name": constraint_name,
+            "constrained_columns": [],
+            "referred_schema": referred_schema,
+            "referred_table": referred_table,
+            "referred_columns": []
+        })
+        fk["constrained_columns"].append(column_name)
+        fk["referred_columns"].append(referred_column)
+    for (table_name, _), fk in foreign_keys.items():
+        tables[table_name]["foreign_keys"].append(fk)
+    
+    return dict(sorted(tables.items()))
+
+def _reflect_with_inspector(conn, schema_name: str = None, table_names: list = None) -> dict:
+    """Reflect all tables (or just table_names) with SQLAlchemy 2.x multi-object reflection (bulk on PostgreSQL and Oracle)."""
+    inspector = sqlalchemy.inspect(conn)
+    multi_columns = inspector.get_multi_columns(schema=schema_name, filter_names=table_names)
+    multi_pks = inspector.get_multi_pk_constraint(schema=schema_name, filter_names=table_names)
+    multi_fks = inspector.get_multi_foreign_keys(schema=schema_name, filter_names=table_names)
+    multi_indexes = inspector.get_multi_indexes(schema=schema_name, filter_names=table_names)
+    
+    tables = {}
+    for key, columns in sorted(multi_columns.items(), key=lambda item: item[0][1]):
+        table_name = key[1]
+        pk = multi_pks.get(key) or {}
+        tables[table_name] = {
+            "columns": [_reflected_column(col) for col in columns],
+            "primary_key": pk.get("constrained_columns", []),
+            "foreign_keys": [
+                {
+                    "name": fk.get("name"),
+                    "constrained_columns": fk.get("constrained_columns", []),
+                    "referred_schema": fk.get("referred_schema"),
+                    "referred_table": fk.get("referred_table"),
+                    "referred_columns": fk.get("referred_columns", [])
+                }
+                for fk in multi_fks.get(key, [])
+            ],
+            "indexes": _reflected_indexes(multi_indexes.get(key, []))
+        }
+    return tables
+
+def _reflected_column(col: dict) -> dict:
+    """Serialize an inspector column record."""
+    return {
+        "name": col["name"],
+        "type": str(col["type"]),
+        "nullable": col.get("nullable", True),
+        "default": str(col["default"]) if col.get("default") is not None else None,
+        "comment": col.get("comment")
+    }
+
+def _reflected_indexes(indexes: list) -> list:
+    """Serialize inspector index records, ordered by name like the set-based reflectors."""
+    return [
+        {"name": idx.get("name"), "column_names": idx.get("column_names", []), "unique": bool(idx.get("unique", False))}
+        for idx in sorted(indexes, key=lambda idx: idx.get("name") or '')
+    ]
+
+def _reflect_per_table(conn, schema_name: str = None, table_names: list = None) -> dict:
+    """Reflect table by table with the classic inspector calls (one catalog round trip per call)."""
+    inspector = sqlalchemy.inspect(conn)
+    if table_names is None:
+        table_names = inspector.get_table_names(schema=schema_name)
+    return {table_name: _reflect_table(inspector, table_name, schema_name) for table_name in sorted(table_names)}
+
+def _reflect_table(inspector, table_name: str, schema_name: str = None) -> dict:
+    """Reflect one table with the classic inspector calls (raises NoSuchTableError if it does not exist)."""
+    columns = inspector.get_columns(table_name, schema=schema_name)
+    pk = inspector.get_pk_constraint(table_name, schema=schema_name) or {}
+    return {
+        "columns": [_reflected_column(col) for col in columns],
+        "primary_key": pk.get("constrained_columns", []),
+        "foreign_keys": [
+            {
+                "name": fk.get("name"),
+                "constrained_columns": fk.get("constrained_columns", []),
+                "referred_schema": fk.get("referred_schema"),
+                "referred_table": fk.get("referred_table"),
+                "referred_columns": fk.get("referred_columns", [])
+            }
+            for fk in inspector.get_foreign_keys(table_name, schema=schema_name)
+        ],
+        "indexes": _reflected_indexes(inspector.get_indexes(table_name, schema=schema_name))
+    }
+
+# Name suffixes that mark one of a family of near-identical tables: numbered or dated partitions and
+# shards (events_2024_01, orders_p3, users_shard_07, sales_tenant_42) and backup or scratch copies
+# (orders_bak, orders_tmp_20240105, customers_old), possibly stacked (events_2024_01_bak)
+TABLE_FAMILY_SUFFIX_PATTERN = re.compile(
+    r'(?:_(?:(?:p|part|partition|shard|s|tenant|t)_?)?\d+'
+    r'|_(?:bak|backup|tmp|temp|old|copy|archive|archived)(?:_?\d+)?)+$',
+    re.IGNORECASE
+)
+
+# Tenant shard prefix: tenant_042_orders, t17_orders
+TABLE_TENANT_PREFIX_PATTERN = re.compile(r'^(?P<prefix>(?:tenant|client|t)_?)\d+_(?=.)', re.IGNORECASE)
+
+# Catalog queries take at most this many table names in an IN list (Oracle allows 1000 and SQL Server
+# 2100 bind parameters); larger subsets are reflected in full and filtered afterwards
+CATALOG_FILTER_MAX_NAMES = 1000
+
+def table_family(table_name: str) -> str:
+    """Glob naming the family of near-identical tables a table belongs to.
+    
+    events_2024_01 -> events_*, orders_bak -> orders_*, tenant_042_orders ->
+    tenant_*_orders; a table without a family suffix heads its own family
+    (orders -> orders_*).
+    """
+    match = TABLE_TENANT_PREFIX_PATTERN.match(table_name)
+    if match:
+        return f"{match.group('prefix')}*_{table_name[match.end():]}"
+    stem = TABLE_FAMILY_SUFFIX_PATTERN.sub('', table_name)
+    return f"{stem or table_name}_*"
+
+def _sqlite_schema_prefix(schema_name: str = None) -> str:
+    """Quoted "schema". qualifier for an attached SQLite database (empty for the main one)."""
+    if not schema_name:
+        return ''
+    # schema_name comes from requests: double embedded quotes so it stays a single identifier
+    return '"' + schema_name.replace('"', '""') + '".'
+
+def _pg_namespace(schema_name: str = None) -> str:
+    """Subquery for the pg_namespace oid of a schema (the current schema by default)."""
+    return ("(SELECT oid FROM pg_namespace WHERE nspname = "
+            f"{'CAST(:schema AS text)' if schema_name else 'current_schema()'})")
+
+def _table_signatures(conn, dialect_name: str, schema_name: str = None):
+    """Digest of every table's column names and types, from one catalog query returning a row per table.
+    
+    Returns a dict of table name -> signature, or None for dialects without a
+    signature query (Oracle and others), where tables are not clustered.
+    """
+    params = {'schema': schema_name} if schema_name else {}
+    if dialect_name == 'sqlite':
+        # The CREATE TABLE text after the table name: column and constraint definitions as written
+        master = f"{_sqlite_schema_prefix(schema_name)}sqlite_master"
+        rows = conn.execute(sqlalchemy.text(
+            f"SELECT name, substr(sql, instr(sql, '(')) FROM {master} "
+            "WHERE type = 'table' AND name NOT LIKE 'sqlite~_%' ESCAPE '~'"
+        ))
+    elif dialect_name == 'postgresql':
+        rows = conn.execute(sqlalchemy.text(
+            "SELECT c.relname, md5(string_agg(a.attname || ' ' || format_type(a.atttypid, a.atttypmod), ',' "
+            "ORDER BY a.attnum)) FROM pg_class c "
+            "JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped "
+            f"WHERE c.relnamespace = {_pg_namespace(schema_name)} AND c.relkind IN ('r', 'p') "
+            "GROUP BY c.relname"
+        ), params)
+    elif dialect_name in ('mysql', 'mariadb'):
+        rows = conn.execute(sqlalchemy.text(
+            "SELECT c.table_name, COUNT(*), SUM(CRC32(CONCAT_WS('|', c.column_name, c.column_type, c.ordinal_position))) "
+            "FROM information_schema.columns c JOIN information_schema.tables t "
+            "ON t.table_schema = c.table_schema AND t.table_name = c.table_name "
+            f"WHERE c.table_schema = {':schema' if schema_name else 'DATABASE()'} AND t.table_type = 'BASE TABLE' "
+            "GROUP BY c.table_name"
+        ), params)
+    elif dialect_name == 'mssql':
+        rows = conn.execute(sqlalchemy.text(
+            "SELECT t.name, COUNT(*), CHECKSUM_AGG(CHECKSUM(c.name, TYPE_NAME(c.user_type_id), c.max_length, c.column_id)) "
+            "FROM sys.tables t JOIN sys.columns c ON c.object_id = t.object_id "
+            f"WHERE t.schema_id = {'SCHEMA_ID(:schema)' if schema_name else 'SCHEMA_ID()'} GROUP BY t.name"
+        ), params)
+    else:
+        return None
+    return {row[0]: repr(tuple(row[1:])) for row in rows}
+
+def cluster_tables(signatures: dict, min_members: int = 2) -> dict:
+    """Group tables of the same family (see table_family) with identical column signatures.
+    
+    Each cluster of at least min_members tables is represented by one table: the
+    family head when it exists (orders for orders_bak), else the latest member by
+    name (events_2024_12). Returns a dict of representative -> {"pattern",
+    "representative", "members"} with members sorted and including the representative.
+    """
+    families = {}
+    for table_name, signature in signatures.items():
+        families.setdefault((table_family(table_name), signature), []).append(table_name)
+    clusters = {}
+    for (pattern, _), members in families.items():
+        if len(members) < max(min_members, 2):
+            continue
+        members.sort()
+        head = pattern[:-2] if pattern.endswith('_*') else None
+        representative = head if head in members else members[-1]
+        clusters[representative] = {"pattern": pattern, "representative": representative, "members": members}
+    return clusters
+
+def _reflect_tables(conn, dialect_name: str, schema_name: str = None, table_names: list = None) -> dict:
+    """Bulk-reflect a schema's tables (or only table_names), falling back to per-table inspection."""
+    if table_names is not None and dialect_name != 'sqlite' and len(table_names) > CATALOG_FILTER_MAX_NAMES:
+        table_names = None
+    try:
+        if dialect_name == 'sqlite':
+            return _reflect_sqlite(conn, schema_name, table_names)
+        if dialect_name in INFORMATION_SCHEMA_DIALECTS:
+            return _reflect_information_schema(conn, dialect_name, schema_name, table_names)
+        return _reflect_with_inspector(conn, schema_name, table_names)
+    except Exception as e:
+        logger.warning(f"Bulk schema reflection failed on {dialect_name}, falling back to per-table inspection: {e}")
+        conn.rollback()
+        return _reflect_per_table(conn, schema_name, table_names)
+
+def reflect_schema(engine, schema_name: str = None, cluster_min_members: int = 0) -> dict:
+    """Reflect columns, primary keys, foreign keys and indexes for every table in a schema.
+    
+    Uses a few set-based catalog queries instead of one round trip per table:
+    pragma table-valued functions on SQLite, information_schema on MySQL/MariaDB
+    and SQL Server, and SQLAlchemy's get_multi_* reflection everywhere else.
+    Falls back to per-table inspection if the bulk path fails.
+    
+    With cluster_min_members, a pre-pass reads one column signature per table and
+    clusters partitions, shards and copies (see cluster_tables); only one
+    representative per cluster is reflected, and its entry gets a "cluster" key
+    listing the members.
+    
+    Returns a dict of table name -> {"columns", "primary_key", "foreign_keys", "indexes"};
+    columns carry name, type, nullable, default and comment.
+    """
+    dialect_name = engine.dialect.name
+    reflect_start = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            clusters = {}
+            signatures = {}
+            if cluster_min_members:
+                try:
+                    signatures = _table_signatures(conn, dialect_name, schema_name)
+                    clusters = cluster_tables(signatures, cluster_min_members) if signatures else {}
+                except Exception as e:
+                    logger.warning(f"Table signature query failed on {dialect_name}, reflecting without clustering: {e}")
+                    conn.rollback()
+            skipped = {name for cluster in clusters.values() for name in cluster["members"]} - set(clusters)
+            table_names = sorted(set(signatures) - skipped) if clusters else None
+            tables = _reflect_tables(conn, dialect_name, schema_name, table_names)
+        
+        for table_name in skipped:
+            tables.pop(table_name, None)
+        for representative, cluster in clusters.items():
+            if representative in tables:
+                tables[representative]["cluster"] = cluster
+        if clusters:
+            logger.info(f"Clustered {len(skipped) + len(clusters)} tables into {len(clusters)} clusters; "
+                        f"reflected {len(tables)} of {len(tables) + len(skipped)} tables")
+        return tables
+    finally:
+        REFLECTION_SECONDS.observe(time.perf_counter() - reflect_start, route=current_route())
+
+def schema_fingerprint(conn, dialect_name: str, schema_name: str = None):
+    """Cheap digest of a schema's catalog state that changes whenever its tables, columns or keys change.
+    
+    One query per dialect: PostgreSQL hashes the relfilenode and xmin of the schema's
+    pg_class rows plus the xmin of its pg_attribute and pg_constraint rows (DDL rewrites
+    them), SQLite reads PRAGMA schema_version, SQL Server uses object modification
+    times plus a checksum of sys.indexes (index changes do not touch them), Oracle
+    uses object DDL times, and MySQL/MariaDB checksum information_schema columns,
+    keys and index statistics. Returns None for dialects without a cheap check.
+    """
+    params = {'schema': schema_name} if schema_name else {}
+    if dialect_name == 'postgresql':
+        namespace = _pg_namespace(schema_name)
+        row = conn.execute(sqlalchemy.text(
+            "SELECT md5(coalesce(string_agg(item, ',' ORDER BY item), '')) FROM ("
+            "SELECT 'c' || c.oid::text || ':' || c.relfilenode::text || ':' || c.xmin::text AS item "
+            f"FROM pg_class c WHERE c.relnamespace = {namespace} "
+            "UNION ALL SELECT 'a' || a.attrelid::text || ':' || a.attnum::text || ':' || a.xmin::text "
+            "FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid "
+            f"WHERE c.relnamespace = {namespace} AND a.attnum > 0 "
+            "UNION ALL SELECT 'k' || k.oid::text || ':' || k.xmin::text "
+            f"FROM pg_constraint k WHERE k.connamespace = {namespace}"
+            ") items"
+        ), params).fetchone()
+    elif dialect_name == 'sqlite':
+        pragma = f"PRAGMA {_sqlite_schema_prefix(schema_name)}schema_version"
+        row = conn.execute(sqlalchemy.text(pragma)).fetchone()
+    elif dialect_name == 'mssql':
+        schema_id = 'SCHEMA_ID(:schema)' if schema_name else 'SCHEMA_ID()'
+        row = conn.execute(sqlalchemy.text(
+            "SELECT COUNT(*), MAX(modify_date), CHECKSUM_AGG(CHECKSUM(object_id, modify_date)), "
+            "(SELECT CHECKSUM_AGG(CHECKSUM(i.object_id, i.index_id, i.name, i.is_unique, ic.column_id, ic.key_ordinal)) "
+            "FROM sys.indexes i JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id "
+            f"JOIN sys.objects t ON t.object_id = i.object_id WHERE t.schema_id = {schema_id}) "
+            f"FROM sys.objects WHERE schema_id = {schema_id} "
+            "AND type IN ('U', 'V', 'PK', 'F', 'UQ')"
+        ), params).fetchone()
+    elif dialect_name in ('mysql', 'mariadb'):
+        schema_filter = ':schema' if schema_name else 'DATABASE()'
+        row = conn.execute(sqlalchemy.text(
+            "SELECT (SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = "
+            f"{schema_filter}), (SELECT COALESCE(SUM(CRC32(CONCAT_WS('|', table_name, column_name, column_type, "
+            f"is_nullable, ordinal_position))), 0) FROM information_schema.columns WHERE table_schema = {schema_filter}), "
+            "(SELECT COALESCE(SUM(CRC32(CONCAT_WS('|', table_name, constraint_name, column_name, "
+            "referenced_table_name, referenced_column_name))), 0) FROM information_schema.key_column_usage "
+            f"WHERE table_schema = {schema_filter}), "
+            "(SELECT COALESCE(SUM(CRC32(CONCAT_WS('|', table_name, index_name, non_unique, seq_in_index, "
+            f"column_name))), 0) FROM information_schema.statistics WHERE table_schema = {schema_filter})"
+        ), params).fetchone()
+    elif dialect_name == 'oracle':
+        owner = 'UPPER(:schema)' if schema_name else "SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA')"
+        row = conn.execute(sqlalchemy.text(
+            f"SELECT COUNT(*), MAX(last_ddl_time) FROM all_objects WHERE owner = {owner} "
+            "AND object_type IN ('TABLE', 'VIEW', 'INDEX')"
+        ), params).fetchone()
+    else:
+        return None
+    return hashlib.sha256(repr(tuple(row)).encode('utf-8')).hexdigest()[:16]
+
+def _get_schema_snapshot_connection():
+    """Open the schema snapshot store database, creating it on first use."""
+    global _schema_snapshot_store_initialized
+    config = load_config() or {}
+    store_path = config.get('schema_snapshot_path', 'data/schema_snapshots.db')
+    if not _schema_snapshot_store_initialized:
+        store_dir = os.path.dirname(store_path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+    
+    conn = sqlite3.connect(store_path, timeout=5)
+    if not _schema_snapshot_store_initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS schema_snapshots ("
+            "engine_key TEXT NOT NULL, schema_name TEXT NOT NULL, fingerprint TEXT, tables TEXT NOT NULL, "
+            "reflected_at REAL NOT NULL, PRIMARY KEY (engine_key, schema_name))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS column_profiles ("
+            "engine_key TEXT NOT NULL, schema_name TEXT NOT NULL, table_name TEXT NOT NULL, signature TEXT NOT NULL, "
+            "profile TEXT NOT NULL, profiled_at REAL NOT NULL, PRIMARY KEY (engine_key, schema_name, table_name))"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS engine_key_secret (secret TEXT NOT NULL)")
+        conn.commit()
+        _schema_snapshot_store_initialized = True
+    return conn
+
+def _load_schema_snapshot(key: tuple):
+    """Read a persisted snapshot, or None."""
+    try:
+        conn = _get_schema_snapshot_connection()
+        try:
+            row = conn.execute(
+                "SELECT fingerprint, tables, reflected_at FROM schema_snapshots WHERE engine_key = ? AND schema_name = ?",
+                key
+            ).fetchone()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"Schema snapshot load failed: {e}")
+        return None
+    if row is None:
+        return None
+    return {"fingerprint": row[0], "tables": json.loads(row[1]), "reflected_at": row[2], "checked_at": None}
+
+def _save_schema_snapshot(key: tuple, snapshot: dict):
+    """Persist a freshly reflected snapshot."""
+    try:
+        conn = _get_schema_snapshot_connection()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_snapshots (engine_key, schema_name, fingerprint, tables, reflected_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, snapshot["fingerprint"], json.dumps(snapshot["tables"]), snapshot["reflected_at"])
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"Schema snapshot store failed: {e}")
+
+# Schemas whose snapshot is kept in memory per worker (least recently used go first;
+# the SQLite store keeps them all)
+SCHEMA_SNAPSHOT_MAX_CACHED = 32
+
+def _schema_snapshot_key_lock(key: tuple) -> threading.Lock:
+    """The lock serializing lookups of one schema, dropping the least recently used idle schemas beyond the cap.
+    
+    Call with _schema_snapshots_lock held.
+    """
+    key_lock = _schema_snapshot_key_locks.get(key)
+    if key_lock is None:
+        key_lock = _schema_snapshot_key_locks[key] = threading.Lock()
+    else:
+        _schema_snapshot_key_locks.move_to_end(key)
+    if len(_schema_snapshot_key_locks) > SCHEMA_SNAPSHOT_MAX_CACHED:
+        idle = [other for other, lock in _schema_snapshot_key_locks.items() if other != key and not lock.locked()]
+        for other in idle[:len(_schema_snapshot_key_locks) - SCHEMA_SNAPSHOT_MAX_CACHED]:
+            del _schema_snapshot_key_locks[other]
+            _schema_snapshots.pop(other, None)
+    return key_lock
+
+def get_schema_snapshot(engine, schema_name: str = None, refresh: bool = False) -> dict:
+    """Reflected tables of a schema, served from the snapshot store until the schema changes.
+    
+    Snapshots are kept in memory (the SCHEMA_SNAPSHOT_MAX_CACHED most recently used)
+    and in SQLite at SCHEMA_SNAPSHOT_PATH, keyed on the engine URL and schema. A snapshot checked less than SCHEMA_SNAPSHOT_CHECK_INTERVAL
+    seconds ago is used as is; otherwise the schema's catalog fingerprint is compared
+    and the schema is reflected again only if it differs (or cannot be computed).
+    Concurrent callers for the same schema wait for one reflection.
+    
+    Tables are clustered during reflection per SCHEMA_CLUSTER_MIN_MEMBERS.
+    
+    Returns a dict with "tables" (as from reflect_schema; treat as read-only),
+    "fingerprint", "reflected_at" and "status": fresh, unchanged, changed, unverified,
+    miss, refresh or disabled.
+    """
+    config = load_config() or {}
+    cluster_min_members = config.get('schema_cluster_min_members', 2)
+    if not config.get('schema_snapshot_enabled', True):
+        SCHEMA_SNAPSHOT_LOOKUPS.inc(route=current_route(), result="disabled")
+        return {"tables": reflect_schema(engine, schema_name, cluster_min_members), "fingerprint": None,
+                "reflected_at": time.time(), "status": "disabled"}
+    
+    key = (engine_registry_key(engine.url.render_as_string(hide_password=False)), schema_name or '')
+    with _schema_snapshots_lock:
+        key_lock = _schema_snapshot_key_lock(key)
+    with key_lock:
+        snapshot = _schema_snapshots.get(key)
+        if snapshot is None and not refresh:
+            snapshot = _load_schema_snapshot(key)
+        now = time.monotonic()
+        checked_at = snapshot["checked_at"] if snapshot else None
+        if not refresh and checked_at is not None and now - checked_at < config.get('schema_snapshot_check_interval', 5.0):
+            status = "fresh"
+        else:
+            # Fingerprint before reflecting: DDL in between only causes one extra reflection later
+            fingerprint = None
+            try:
+                with engine.connect() as conn:
+                    fingerprint = schema_fingerprint(conn, engine.dialect.name, schema_name)
+                # The clustering setting is part of the fingerprint so changing it reflects again
+                if fingerprint is not None and cluster_min_members:
+                    fingerprint = f"{fingerprint}:c{cluster_min_members}"
+            except Exception as e:
+                logger.warning(f"Schema fingerprint failed on {engine.dialect.name}, reflecting instead: {e}")
+            if not refresh and snapshot is not None and fingerprint is not None and fingerprint == snapshot["fingerprint"]:
+                status = "unchanged"
+                snapshot["checked_at"] = now
+            else:
+                if refresh:
+                    status = "refresh"
+                elif snapshot is None:
+                    status = "miss"
+                else:
+                    status = "changed" if fingerprint is not None else "unverified"
+                snapshot = {
+                    "fingerprint": fingerprint,
+                    "tables": reflect_schema(engine, schema_name, cluster_min_members),
+                    "reflected_at": time.time(),
+                    "checked_at": now
+                }
+                _save_schema_snapshot(key, snapshot)
+                logger.info(f"Schema snapshot for '{schema_name or 'default'}' reflected ({status}, "
+                            f"{count_tables(snapshot['tables'])} tables)")
+            with _schema_snapshots_lock:
+                # Not cached again if the schema was dropped from memory meanwhile
+                if _schema_snapshot_key_locks.get(key) is key_lock:
+                    _schema_snapshots[key] = snapshot
+    SCHEMA_SNAPSHOT_LOOKUPS.inc(route=current_route(), result=status)
+    return {**snapshot, "key": key, "status": status}
+
+def schema_snapshot_info(snapshot: dict) -> dict:
+    """Snapshot metadata for API responses."""
+    return {
+        "status": snapshot["status"],
+        "fingerprint": snapshot["fingerprint"],
+        "reflected_at": datetime.utcfromtimestamp(snapshot["reflected_at"]).isoformat() + "Z"
+    }
+
+def count_tables(tables: dict) -> int:
+    """Number of tables in reflected tables, counting every member of a clustered table."""
+    return sum(len(table_info["cluster"]["members"]) if "cluster" in table_info else 1 for table_info in tables.values())
+
+def all_table_names(tables: dict) -> list:
+    """Sorted names of reflected tables including the unreflected members of clusters."""
+    names = set(tables)
+    for table_info in tables.values():
+        if "cluster" in table_info:
+            names.update(table_info["cluster"]["members"])
+    return sorted(names)
+
+def table_representatives(tables: dict) -> dict:
+    """Map of cluster member name -> the reflected table representing it."""
+    return {
+        member: table_name
+        for table_name, table_info in tables.items() if "cluster" in table_info
+        for member in table_info["cluster"]["members"]
+    }
+
+def foreign_key_neighbors(tables: dict) -> dict:
+    """Undirected foreign-key adjacency between reflected tables: table name -> set of related table names.
+    
+    References to other schemas are ignored; references to cluster members count
+    for their representative.
+    """
+    representatives = table_representatives(tables)
+    neighbors = {table_name: set() for table_name in tables}
+    for table_name, table_info in tables.items():
+        for fk in table_info.get('foreign_keys', []):
+            referred_table = representatives.get(fk.get('referred_table'), fk.get('referred_table'))
+            if referred_table in neighbors and referred_table != table_name:
+                neighbors[table_name].add(referred_table)
+                neighbors[referred_table].add(table_name)
+    return neighbors
+
+def table_clusters_info(tables: dict) -> dict:
+    """Cluster metadata for API responses: each pattern with its representative and member count."""
+    clusters = [table_info["cluster"] for table_info in tables.values() if "cluster" in table_info]
+    return {
+        "clusters": len(clusters),
+        "tables_collapsed": sum(len(cluster["members"]) - 1 for cluster in clusters),
+        "patterns": [
+            {"pattern": cluster["pattern"], "representative": cluster["representative"], "tables": len(cluster["members"])}
+            for cluster in sorted(clusters, key=lambda cluster: cluster["pattern"])
+        ]
+    }
+
+def table_details(table_info: dict) -> dict:
+    """Full metadata of one reflected table in the /database/schema response shape."""
+    return {
+        "columns": table_info["columns"],
+        "primary_keys": table_info["primary_key"],
+        "foreign_keys": table_info["foreign_keys"],
+        "indexes": table_info["indexes"]
+    }
+
+def get_table_details(engine, table_name: str, schema_name: str = None, refresh: bool = False) -> tuple:
+    """Full metadata of one table from the schema snapshot; returns (details dict, snapshot).
+    
+    Tables outside the snapshot (such as views) are inspected directly; raises
+    sqlalchemy.exc.NoSuchTableError if the table does not exist.
+    """
+    snapshot = get_schema_snapshot(engine, schema_name, refresh)
+    table_info = snapshot["tables"].get(table_name)
+    if table_info is None:
+        with engine.connect() as conn:
+            table_info = _reflect_table(sqlalchemy.inspect(conn), table_name, schema_name)
+    return table_details(table_info), snapshot
+
+def format_table_summary(table_name: str, table_info: dict) -> str:
+    """Summarize one reflected table (or table cluster) as a single prompt line."""
+    column_names = [col['name'] for col in table_info['columns']]
+    # Limit column names to keep summary concise
+    return f"{format_table_label(table_name, table_info)}: {format_column_list(column_names)}"
+
+def format_table_label(table_name: str, table_info: dict = None, members: list = None) -> str:
+    """Summary line label: "Table name", or "Tables pattern (N tables, first..last)" for a cluster."""
+    if members is None:
+        members = table_info["cluster"]["members"] if table_info and "cluster" in table_info else [table_name]
+    if len(members) == 1:
+        return f"Table {members[0]}"
+    return f"Tables {table_family(table_name)} ({len(members)} tables, {members[0]}..{members[-1]})"
+
+def format_column_list(column_names: list, total_columns: int = None, max_items: int = 10) -> str:
+    """Join column names for a summary line, truncated to max_items entries."""
+    total_columns = total_columns if total_columns is not None else len(column_names)
+    if len(column_names) > max_items:
+        return f"{', '.join(column_names[:max_items])}... ({total_columns} total columns)"
+    return ', '.join(column_names)
+
+# Schema summary compression strategies, applied in this order (see summarize_schema)
+SUMMARY_STRATEGIES = ('drop_audit_columns', 'group_partitions', 'factor_affixes', 'rank_by_centrality')
+
+# Bookkeeping columns that say nothing about what a table means. Underscore-prefixed
+# names only match the metadata columns of known loaders (Airbyte, Fivetran, Stitch,
+# dlt, ...) so business columns such as _status or _amount are kept
+AUDIT_COLUMN_PATTERN = re.compile(
+    r'^(created|updated|modified|changed|inserted|loaded|last_updated|last_modified)'
+    r'(_?(at|on|by|date|time|timestamp|ts|user|user_id))?$'
+    r'|^(row_?version|etl_\w+|dw_\w+|audit_\w+)$'
+    r'|^_(airbyte|fivetran|sdc|dlt|hevo|meltano|peerdb|etl|dw|audit)_\w+$'
+    r'|^_(loaded|inserted|ingested|synced|updated|created)_(at|on|ts)$',
+    re.IGNORECASE
+)
+
+# Minimum columns sharing a prefix or suffix token before they are factored
+AFFIX_GROUP_MIN = 3
+
+def _factor_columns_once(column_names: list, side: str) -> list:
+    """One factoring pass over leading (side="prefix") or trailing (side="suffix") name tokens."""
+    token_lists = {}
+    counts = {}
+    for name in column_names:
+        tokens = name.split('_')
+        if '{' in name or '' in tokens or len(tokens) < 2:
+            continue
+        tokens = tokens if side == 'prefix' else tokens[::-1]
+        token_lists[name] = tokens
+        for length in range(1, len(tokens)):
+            affix = tuple(tokens[:length])
+            counts[affix] = counts.get(affix, 0) + 1
+    
+    # Each column joins the longest run of tokens it shares with enough other columns
+    groups = OrderedDict()
+    for name in column_names:
+        tokens = token_lists.get(name)
+        affix = None
+        if tokens:
+            for length in range(1, len(tokens)):
+                if counts[tuple(tokens[:length])] >= AFFIX_GROUP_MIN:
+                    affix = tuple(tokens[:length])
+        groups.setdefault(affix if affix else ('', name), []).append(name)
+    
+    factored = []
+    for affix, members in groups.items():
+        if affix[0] == '' or len(members) < AFFIX_GROUP_MIN:
+            factored.extend(members)
+        elif side == 'prefix':
+            rests = ['_'.join(token_lists[name][len(affix):]) for name in members]
+            factored.append(f"{'_'.join(affix)}_{{{','.join(rests)}}}")
+        else:
+            rests = ['_'.join(token_lists[name][len(affix):][::-1]) for name in members]
+            factored.append(f"{{{','.join(rests)}}}_{'_'.join(affix[::-1])}")
+    return factored
+
+def factor_column_names(column_names: list) -> list:
+    """Collapse columns sharing leading or trailing name tokens.
+    
+    cust_id, cust_name, cust_email -> cust_{id,name,email}; home_phone, work_phone,
+    cell_phone -> {home,work,cell}_phone. Each column joins the longest token run it
+    shares with at least AFFIX_GROUP_MIN columns; groups keep the position of their
+    first column.
+    """
+    return _factor_columns_once(_factor_columns_once(column_names, 'prefix'), 'suffix')
+
+def format_named_tables(entries: list, factor: bool = True) -> str:
+    """Names-only summary line for tables that did not fit the token budget in full."""
+    names = sorted(entry["name"] for entry in entries)
+    return f"Other tables: {', '.join(factor_column_names(names) if factor else names)}"
+
+def summarize_schema(tables: dict, schema_name: str = None, token_budget: int = 0,
+                     strategies=SUMMARY_STRATEGIES) -> tuple:
+    """Build a schema summary prompt, compressed by the given strategies and fitted to a token budget.
+    
+    drop_audit_columns removes bookkeeping columns (created_at, updated_by, etl_*,
+    loader metadata such as _airbyte_*) other than key columns; group_partitions
+    collapses tables of one family (partitions, shards and copies, see table_family)
+    with identical columns into one pattern line, as do clusters collapsed during
+    reflection; factor_affixes collapses columns sharing a name prefix or suffix. With a
+    token_budget (0 = none), tables are described in full in order of foreign-key
+    centrality when rank_by_centrality is on (name order otherwise) until most of the
+    budget is used, the rest are listed by name only, and any that still do not fit
+    are counted as omitted.
+    
+    Returns (summary text, stats dict with token counts and the compression ratio
+    against the uncompressed summary).
+    """
+    strategies = tuple(strategies)
+    schema_prefix = f"Schema '{schema_name}': " if schema_name else "Database: "
+    header = f"{schema_prefix}{count_tables(tables)} tables"
+    # Baseline: one uncompressed line per table, including the members of clusters collapsed during reflection
+    baseline_lines = [header]
+    for table_name, table_info in tables.items():
+        column_list = format_column_list([col['name'] for col in table_info['columns']])
+        members = table_info["cluster"]["members"] if "cluster" in table_info else [table_name]
+        baseline_lines.extend(f"Table {member}: {column_list}" for member in members)
+    baseline_tokens = estimate_tokens('\n'.join(baseline_lines))
+    
+    # Foreign-key degree (distinct related tables) as the centrality score
+    neighbors = foreign_key_neighbors(tables)
+    
+    audit_columns_dropped = 0
+    entries = []
+    families = OrderedDict()
+    for table_name, table_info in tables.items():
+        members = table_info["cluster"]["members"] if "cluster" in table_info else [table_name]
+        column_names = [col['name'] for col in table_info['columns']]
+        if 'drop_audit_columns' in strategies:
+            key_columns = set(table_info.get('primary_key', []))
+            for fk in table_info.get('foreign_keys', []):
+                key_columns.update(fk.get('constrained_columns', []))
+            kept = [name for name in column_names if name in key_columns or not AUDIT_COLUMN_PATTERN.match(name)]
+            audit_columns_dropped += len(column_names) - len(kept)
+            column_names = kept
+        if 'group_partitions' in strategies:
+            families.setdefault((table_family(table_name), tuple(column_names)), []).append((table_name, members))
+        else:
+            entries.append({"tables": [table_name], "members": members, "columns": column_names})
+    for (_, column_names), grouped in families.items():
+        entries.append({
+            "tables": [table_name for table_name, _ in grouped],
+            "members": sorted(member for _, members in grouped for member in members),
+            "columns": list(column_names)
+        })
+    
+    partition_groups = 0
+    for entry in entries:
+        members = entry["members"]
+        if len(members) > 1:
+            partition_groups += 1
+        entry["label"] = format_table_label(entry["tables"][0], members=members)
+        entry["name"] = table_family(entry["tables"][0]) if len(members) > 1 else members[0]
+        columns = factor_column_names(entry["columns"]) if 'factor_affixes' in strategies else entry["columns"]
+        entry["line"] = f"{entry['label']}: {format_column_list(columns, len(entry['columns']))}"
+        entry["tokens"] = estimate_tokens(entry["line"]) + 1
+        entry["degree"] = len(set().union(*(neighbors[name] for name in entry["tables"])) - set(entry["tables"]))
+    entries.sort(key=lambda entry: entry["label"])
+    
+    detailed, named, omitted = entries, [], []
+    header_tokens = estimate_tokens(header)
+    if token_budget and header_tokens + sum(entry["tokens"] for entry in entries) > token_budget:
+        if 'rank_by_centrality' in strategies:
+            ranked = sorted(entries, key=lambda entry: (-entry["degree"], entry["label"]))
+        else:
+            ranked = entries
+        # Reserve a fifth of the budget so remaining tables can at least be named, and room for the omitted count
+        available = token_budget - header_tokens - estimate_tokens("(99999 more tables omitted)") - 1
+        detail_budget = int(available * 0.8)
+        detailed, rest = [], []
+        for entry in ranked:
+            if entry["tokens"] <= detail_budget:
+                detailed.append(entry)
+                detail_budget -= entry["tokens"]
+                available -= entry["tokens"]
+            else:
+                rest.append(entry)
+        
+        # Name as many of the rest as fit (in rank order); the longest fitting prefix is found by bisection
+        low, high = 0, len(rest)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if estimate_tokens(format_named_tables(rest[:middle], 'factor_affixes' in strategies)) <= available:
+                low = middle
+            else:
+                high = middle - 1
+        named, omitted = rest[:low], rest[low:]
+        detailed.sort(key=lambda entry: entry["label"])
+    
+    summary_parts = [header] + [entry["line"] for entry in detailed]
+    if named:
+        summary_parts.append(format_named_tables(named, 'factor_affixes' in strategies))
+    if omitted:
+        summary_parts.append(f"({sum(len(entry['members']) for entry in omitted)} more tables omitted)")
+    summary = '\n'.join(summary_parts)
+    
+    summary_tokens = estimate_tokens(summary)
+    stats = {
+        "strategies": list(strategies),
+        "token_budget": token_budget or None,
+        "tables": count_tables(tables),
+        "tables_detailed": sum(len(entry["members"]) for entry in detailed),
+        "tables_named_only": sum(len(entry["members"]) for entry in named),
+        "tables_omitted": sum(len(entry["members"]) for entry in omitted),
+        "partition_groups": partition_groups,
+        "audit_columns_dropped": audit_columns_dropped,
+        "baseline_tokens": baseline_tokens,
+        "summary_tokens": summary_tokens,
+        "compression_ratio": round(baseline_tokens / summary_tokens, 2)
+    }
+    return summary, stats
+
+def resolve_summary_options(summary: dict = None) -> dict:
+    """Schema summary token budget and strategies from a request's "summary" object over the configured defaults.
+    
+    Raises ValueError for a malformed object, an unknown strategy or a negative budget.
+    """
+    config = load_config() or {}
+    summary = summary or {}
+    if not isinstance(summary, dict):
+        raise ValueError("summary must be an object with optional token_budget and strategies")
+    token_budget = int(summary.get('token_budget', config.get('summary_token_budget', 0)))
+    if token_budget < 0:
+        raise ValueError("summary.token_budget must be 0 (no budget) or a positive number of tokens")
+    strategies = summary.get('strategies', config.get('summary_strategies', list(SUMMARY_STRATEGIES)))
+    unknown = [strategy for strategy in strategies if strategy not in SUMMARY_STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown summary strategies {', '.join(unknown)}; "
+                         f"summary.strategies may contain: {', '.join(SUMMARY_STRATEGIES)}")
+    return {"token_budget": token_budget, "strategies": [s for s in SUMMARY_STRATEGIES if s in strategies]}
+
+def create_schema_summary(engine, schema_name: str = None, tables: dict = None, summary_options: dict = None,
+                          stats: dict = None, profiles: dict = None) -> str:
+    """Create a concise summary of the database schema for API consumption.
+    
+    Tables come from the schema snapshot store unless already reflected tables are passed.
+    summary_options (from resolve_summary_options) sets the token budget and compression
+    strategies; summarize_schema's statistics are copied into stats if given. Column
+    profiles (from profile_columns) are appended as their own section, which gets
+    PROFILE_BUDGET_SHARE of a token budget plus whatever the tables leave unused.
+    """
+    try:
+        if tables is None:
+            tables = get_schema_snapshot(engine, schema_name)["tables"]
+        summary_options = summary_options or resolve_summary_options()
+        token_budget = summary_options["token_budget"]
+        
+        schema_summary, summary_stats = summarize_schema(
+            tables, schema_name, int(token_budget * (1 - PROFILE_BUDGET_SHARE)) if profiles else token_budget,
+            summary_options["strategies"]
+        )
+        if profiles:
+            profile_budget = max(0, token_budget - summary_stats["summary_tokens"] - 1) if token_budget else 0
+            profile_section = format_column_profiles(profiles, profile_budget) if profile_budget or not token_budget else ''
+            if profile_section:
+                schema_summary = f"{schema_summary}\n{profile_section}"
+            summary_stats["profile_tokens"] = estimate_tokens(profile_section) if profile_section else 0
+            summary_stats["token_budget"] = token_budget or None
+        if stats is not None:
+            stats.update(summary_stats)
+        
+        # Log the first 500 characters of the schema summary for debugging
+        logger.info(f"Generated schema summary ({len(schema_summary)} chars, ~{summary_stats['summary_tokens']} tokens, "
+                    f"{summary_stats['compression_ratio']}x compression): "
+                    f"{schema_summary[:500]}{'...' if len(schema_summary) > 500 else ''}")
+        return schema_summary
+            
+    except Exception as e:
+        logger.error(f"Error creating schema summary: {e}")
+        return f"Error: Unable to create schema summary - {str(e)}"
+
+# Column profiling: bounded samples per table summarized into compact column statistics for the prompt
+
+# HyperLogLog precision: 2**10 one-byte registers, about 3% standard error
+HLL_PRECISION = 10
+
+# Value patterns tracked per column; further patterns are only counted as "other"
+PROFILE_PATTERN_LIMIT = 16
+
+# Columns profiled per table, and column types never sampled (large or opaque values)
+PROFILE_MAX_COLUMNS = 50
+PROFILE_SKIPPED_TYPE_PATTERN = re.compile(
+    r'BLOB|BYTEA|BINARY|IMAGE|LOB|XML|JSON|GEOMETRY|GEOGRAPHY|ARRAY|VECTOR', re.IGNORECASE
+)
+
+# Tables estimated at more than this multiple of the sample size are read with TABLESAMPLE
+# (PostgreSQL, SQL Server), asking for twice the sample size so the row limit still fills
+PROFILE_TABLESAMPLE_FACTOR = 10
+
+# Rows fetched per round trip while streaming a sample
+PROFILE_ROW_BUFFER = 500
+
+# Share of a summary token budget kept for column profiles when profiling is on
+PROFILE_BUDGET_SHARE = 0.25
+
+class HyperLogLog:
+    """Distinct-count estimator in constant memory (2**precision one-byte registers)."""
+    
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+    
+    def add(self, value: bytes):
+        hashed = int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), 'big')
+        index = hashed >> (64 - self.precision)
+        remaining = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    def count(self) -> int:
+        registers = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / registers)
+        estimate = alpha * registers * registers / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * registers and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = registers * math.log(registers / zeros)
+        return int(round(estimate))
+
+def _pattern_class(character: str) -> str:
+    return 'a' if character.isalpha() else '9' if character.isdigit() else character
+
+# ASCII fast path of value_pattern: classify characters with one translate, then collapse runs
+_PATTERN_TRANSLATION = str.maketrans(
+    {**{c: 'a' for c in string.ascii_lowercase}, **{c: 'A' for c in string.ascii_uppercase}, **{c: '9' for c in string.digits}}
+)
+_PATTERN_RUN = re.compile(r'[aA]+|9{5,}')
+
+def _collapse_pattern_run(match) -> str:
+    run = match.group()
+    return '9+' if run[0] == '9' else 'a' if 'a' in run else 'A'
+
+def value_pattern(value) -> str:
+    """Shape of a sampled value: letters as a (A when upper case), digits as 9, other characters kept.
+    
+    Letter runs collapse to one a/A and digit runs longer than four to 9+, so emails
+    come out as a.a@a.a and dates as 9999-99-99. Numbers are shaped from their text;
+    other non-string values are described by type name.
+    """
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return 'bytes'
+    if isinstance(value, str):
+        text_value = value
+    elif isinstance(value, (int, float)) or type(value).__name__ == 'Decimal':
+        text_value = str(value)
+    else:
+        return type(value).__name__
+    
+    head = text_value[:64]
+    if head.isascii():
+        pattern = _PATTERN_RUN.sub(_collapse_pattern_run, head.translate(_PATTERN_TRANSLATION))
+    else:
+        parts = []
+        for kind, run in itertools.groupby(head, key=_pattern_class):
+            run = ''.join(run)
+            if kind == 'a':
+                parts.append('A' if run.isupper() else 'a')
+            elif kind == '9':
+                parts.append('9' * len(run) if len(run) <= 4 else '9+')
+            else:
+                parts.append(run)
+        pattern = ''.join(parts)
+    return pattern[:32] + '...' if len(pattern) > 32 or len(text_value) > 64 else pattern
+
+class ColumnProfile:
+    """Streaming statistics of one sampled column: rows, nulls, distinct estimate, value patterns, lengths."""
+    
+    def __init__(self):
+        self.rows = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        self.patterns = {}
+        self.other_patterns = 0
+        self.min_length = None
+        self.max_length = 0
+    
+    def add(self, value):
+        self.rows += 1
+        if value is None:
+            self.nulls += 1
+            return
+        text_value = value if isinstance(value, str) else str(value)
+        self.distinct.add(text_value[:256].encode('utf-8', 'replace'))
+        pattern = value_pattern(value)
+        if pattern in self.patterns or len(self.patterns) < PROFILE_PATTERN_LIMIT:
+            self.patterns[pattern] = self.patterns.get(pattern, 0) + 1
+        else:
+            self.other_patterns += 1
+        length = len(text_value)
+        self.min_length = length if self.min_length is None else min(self.min_length, length)
+        self.max_length = max(self.max_length, length)
+    
+    def result(self) -> dict:
+        """Compact, JSON-serializable summary of the column."""
+        values = self.rows - self.nulls
+        distinct = min(self.distinct.count(), values)
+        top_patterns = sorted(self.patterns.items(), key=lambda item: (-item[1], item[0]))[:3]
+        return {
+            "sampled": self.rows,
+            "null_ratio": round(self.nulls / self.rows, 3) if self.rows else None,
+            "distinct": distinct,
+            # Within the estimator's error of one distinct value per row
+            "unique": values > 1 and distinct >= 0.97 * values,
+            "patterns": [[pattern, round(count / values, 2)] for pattern, count in top_patterns],
+            "length": [self.min_length, self.max_length] if values else None
+        }
+
+@contextlib.contextmanager
+def statement_timeout(conn, seconds: float):
+    """Bound the statements run on conn inside the block (best effort per dialect).
+    
+    PostgreSQL uses SET LOCAL statement_timeout (end the transaction afterwards), MySQL
+    max_execution_time, MariaDB max_statement_time, SQLite a progress handler that
+    interrupts the query past the deadline, SQL Server pyodbc's query timeout (whole
+    seconds) and Oracle the driver's call_timeout. Other dialects are not bounded here.
+    If the block raises on MySQL/MariaDB, conn is invalidated instead of having its
+    session reset.
+    """
+    dialect_name = conn.dialect.name
+    if not seconds:
+        yield
+    elif dialect_name == 'postgresql':
+        conn.execute(sqlalchemy.text(f"SET LOCAL statement_timeout = {int(seconds * 1000)}"))
+        yield
+    elif dialect_name in ('mysql', 'mariadb'):
+        if getattr(conn.dialect, 'is_mariadb', False):
+            setting, value = 'max_statement_time', f"{float(seconds):.3f}"
+        else:
+            setting, value = 'max_execution_time', str(int(seconds * 1000))
+        conn.execute(sqlalchemy.text(f"SET SESSION {setting} = {value}"))
+        try:
+            yield
+        except BaseException:
+            # An unread streaming result may still be pending ("Commands out of sync"): drop the session
+            conn.invalidate()
+            raise
+        conn.execute(sqlalchemy.text(f"SET SESSION {setting} = 0"))
+    elif dialect_name == 'sqlite':
+        dbapi_connection = conn.connection.driver_connection
+        deadline = time.monotonic() + seconds
+        dbapi_connection.set_progress_handler(lambda: int(time.monotonic() > deadline), 1000)
+        try:
+            yield
+        finally:
+            dbapi_connection.set_progress_handler(None, 0)
+    elif dialect_name in ('mssql', 'oracle') and hasattr(
+            conn.connection.driver_connection, 'timeout' if dialect_name == 'mssql' else 'call_timeout'):
+        # Client-side timeouts: no server round trip to set them or to reset them
+        dbapi_connection = conn.connection.driver_connection
+        if dialect_name == 'mssql':
+            attribute, value = 'timeout', max(1, math.ceil(seconds))
+        else:
+            attribute, value = 'call_timeout', int(seconds * 1000)
+        setattr(dbapi_connection, attribute, value)
+        try:
+            yield
+        finally:
+            setattr(dbapi_connection, attribute, 0)
+    else:
+        yield
+
+class ProfilingCancellation:
+    """Stops the sample queries of a profiling run that overran its deadline.
+    
+    cancel() interrupts the query in flight on every registered connection (SQLite
+    interrupt(), PostgreSQL and Oracle cancel(), KILL QUERY on MySQL/MariaDB, KILL of
+    the session on SQL Server); profile_table also stops reading rows once it is set,
+    on every dialect.
+    """
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._connections = {}
+    
+    def is_set(self) -> bool:
+        return self._event.is_set()
+    
+    def register(self, dbapi_connection, session_id=None):
+        """Track a connection; session_id is its server session (@@SPID) on SQL Server."""
+        with self._lock:
+            self._connections[dbapi_connection] = session_id
+    
+    def unregister(self, dbapi_connection):
+        with self._lock:
+            self._connections.pop(dbapi_connection, None)
+    
+    def cancel(self):
+        self._event.set()
+        with self._lock:
+            connections = list(self._connections.items())
+        dialect_name = self.engine.dialect.name
+        for dbapi_connection, session_id in connections:
+            try:
+                if dialect_name == 'sqlite':
+                    dbapi_connection.interrupt()
+                elif dialect_name in ('postgresql', 'oracle'):
+                    dbapi_connection.cancel()
+                elif dialect_name in ('mysql', 'mariadb'):
+                    with self.engine.connect() as conn:
+                        conn.execute(sqlalchemy.text(f"KILL QUERY {int(dbapi_connection.thread_id())}"))
+                elif dialect_name == 'mssql' and session_id is not None:
+                    # pyodbc cannot cancel from another thread; ending the session needs ALTER ANY CONNECTION
+                    with self.engine.connect() as conn:
+                        conn.execute(sqlalchemy.text(f"KILL {int(session_id)}"))
+            except Exception as e:
+                logger.warning(f"Could not interrupt a column profiling query on {dialect_name}: {e}")
+
+def _table_row_estimates(conn, dialect_name: str, schema_name: str = None) -> dict:
+    """Catalog row count estimates per table (PostgreSQL, SQL Server, MySQL/MariaDB; empty elsewhere)."""
+    params = {'schema': schema_name} if schema_name else {}
+    if dialect_name == 'postgresql':
+        rows = conn.execute(sqlalchemy.text(
+            "SELECT c.relname, c.reltuples FROM pg_class c "
+            f"WHERE c.relnamespace = {_pg_namespace(schema_name)} AND c.relkind IN ('r', 'p')"
+        ), params)
+    elif dialect_name == 'mssql':
+        rows = conn.execute(sqlalchemy.text(
+            "SELECT t.name, SUM(p.rows) FROM sys.tables t "
+            "JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1) "
+            f"WHERE t.schema_id = {'SCHEMA_ID(:schema)' if schema_name else 'SCHEMA_ID()'} GROUP BY t.name"
+        ), params)
+    elif dialect_name in ('mysql', 'mariadb'):
+        rows = conn.execute(sqlalchemy.text(
+            "SELECT table_name, table_rows FROM information_schema.tables "
+            f"WHERE table_schema = {':schema' if schema_name else 'DATABASE()'} AND table_type = 'BASE TABLE'"
+        ), params)
+    else:
+        return {}
+    # PostgreSQL reports -1 for tables never analyzed
+    return {name: int(estimate) for name, estimate in rows if estimate is not None and estimate >= 0}
+
+def profile_sample_query(dialect_name: str, table_name: str, column_names: list, schema_name: str = None,
+                         sample_rows: int = 1000, row_estimate: int = None) -> tuple:
+    """Bounded sample query for a table's columns; returns (select statement, sampling method).
+    
+    Large tables are read through TABLESAMPLE SYSTEM on PostgreSQL and SQL Server
+    (method "tablesample"); everything else takes the first sample_rows rows the
+    database returns (method "limit").
+    """
+    table = sqlalchemy.table(table_name, *[sqlalchemy.column(name) for name in column_names], schema=schema_name)
+    if (dialect_name in ('postgresql', 'mssql') and row_estimate
+            and row_estimate > sample_rows * PROFILE_TABLESAMPLE_FACTOR):
+        percent = round(min(100.0, 200.0 * sample_rows / row_estimate), 4)
+        if dialect_name == 'postgresql':
+            sampling = sqlalchemy.func.system(percent)
+        else:
+            sampling = sqlalchemy.func.system(sqlalchemy.literal_column(f"{percent} PERCENT"))
+        table = sqlalchemy.tablesample(table, sampling)
+        method = "tablesample"
+    else:
+        method = "limit"
+    return sqlalchemy.select(*[table.c[name] for name in column_names]).limit(sample_rows), method
+
+def profile_table(engine, table_name: str, table_info: dict, schema_name: str = None, sample_rows: int = 1000,
+                  timeout: float = 0, row_estimate: int = None, cancellation: ProfilingCancellation = None) -> dict:
+    """Sample one table and profile its columns, streaming rows so memory stays constant per column.
+    
+    Raises TimeoutError when the statement timeout or cancellation stops the query;
+    the connection is then invalidated rather than returned to the pool.
+    """
+    column_names = [
+        col['name'] for col in table_info['columns'] if not PROFILE_SKIPPED_TYPE_PATTERN.search(str(col.get('type') or ''))
+    ][:PROFILE_MAX_COLUMNS]
+    query, method = profile_sample_query(engine.dialect.name, table_name, column_names, schema_name,
+                                         sample_rows, row_estimate)
+    profiles = [ColumnProfile() for _ in column_names]
+    sampled = 0
+    if column_names:
+        sample_start = time.perf_counter()
+        with engine.connect() as conn:
+            dbapi_connection = conn.connection.driver_connection
+            if cancellation is not None:
+                session_id = None
+                if engine.dialect.name == 'mssql':
+                    session_id = conn.execute(sqlalchemy.text("SELECT @@SPID")).scalar()
+                cancellation.register(dbapi_connection, session_id)
+            try:
+                with statement_timeout(conn, timeout):
+                    if cancellation is not None and cancellation.is_set():
+                        raise TimeoutError("column profiling was cancelled")
+                    result = conn.execution_options(stream_results=True, max_row_buffer=PROFILE_ROW_BUFFER).execute(query)
+                    for row in result:
+                        if cancellation is not None and cancellation.is_set():
+                            raise TimeoutError("column profiling was cancelled")
+                        sampled += 1
+                        for profile, value in zip(profiles, row):
+                            profile.add(value)
+            except TimeoutError:
+                conn.invalidate()
+                raise
+            except Exception as e:
+                if (cancellation is not None and cancellation.is_set()) or (
+                        timeout and time.perf_counter() - sample_start >= timeout):
+                    conn.invalidate()
+                    raise TimeoutError(f"sample query exceeded the {timeout}s statement timeout") from e
+                raise
+            finally:
+                if cancellation is not None:
+                    cancellation.unregister(dbapi_connection)
+                conn.rollback()
+        COLUMN_PROFILE_SECONDS.observe(time.perf_counter() - sample_start, route=current_route())
+    return {
+        "rows_estimate": row_estimate,
+        "sampled_rows": sampled,
+        "method": method,
+        "columns": {name: profile.result() for name, profile in zip(column_names, profiles)}
+    }
+
+def _column_profile_signature(table_info: dict, sample_rows: int) -> str:
+    """Cache validity key of a table profile: its column names and types and the sample size."""
+    columns = [[col['name'], str(col.get('type'))] for col in table_info['columns']]
+    return hashlib.sha256(json.dumps([columns, sample_rows]).encode('utf-8')).hexdigest()[:16]
+
+def _load_column_profiles(key: tuple, ttl: float) -> dict:
+    """Cached profiles of a schema younger than ttl seconds: table name -> (signature, profile)."""
+    try:
+        conn = _get_schema_snapshot_connection()
+        try:
+            rows = conn.execute(
+                "SELECT table_name, signature, profile FROM column_profiles "
+                "WHERE engine_key = ? AND schema_name = ? AND profiled_at > ?",
+                (*key, time.time() - ttl)
+            ).fetchall()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"Column profile cache load failed: {e}")
+        return {}
+    return {table_name: (signature, json.loads(profile)) for table_name, signature, profile in rows}
+
+def _save_column_profiles(key: tuple, entries: list):
+    """Persist fresh profiles given as (table name, signature, profile) tuples."""
+    try:
+        conn = _get_schema_snapshot_connection()
+        try:
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO column_profiles "
+                "(engine_key, schema_name, table_name, signature, profile, profiled_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(*key, table_name, signature, json.dumps(profile), now) for table_name, signature, profile in entries]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"Column profile cache store failed: {e}")
+
+def resolve_profiling_options(profiling=None) -> dict:
+    """Column profiling settings from a request's "profiling" value over the configured defaults.
+    
+    profiling may be a boolean (turn profiling on or off) or an object with enabled,
+    sample_rows, max_tables, concurrency, statement_timeout and refresh. The configured
+    COLUMN_PROFILING_* values are upper bounds: a request may lower them but not raise
+    them, nor turn off a configured statement timeout. Raises ValueError for anything
+    else or for non-positive sizes.
+    """
+    config = load_config() or {}
+    if profiling is None:
+        profiling = {}
+    elif isinstance(profiling, bool):
+        profiling = {"enabled": profiling}
+    elif not isinstance(profiling, dict):
+        raise ValueError("profiling must be a boolean or an object")
+    options = {
+        "enabled": bool(profiling.get('enabled', config.get('column_profiling_enabled', False))),
+        "sample_rows": int(profiling.get('sample_rows', config.get('column_profiling_sample_rows', 1000))),
+        "max_tables": int(profiling.get('max_tables', config.get('column_profiling_max_tables', 100))),
+        "concurrency": int(profiling.get('concurrency', config.get('column_profiling_concurrency', 4))),
+        "statement_timeout": float(profiling.get('statement_timeout',
+                                                 config.get('column_profiling_statement_timeout', 5.0))),
+        "refresh": bool(profiling.get('refresh', False))
+    }
+    for name in ('sample_rows', 'max_tables', 'concurrency'):
+        if options[name] < 1:
+            raise ValueError(f"profiling.{name} must be a positive integer")
+    if options["statement_timeout"] < 0:
+        raise ValueError("profiling.statement_timeout must be 0 (no timeout) or a number of seconds")
+    # A request may lower the configured limits but not raise them (or lift the timeout)
+    options["sample_rows"] = min(options["sample_rows"], config.get('column_profiling_sample_rows', 1000))
+    options["max_tables"] = min(options["max_tables"], config.get('column_profiling_max_tables', 100))
+    options["concurrency"] = min(options["concurrency"], config.get('column_profiling_concurrency', 4))
+    configured_timeout = config.get('column_profiling_statement_timeout', 5.0)
+    if configured_timeout:
+        options["statement_timeout"] = min(options["statement_timeout"] or configured_timeout, configured_timeout)
+    return options
+
+def profile_columns(engine, tables: dict, schema_name: str = None, options: dict = None) -> tuple:
+    """Sampled column profiles for the most connected tables of a schema, cached per table.
+    
+    Up to max_tables tables (by foreign-key degree; cluster representatives stand for
+    their clusters) are profiled concurrently on at most `concurrency` connections,
+    each sample query bounded by statement_timeout. Profiles are cached in the schema
+    snapshot store for COLUMN_PROFILING_CACHE_TTL seconds and until the table's
+    columns change; refresh ignores the cache.
+    
+    Returns (dict of table name -> profile, stats dict).
+    """
+    options = options or resolve_profiling_options()
+    config = load_config() or {}
+    profile_start = time.time()
+    neighbors = foreign_key_neighbors(tables)
+    selected = sorted(tables, key=lambda name: (-len(neighbors[name]), name))[:options["max_tables"]]
+    key = (engine_registry_key(engine.url.render_as_string(hide_password=False)), schema_name or '')
+    signatures = {name: _column_profile_signature(tables[name], options["sample_rows"]) for name in selected}
+    
+    profiles = {}
+    if not options["refresh"]:
+        cached = _load_column_profiles(key, config.get('column_profiling_cache_ttl', 86400))
+        for name in selected:
+            if name in cached and cached[name][0] == signatures[name]:
+                profiles[name] = cached[name][1]
+    missing = [name for name in selected if name not in profiles]
+    stats = {"tables": len(selected), "cached": len(profiles), "profiled": 0, "failed": 0, "timed_out": 0}
+    COLUMN_PROFILE_TABLES.inc(len(profiles), route=current_route(), result="cached")
+    
+    if missing:
+        row_estimates = {}
+        try:
+            with engine.connect() as conn:
+                row_estimates = _table_row_estimates(conn, engine.dialect.name, schema_name)
+        except Exception as e:
+            logger.warning(f"Row estimate query failed on {engine.dialect.name}, sampling with a row limit: {e}")
+        
+        # Never more sample queries than the engine's pool has connections
+        pool_size = getattr(engine.pool, 'size', None)
+        workers = min(options["concurrency"], len(missing), pool_size() if callable(pool_size) else options["concurrency"])
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='column-profile')
+        cancellation = ProfilingCancellation(engine)
+        futures = {
+            executor.submit(contextvars.copy_context().run, run_profiled, profile_table, engine, name, tables[name], schema_name,
+                            options["sample_rows"], options["statement_timeout"], row_estimates.get(name),
+                            cancellation): name
+            for name in missing
+        }
+        # Dialects without a server-side statement timeout are bounded by an overall deadline
+        waves = math.ceil(len(missing) / workers)
+        deadline = options["statement_timeout"] * (waves + 1) if options["statement_timeout"] else None
+        done, not_done = wait(futures, timeout=deadline)
+        if not_done:
+            # Stop the overrunning queries so they release their pooled connections
+            cancellation.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        fresh = []
+        for future in done:
+            name = futures[future]
+            try:
+                profiles[name] = future.result()
+                fresh.append((name, signatures[name], profiles[name]))
+            except TimeoutError as e:
+                stats["timed_out"] += 1
+                logger.warning(f"Column profiling of '{name}' timed out: {e}")
+            except Exception as e:
+                stats["failed"] += 1
+                logger.warning(f"Column profiling of '{name}' failed: {e}")
+        stats["timed_out"] += len(not_done)
+        stats["profiled"] = len(fresh)
+        if fresh:
+            _save_column_profiles(key, fresh)
+        COLUMN_PROFILE_TABLES.inc(len(fresh), route=current_route(), result="profiled")
+        COLUMN_PROFILE_TABLES.inc(stats["failed"], route=current_route(), result="failed")
+        COLUMN_PROFILE_TABLES.inc(stats["timed_out"], route=current_route(), result="timeout")
+    
+    stats["time"] = round(time.time() - profile_start, 2)
+    logger.info(f"Column profiles for '{schema_name or 'default'}': {stats}")
+    return profiles, stats
+
+def describe_column_profile(column: dict) -> str:
+    """One column's profile as a short phrase: distinct values, null share and dominant pattern."""
+    if not column["sampled"] or column["null_ratio"] == 1:
+        return "no values" if not column["sampled"] else "all null"
+    parts = ["unique" if column["unique"] else f"{column['distinct']} distinct"]
+    if column["null_ratio"]:
+        parts.append(f"{round(column['null_ratio'] * 100)}% null")
+    if column["patterns"] and column["patterns"][0][1] >= 0.5:
+        parts.append(f"like {column['patterns'][0][0]}")
+    return ', '.join(parts)
+
+def format_column_profiles(profiles: dict, token_budget: int = 0) -> str:
+    """Prompt section with one line of column profiles per table, cut to token_budget (0 = no limit)."""
+    lines = ["Column profiles (sampled rows):"]
+    used = estimate_tokens(lines[0])
+    for table_name in sorted(profiles):
+        profile = profiles[table_name]
+        if not profile["columns"]:
+            continue
+        size = f" (~{profile['rows_estimate']} rows)" if profile.get("rows_estimate") is not None else ""
+        if profile["sampled_rows"]:
+            columns = '; '.join(f"{name}: {describe_column_profile(column)}" for name, column in profile["columns"].items())
+        else:
+            columns = "no rows sampled"
+        line = f"{table_name}{size}: {columns}"
+        line_tokens = estimate_tokens(line) + 1
+        if token_budget and used + line_tokens > token_budget:
+            break
+        lines.append(line)
+        used += line_tokens
+    return '\n'.join(lines) if len(lines) > 1 else ''
+
+# Ways to combine chunk glossaries in map-reduce analysis
+MERGE_STRATEGIES = ('deep', 'llm')
+
+def resolve_chunk_options(chunking: dict = None) -> dict:
+    """Map-reduce settings from a request's "chunking" object, or None when chunking is off.
+    
+    concurrency is capped at CHUNK_MAX_CONCURRENCY and chunk_tokens raised to at least
+    CHUNK_MIN_TOKENS, so one request cannot fan out into a thread and an AI call per
+    table. Raises ValueError for a malformed object, non-positive sizes or an unknown
+    merge strategy.
+    """
+    config = load_config() or {}
+    if not chunking:
+        return None
+    if not isinstance(chunking, dict):
+        raise ValueError("chunking must be an object with optional chunk_tokens, concurrency and merge_strategy")
+    if not chunking.get('enabled', True):
+        return None
+    options = {
+        "chunk_tokens": int(chunking.get('chunk_tokens', 6000)),
+        "concurrency": int(chunking.get('concurrency', 4)),
+        "merge_strategy": chunking.get('merge_strategy', 'deep')
+    }
+    for name in ('chunk_tokens', 'concurrency'):
+        if options[name] < 1:
+            raise ValueError(f"chunking.{name} must be a positive integer")
+    if options["merge_strategy"] not in MERGE_STRATEGIES:
+        raise ValueError(f"chunking.merge_strategy must be one of: {', '.join(MERGE_STRATEGIES)}")
+    options["concurrency"] = min(options["concurrency"], config.get('chunk_max_concurrency', 8))
+    options["chunk_tokens"] = max(options["chunk_tokens"], config.get('chunk_min_tokens', 1000))
+    return options
+
+def estimate_tokens(text_value: str) -> int:
+    """Rough token estimate for prompt budgeting (~4 characters per token)."""
+    return len(text_value) // 4 + 1
+
+def partition_tables(tables: dict, chunk_tokens: int) -> list:
+    """Partition reflected tables into token-budgeted chunks that follow FK connectivity.
+    
+    Tables connected by foreign keys are walked breadth-first so related tables land
+    in the same chunk; small disconnected groups are packed together. Returns a list
+    of chunks, each a list of table names.
+    """
+    neighbors = foreign_key_neighbors(tables)
+    
+    # Connected components in breadth-first order, starting from the most connected table
+    visited = set()
+    components = []
+    for start in sorted(tables, key=lambda name: (-len(neighbors[name]), name)):
+        if start in visited:
+            continue
+        visited.add(start)
+        component = []
+        queue = deque([start])
+        while queue:
+            table_name = queue.popleft()
+            component.append(table_name)
+            for neighbor in sorted(neighbors[table_name], key=lambda name: (-len(neighbors[name]), name)):
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    queue.append(neighbor)
+        components.append(component)
+    components.sort(key=len, reverse=True)
+    
+    # Greedy packing: large components are split at the budget, small ones share chunks
+    chunks = []
+    current_chunk = []
+    current_tokens = 0
+    for component in components:
+        for table_name in component:
+            table_tokens = estimate_tokens(format_table_summary(table_name, tables[table_name]))
+            if current_chunk and current_tokens + table_tokens > chunk_tokens:
+                chunks.append(current_chunk)
+                current_chunk = []
+                current_tokens = 0
+            current_chunk.append(table_name)
+            current_tokens += table_tokens
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+def _normalize_term_name(name: str) -> str:
+    """Key used to deduplicate glossary names (case and whitespace insensitive)."""
+    return ' '.join(str(name).split()).casefold()
+
+def _merge_glossary_items(items: list, merged: OrderedDict = None) -> OrderedDict:
+    """Fold a glossary child list into an ordered name -> (display name, children) map."""
+    if merged is None:
+        merged = OrderedDict()
+    for item in items:
+        if isinstance(item, dict):
+            for name, children in item.items():
+                key = _normalize_term_name(name)
+                existing = merged.get(key)
+                child_items = children if isinstance(children, list) else [children]
+                child_map = existing[1] if existing and existing[1] is not None else OrderedDict()
+                merged[key] = (existing[0] if existing else name, _merge_glossary_items(child_items, child_map))
+        elif isinstance(item, list):
+            _merge_glossary_items(item, merged)
+        elif item is not None:
+            key = _normalize_term_name(item)
+            if key not in merged:
+                merged[key] = (str(item), None)
+    return merged
+
+def _render_glossary_items(merged: OrderedDict) -> list:
+    """Render a merged name map back into the glossary list format."""
+    rendered = []
+    for name, children in merged.values():
+        if children is None:
+            rendered.append(name)
+        else:
+            rendered.append({name: _render_glossary_items(children)})
+    return rendered
+
+def merge_glossaries(glossaries: list) -> dict:
+    """Deep-merge chunk glossaries into one hierarchy with deduplicated categories and terms.
+    
+    All chunk roots are folded under the first root name; categories and terms with the
+    same normalized name are merged recursively.
+    """
+    root_name = None
+    merged = OrderedDict()
+    for glossary in glossaries:
+        if not isinstance(glossary, dict):
+            continue
+        for name, children in glossary.items():
+            if root_name is None:
+                root_name = name
+            _merge_glossary_items(children if isinstance(children, list) else [children], merged)
+    if root_name is None:
+        return None
+    return {root_name: _render_glossary_items(merged)}
+
+def run_chunked_analysis(tables: dict, schema_name: str = None, api_config: dict = None,
+                         prompt_template_name: str = 'analyze', chunk_tokens: int = 6000,
+                         concurrency: int = 4, merge_strategy: str = 'deep', progress_callback=None,
+                         prompt_version: str = None, profiles: dict = None, cancel_check=None, call_gate=None):
+    """Map-reduce analysis: analyze FK-clustered table chunks concurrently, then merge.
+    
+    progress_callback, if given, is called with each chunk's progress record as it
+    completes. prompt_version selects the chunk prompt's template version. Column
+    profiles, if given, are appended to each chunk for the chunk's tables.
+    cancel_check is called before every AI call. call_gate, if given, is a context
+    manager factory taking a prompt's estimated tokens; every AI call (chunks and
+    merge) runs inside it, so a caller can throttle them (see run_multi_schema_analysis).
+    Returns (merged glossary or None, list of per-chunk progress records).
+    """
+    call_gate = call_gate or (lambda estimated_tokens: contextlib.nullcontext())
+    chunks = partition_tables(tables, chunk_tokens)
+    schema_prefix = f"Schema '{schema_name}': " if schema_name else "Database: "
+    logger.info(f"Map-reduce analysis: {count_tables(tables)} tables in {len(chunks)} chunks (concurrency {concurrency})")
+    
+    def analyze_chunk(index, chunk):
+        chunk_start = time.time()
+        chunk_lines = (
+            [f"{schema_prefix}{count_tables(tables)} tables (part {index + 1} of {len(chunks)}, {len(chunk)} tables)"] +
+            [format_table_summary(table_name, tables[table_name]) for table_name in chunk]
+        )
+        if profiles:
+            profile_section = format_column_profiles({name: profiles[name] for name in chunk if name in profiles})
+            if profile_section:
+                chunk_lines.append(profile_section)
+        chunk_summary = '\n'.join(chunk_lines)
+        if cancel_check:
+            cancel_check()
+        with call_gate(estimate_tokens(chunk_summary)):
+            result = make_api_call(chunk_summary, api_config, prompt_template_name, prompt_version=prompt_version)
+        return result, {
+            "chunk": index + 1,
+            "tables": len(chunk),
+            "estimated_tokens": estimate_tokens(chunk_summary),
+            "status": "completed" if result else "failed",
+            "duration": round(time.time() - chunk_start, 2)
+        }
+    
+    results = [None] * len(chunks)
+    progress = [None] * len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        # Run each chunk in a copy of the caller's context so metrics keep the request's route label
+        futures = {
+            executor.submit(contextvars.copy_context().run, run_profiled, analyze_chunk, index, chunk): index
+            for index, chunk in enumerate(chunks)
+        }
+        for completed, future in enumerate(as_completed(futures), start=1):
+            index = futures[future]
+            try:
+                results[index], progress[index] = future.result()
+            except AnalysisCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Chunk {index + 1} analysis error: {e}")
+                progress[index] = {"chunk": index + 1, "tables": len(chunks[index]), "status": "failed", "error": str(e)}
+            logger.info(f"Chunk {index + 1}/{len(chunks)} {progress[index]['status']} ({completed}/{len(chunks)} done)")
+            if progress_callback:
+                progress_callback(progress[index])
+    
+    chunk_glossaries = [result for result in results if result]
+    if not chunk_glossaries:
+        return None, progress
+    
+    merged = merge_glossaries(chunk_glossaries)
+    if merge_strategy == 'llm' and len(chunk_glossaries) > 1:
+        # Let the model consolidate synonyms across chunks; keep the deep merge if it fails
+        if cancel_check:
+            cancel_check()
+        merged_json = json.dumps(merged)
+        with call_gate(estimate_tokens(merged_json)):
+            consolidated = make_api_call(
+                '', api_config, 'merge',
+                prompt_variables={'glossaries': merged_json}
+            )
+        if consolidated:
+            merged = consolidated
+        else:
+            logger.warning("LLM merge failed, using deep-merged glossary")
+    return merged, progress
+
+@app.before_request
+def start_request_metrics():
+    """Label this request's metrics with its route template and start the latency timer."""
+    _metrics_route.set(request.url_rule.rule if request.url_rule else 'unmatched')
+    g.metrics_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record request latency by route, method and status."""
+    start = g.get('metrics_start')
+    if start is not None:
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - start, route=current_route(), method=request.method, status=str(response.status_code)
+        )
+    return response
+
+# Request header (or query parameter "profile") that asks for a request to be profiled,
+# and the header carrying the admin key that authorizes it
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ADMIN_KEY_HEADER = 'X-Admin-Key'
+
+PROFILE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+def profiling_requested(headers, args) -> bool:
+    """Whether a request asked to be profiled (header or query flag)."""
+    return PROFILE_HEADER in headers or 'profile' in args
+
+def profiling_authorized(supplied_key: str) -> bool:
+    """Check a supplied admin key against PROFILE_ADMIN_KEY (profiling is off when it is unset)."""
+    config = load_config() or {}
+    admin_key = config.get('profile_admin_key')
+    if not admin_key or not supplied_key:
+        return False
+    return hmac.compare_digest(supplied_key.encode(), admin_key.encode())
+
+def _profile_function_name(func: tuple) -> str:
+    """file:line(function) with the file shortened to its import path (e.g. flask/app.py)."""
+    filename, line, name = func
+    for prefix in sorted((path for path in sys.path if path), key=len, reverse=True):
+        if filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return pstats.func_std_string((filename, line, name))
+
+def summarize_profile(stats: pstats.Stats, top_n: int) -> list:
+    """Top functions of a profile by cumulative time."""
+    stats.sort_stats('cumulative')
+    top = []
+    for func in stats.fcn_list[:top_n]:
+        primitive_calls, calls, total_time, cumulative_time, _ = stats.stats[func]
+        top.append({
+            "function": _profile_function_name(func),
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "total_time": round(total_time, 6),
+            "cumulative_time": round(cumulative_time, 6)
+        })
+    return top
+
+def run_profiled(fn, *args, **kwargs):
+    """Call fn on a worker thread, adding its time to the profiled request it serves, if any.
+    
+    Thread pools submit through this (inside the copied request context), because a
+    cProfile profiler only sees the thread that enabled it before Python 3.12. From
+    3.12 one profiler covers every thread and a second cannot be enabled, so fn then
+    simply runs.
+    """
+    worker_profiles = _request_worker_profiles.get()
+    if worker_profiles is None:
+        return fn(*args, **kwargs)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return fn(*args, **kwargs)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profiler.disable()
+        with worker_profiles["lock"]:
+            worker_profiles["profilers"].append(profiler)
+
+def save_profile(profile_id: str, profiler: cProfile.Profile, details: dict, worker_profilers: list = None) -> dict:
+    """Store a request profile (.prof and JSON summary) and drop the oldest beyond the retention limit.
+    
+    worker_profilers (see run_profiled) are merged into the request thread's profile.
+    """
+    config = load_config() or {}
+    store_dir = config.get('profile_store_dir', 'data/profiles')
+    os.makedirs(store_dir, exist_ok=True)
+    
+    stats = pstats.Stats(profiler)
+    for worker_profiler in worker_profilers or []:
+        stats.add(worker_profiler)
+    stats.dump_stats(os.path.join(store_dir, f"{profile_id}.prof"))
+    summary = {
+        "profile_id": profile_id,
+        **details,
+        "worker_threads_profiled": len(worker_profilers or []),
+        "total_calls": stats.total_calls,
+        "top_functions": summarize_profile(stats, config.get('profile_top_n', 30)),
+        "created_at": datetime.utcnow().isoformat() + "Z"
+    }
+    with open(os.path.join(store_dir, f"{profile_id}.json"), 'w') as summary_file:
+        json.dump(summary, summary_file)
+    
+    summaries = sorted(
+        (entry for entry in os.scandir(store_dir) if entry.name.endswith('.json')),
+        key=lambda entry: entry.stat().st_mtime, reverse=True
+    )
+    for entry in summaries[config.get('profile_store_max_profiles', 20):]:
+        stale_id = entry.name[:-len('.json')]
+        for suffix in ('.json', '.prof'):
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(store_dir, stale_id + suffix))
+    return summary
+
+def finish_request_profile(profiler: cProfile.Profile, profile_id: str, details: dict, start: float,
+                           worker_profiles: dict = None):
+    """Stop a request's profiler and store its profile, with those of its worker threads."""
+    profiler.disable()
+    try:
+        worker_profilers = []
+        if worker_profiles is not None:
+            with worker_profiles["lock"]:
+                worker_profilers = list(worker_profiles["profilers"])
+        return save_profile(profile_id, profiler, {**details, "duration": round(time.perf_counter() - start, 4)},
+                            worker_profilers)
+    except Exception as e:
+        logger.error(f"Failed to store profile {profile_id}: {e}")
+        return None
+    finally:
+        _profile_lock.release()
+
+@app.before_request
+def start_request_profile():
+    """Run the request under cProfile when asked to by an admin (one profiled request at a time)."""
+    # Server threads are reused: never inherit the previous request's worker profiles
+    _request_worker_profiles.set(None)
+    if not profiling_requested(request.headers, request.args):
+        return None
+    if not profiling_authorized(request.headers.get(PROFILE_ADMIN_KEY_HEADER)):
+        return jsonify({
+            "success": False,
+            "error": "Profiling not authorized",
+            "details": f"Profiling requires PROFILE_ADMIN_KEY to be configured and sent in the {PROFILE_ADMIN_KEY_HEADER} header"
+        }), 403
+    if not _profile_lock.acquire(blocking=False):
+        return jsonify({
+            "success": False,
+            "error": "Profiler busy",
+            "details": "Another request is being profiled; retry shortly"
+        }), 409
+    g.profile_id = uuid.uuid4().hex
+    g.profile_start = time.perf_counter()
+    g.worker_profiles = {"profilers": [], "lock": threading.Lock()}
+    _request_worker_profiles.set(g.worker_profiles)
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+    logger.info(f"Profiling {request.method} {request.path} as {g.profile_id}")
+    return None
+
+@app.after_request
+def attach_request_profile(response):
+    """Finish a profiled request: store the profile and point the client at it.
+    
+    Streamed responses keep profiling until the body is fully sent; the summary is
+    then only available from /profiles/<id>. JSON responses embed the summary.
+    """
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profile_id, profile_start, worker_profiles = g.profile_id, g.profile_start, g.pop('worker_profiles', None)
+    response.headers['X-Profile-Id'] = profile_id
+    details = {
+        "method": request.method,
+        "path": request.path,
+        "route": current_route(),
+        "status_code": response.status_code
+    }
+    if response.is_streamed:
+        response.call_on_close(
+            lambda: finish_request_profile(profiler, profile_id, details, profile_start, worker_profiles)
+        )
+        return response
+    summary = finish_request_profile(profiler, profile_id, details, profile_start, worker_profiles)
+    if summary and response.is_json:
+        body = response.get_json(silent=True)
+        if isinstance(body, dict):
+            body["profile"] = summary
+            response.set_data(app.json.dumps(body))
+    return response
+
+class DependencyProbes:
+    """Runs dependency health probes on a background thread and caches their latest results.
+    
+    probes maps a name to (probe function, interval seconds, timeout seconds); the
+    function takes the timeout and returns None or a dict of extra details, raising
+    on failure. A probe still running past its timeout is reported as "timeout" and
+    not started again until it returns, so a hung dependency holds at most one
+    connection. Readers only ever see the cache.
+    """
+    
+    def __init__(self, probes: dict):
+        self.probes = probes
+        self.results = {name: {"status": "pending"} for name in probes}
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.executor = ThreadPoolExecutor(max_workers=max(1, len(probes)), thread_name_prefix='health-probe')
+        self.thread = threading.Thread(target=self._run, name='health-probes', daemon=True)
+        self.thread.start()
+    
+    def _run(self):
+        next_run = {name: 0.0 for name in self.probes}
+        while True:
+            now = time.monotonic()
+            for name, (probe, interval, timeout) in self.probes.items():
+                if now >= next_run[name]:
+                    next_run[name] = now + interval
+                    self._start(name, probe, timeout)
+            wake_times = list(next_run.values())
+            with self.lock:
+                for name, (future, started, timeout) in self.in_flight.items():
+                    deadline = started + timeout
+                    if now >= deadline and self.results[name].get("started") == started:
+                        self._record(name, started, "timeout", {"error": f"no response within {timeout}s"})
+                    elif now < deadline:
+                        wake_times.append(deadline)
+            time.sleep(min(max(min(wake_times) - time.monotonic(), 0.05), 1.0))
+    
+    def _start(self, name, probe, timeout):
+        with self.lock:
+            if name in self.in_flight:
+                return
+            started = time.monotonic()
+            future = self.executor.submit(probe, timeout)
+            self.in_flight[name] = (future, started, timeout)
+            self.results[name] = {**self.results[name], "started": started}
+        future.add_done_callback(lambda done: self._finish(name, started, done))
+    
+    def _finish(self, name, started, future):
+        try:
+            details = future.result() or {}
+            status = "ok"
+        except Exception as e:
+            details = {"error": str(e)[:200]}
+            status = "error"
+        with self.lock:
+            self.in_flight.pop(name, None)
+            self._record(name, started, status, details)
+    
+    def _record(self, name, started, status, details):
+        # Called with self.lock held
+        self.results[name] = {
+            "status": status,
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "checked_at": time.time(),
+            **details
+        }
+    
+    def snapshot(self) -> dict:
+        """Latest result per probe with its age; results older than three intervals are marked stale."""
+        now = time.time()
+        with self.lock:
+            results = {name: dict(result) for name, result in self.results.items()}
+        for name, result in results.items():
+            result.pop("started", None)
+            checked_at = result.pop("checked_at", None)
+            if checked_at is not None:
+                interval = self.probes[name][1]
+                result["checked_at"] = datetime.utcfromtimestamp(checked_at).isoformat() + "Z"
+                result["age_seconds"] = round(now - checked_at, 1)
+                result["stale"] = now - checked_at > 3 * interval
+        return results
+
+def probe_database(timeout: float):
+    """Health probe: check out a connection from the default engine and run SELECT 1."""
+    engine = get_database_engine()
+    if engine is None:
+        raise RuntimeError("database unavailable")
+    with engine.connect() as conn:
+        conn.execute(sqlalchemy.text("SELECT 1"))
+    return None
+
+def probe_llm(timeout: float):
+    """Health probe: the AI API endpoint answers HTTP (any status counts as reachable; no tokens are spent)."""
+    base_url = get_api_config().get('base_url')
+    if not base_url:
+        raise RuntimeError("API_BASE_URL not configured")
+    response = get_http_client().get(f'http://{base_url}/', timeout=timeout)
+    return {"http_status": response.status_code}
+
+def get_dependency_probes() -> DependencyProbes:
+    """Get the background dependency prober, starting it on first use (lazy loading).
+    
+    A probe with an interval of 0 is disabled.
+    """
+    global _dependency_probes
+    if _dependency_probes is not None:
+        return _dependency_probes
+    with _dependency_probes_lock:
+        if _dependency_probes is None:
+            config = load_config() or {}
+            probes = {
+                "database": (probe_database, config.get('health_probe_db_interval', 10.0),
+                             config.get('health_probe_db_timeout', 3.0)),
+                "llm": (probe_llm, config.get('health_probe_llm_interval', 30.0),
+                        config.get('health_probe_llm_timeout', 5.0)),
+            }
+            _dependency_probes = DependencyProbes({
+                name: probe for name, probe in probes.items() if probe[1] > 0
+            })
+            logger.info(f"Dependency health probes started: {', '.join(_dependency_probes.probes) or 'none'}")
+        return _dependency_probes
+
+# Startup warm-up modes (STARTUP_WARMUP)
+WARMUP_MODES = ('background', 'blocking', 'off')
+
+def warm_up():
+    """Import the deferred modules and open the database pool and HTTP client.
+    
+    Each step is timed and recorded in the warm-up state reported by /health/ready;
+    a failing step is logged and the remaining steps still run.
+    """
+    steps = (
+        ("imports", lambda: (sqlalchemy._load(), httpx._load())),
+        ("prompts", get_prompt_registry),
+        ("database", get_database_engine),
+        ("http_client", get_http_client),
+    )
+    with _warmup_lock:
+        _warmup_state.update(state="warming", started_at=time.time())
+    for name, step in steps:
+        step_start = time.perf_counter()
+        try:
+            error = None if step() is not None else "unavailable"
+        except Exception as e:
+            error = str(e)
+        if error:
+            logger.warning(f"Warm-up step '{name}' failed: {error}")
+        with _warmup_lock:
+            _warmup_state["steps"][name] = {
+                "status": "failed" if error else "ok",
+                "duration": round(time.perf_counter() - step_start, 3),
+                **({"error": error} if error else {})
+            }
+    with _warmup_lock:
+        _warmup_state.update(state="complete", finished_at=time.time())
+        elapsed = _warmup_state["finished_at"] - _warmup_state["started_at"]
+        results = ', '.join(f"{name} {step['status']}" for name, step in _warmup_state["steps"].items())
+    logger.info(f"Warm-up complete in {elapsed:.2f}s: {results}")
+
+def start_warmup(mode: str = None):
+    """Run the startup warm-up according to STARTUP_WARMUP (once per process).
+    
+    "background" returns immediately and warms on a daemon thread so the server can
+    bind and answer liveness probes right away; "blocking" warms before returning;
+    "off" leaves everything to the first request.
+    """
+    config = load_config() or {}
+    mode = mode or config.get('startup_warmup', 'background')
+    if mode not in WARMUP_MODES:
+        logger.warning(f"Unknown STARTUP_WARMUP '{mode}', using 'background'")
+        mode = 'background'
+    with _warmup_lock:
+        if _warmup_state["mode"] is not None:
+            return
+        _warmup_state["mode"] = mode
+        if mode == 'off':
+            _warmup_state["state"] = "skipped"
+            return
+    if mode == 'blocking':
+        warm_up()
+    else:
+        threading.Thread(target=warm_up, name="startup-warmup", daemon=True).start()
+    get_dependency_probes()
+
+def get_readiness() -> dict:
+    """Readiness: warm-up finished (or skipped), the default database engine is connected and the HTTP pool exists."""
+    with _warmup_lock:
+        state = {**_warmup_state, "steps": dict(_warmup_state["steps"])}
+    config = load_config() or {}
+    database_ready = _db_engine is not None or not config.get('database_url')
+    pools_ready = database_ready and _http_client is not None
+    ready = state["state"] == "skipped" or (state["state"] == "complete" and pools_ready)
+    return {
+        "ready": ready,
+        "warmup": state["state"],
+        "mode": state["mode"],
+        "pid": os.getpid(),
+        "database_engine": "connected" if _db_engine is not None else "not_connected",
+        "http_client": "created" if _http_client is not None else "not_created",
+        "steps": state["steps"]
+    }
+
+def reset_after_fork():
+    """Drop process-local state inherited from a forking parent (e.g. gunicorn --preload).
+    
+    Pooled database connections and HTTP sockets must not be shared between processes,
+    and threads (warm-up, health probes, job workers) do not survive a fork, so the child
+    forgets them and recreates everything lazily; the server hook then calls start_warmup().
+    Registered with os.register_at_fork, so it runs in every forked child.
+    """
+    global _db_engine, _http_client, _async_http_client, _async_http_client_loop
+    global _job_executor, _job_owner, _job_lease_thread, _stream_executor, _dependency_probes, _warmup_state
+    if _db_engine is not None:
+        # close=False: leave the parent's connections open for the parent
+        _db_engine.dispose(close=False)
+        _db_engine = None
+    for entry in _engine_registry.values():
+        entry["engine"].dispose(close=False)
+    _engine_registry.clear()
+    _http_client = None
+    _async_http_client = None
+    _async_http_client_loop = None
+    _job_executor = None
+    _job_owner = None
+    _job_lease_thread = None
+    _stream_executor = None
+    _job_futures.clear()
+    _job_cancel_events.clear()
+    _http_stats.update(requests=0, in_flight=0, errors=0)
+    _dependency_probes = None
+    _schema_snapshot_key_locks.clear()
+    _warmup_state = {"state": "pending", "mode": None, "steps": {}, "started_at": None, "finished_at": None}
+
+os.register_at_fork(after_in_child=reset_after_fork)
+
+@app.route('/health')
+def health():
+    """Health check endpoint with cached database and AI API probe results"""
+    health_status = {
+        "status": "healthy",
+        "message": "Service is running",
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "checks": {
+            "service": "ok"
+        }
+    }
+    
+    # Dependency checks come from the background probes' cache; this request never touches them
+    probes = get_dependency_probes().snapshot()
+    for name, result in probes.items():
+        if result["status"] in ("ok", "pending"):
+            health_status["checks"][name] = result["status"]
+        else:
+            health_status["checks"][name] = f"{result['status']}: {result.get('error', '')[:100]}"
+            health_status["status"] = "degraded"
+        if result.get("stale"):
+            health_status["checks"][name] += " (stale)"
+            health_status["status"] = "degraded"
+    health_status["probes"] = probes
+    
+    # Upstream AI API circuit breakers (an open breaker means calls are failing fast)
+    circuits = {upstream: stats["state"] for upstream, stats in get_retry_stats()["circuit_breakers"].items()}
+    open_circuits = [upstream for upstream, state in circuits.items() if state == "open"]
+    health_status["checks"]["upstream"] = f"circuit open: {', '.join(open_circuits)}" if open_circuits else "ok"
+    health_status["circuit_breakers"] = circuits
+    if open_circuits:
+        health_status["status"] = "degraded"
+    
+    health_status["readiness"] = get_readiness()
+    return jsonify(health_status)
+
+@app.route('/health/live')
+def liveness():
+    """Liveness probe: the process is serving requests (no dependency checks)"""
+    return jsonify({
+        "status": "alive",
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    })
+
+@app.route('/health/ready')
+@app.route('/readyz')
+def readiness():
+    """Readiness probe: 200 once the warm-up has finished and the database and HTTP pools are up, else 503"""
+    # Servers that did not start the warm-up (e.g. an embedding WSGI host) start it on the first probe
+    start_warmup()
+    readiness_status = get_readiness()
+    readiness_status["timestamp"] = datetime.utcnow().isoformat() + "Z"
+    return jsonify(readiness_status), 200 if readiness_status["ready"] else 503
+
+@app.route('/metrics/http')
+def http_pool_metrics():
+    """Connection pool statistics for the upstream API client"""
+    return jsonify({
+        "http_pool": get_http_pool_stats(),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    })
+
+@app.route('/metrics/retries')
+def retry_metrics():
+    """Upstream retry counters, retry budget and circuit breaker states"""
+    return jsonify({
+        **get_retry_stats(),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request, stage, retry, cache, token and error metrics in Prometheus text format"""
+    return Response(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/metrics/engines')
+def engine_registry_metrics():
+    """Live request-supplied database engines and their pool checkouts"""
+    engines = get_engine_registry_stats()
+    return jsonify({
+        "engines": engines,
+        "count": len(engines),
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    })
+
+@app.route('/profiles/<profile_id>')
+def get_profile(profile_id):
+    """Stored request profile: JSON summary, or the raw cProfile file with ?format=prof"""
+    if not profiling_authorized(request.headers.get(PROFILE_ADMIN_KEY_HEADER)):
+        return jsonify({
+            "success": False,
+            "error": "Profiling not authorized",
+            "details": f"Send PROFILE_ADMIN_KEY in the {PROFILE_ADMIN_KEY_HEADER} header"
+        }), 403
+    config = load_config() or {}
+    store_dir = config.get('profile_store_dir', 'data/profiles')
+    summary_path = os.path.join(store_dir, f"{profile_id}.json")
+    if not PROFILE_ID_PATTERN.match(profile_id) or not os.path.exists(summary_path):
+        return jsonify({
+            "success": False,
+            "error": "Profile not found",
+            "details": f"No stored profile with id {profile_id}"
+        }), 404
+    
+    if request.args.get('format') == 'prof':
+        with open(os.path.join(store_dir, f"{profile_id}.prof"), 'rb') as profile_file:
+            return Response(
+                profile_file.read(),
+                content_type='application/octet-stream',
+                headers={'Content-Disposition': f'attachment; filename="{profile_id}.prof"'}
+            )
+    with open(summary_path) as summary_file:
+        return jsonify(json.load(summary_file))
+
+@app.route('/')
+def home():
+    """Basic home endpoint with configuration info"""
+    config = load_config()
+    
+    return jsonify({
+        "service": "Database Schema Glossary Generator",
+        "status": "running",
+        "version": "v2.1-unified-config-static",
+        "endpoints": [
+            "/health - Health check from cached database and AI API probes",
+            "/health/live - Liveness probe (no dependency checks)",
+            "/health/ready - Readiness probe: 503 until the startup warm-up has finished",
+            "/readyz - Alias of /health/ready",
+            "/config - Complete configuration with sources (env vars vs defaults)",
+            "/analyze - POST: Generate AI-powered business glossary from database schema",
+            "/jobs/analyze - POST: Queue a background analysis and return a job id",
+            "/jobs/<id> - GET: Job status and result, DELETE: Cancel job",
+            "/generate - POST: Transform glossary data to PDC-compatible CSV format",
+            "/generate/delta - POST: Emit only added, changed and removed rows against a previous export",
+            "/database/tables - Tables in the configured schema: prefix/pattern filters, cursor pagination, ETag",
+            "/database/schema - Full metadata for many tables in one request (?tables=a,b or a filtered page), ETag",
+            "/database/schema/<table> - Columns, keys and indexes of one table (from the schema snapshot)",
+            "/metrics - Prometheus metrics: latency histograms per route and stage, retries, cache, tokens, errors",
+            "/metrics/http - Upstream API connection pool statistics",
+            "/metrics/engines - Request-supplied database engines and pool checkouts",
+            "/metrics/retries - Upstream retry counters, retry budget and circuit breaker states",
+            "/profiles/<id> - Stored request profile summary (admin key required; ?format=prof for the cProfile file)",
+            "/docs - API documentation"
+        ],
+        "database_configured": bool(config and config.get('database_url')),
+        "api_configured": bool(config and config.get('api_base_url') and config.get('api_key'))
+    })
+
+@app.route('/config')
+def show_config():
+    """Show complete configuration with sources and security masking"""
+    config = load_config()
+    
+    if not config:
+        return jsonify({
+            "error": "Configuration not loaded",
+            "message": "Please check your environment variables or .env file",
+            "required_env_vars": ["DATABASE_URL", "API_BASE_URL", "API_KEY"],
+            "help": "Copy .env.example to .env and fill in your values"
+        }), 500
+    
+    # Track which values come from environment vs defaults
     config_with_sources = {}
     
     # Check each config value against environment variables
@@ -670,6 +4957,64 @@ def show_config():
         'api_temperature': 'API_TEMPERATURE',
         'api_timeout': 'API_TIMEOUT',
         'api_max_retries': 'API_MAX_RETRIES',
+        'api_stream': 'API_STREAM',
+        'prompts_path': 'PROMPTS_PATH',
+        'prompts_reload_interval': 'PROMPTS_RELOAD_INTERVAL',
+        'retry_base_delay': 'RETRY_BASE_DELAY',
+        'retry_max_delay': 'RETRY_MAX_DELAY',
+        'retry_max_retry_after': 'RETRY_MAX_RETRY_AFTER',
+        'retry_budget_ratio': 'RETRY_BUDGET_RATIO',
+        'retry_budget_min_per_second': 'RETRY_BUDGET_MIN_PER_SECOND',
+        'circuit_failure_threshold': 'CIRCUIT_FAILURE_THRESHOLD',
+        'circuit_reset_timeout': 'CIRCUIT_RESET_TIMEOUT',
+        'api_connect_timeout': 'API_CONNECT_TIMEOUT',
+        'http_max_connections': 'HTTP_MAX_CONNECTIONS',
+        'http_max_keepalive_connections': 'HTTP_MAX_KEEPALIVE_CONNECTIONS',
+        'http_keepalive_expiry': 'HTTP_KEEPALIVE_EXPIRY',
+        'http2_enabled': 'HTTP2_ENABLED',
+        'asgi_wsgi_workers': 'ASGI_WSGI_WORKERS',
+        'engine_registry_max_engines': 'ENGINE_REGISTRY_MAX_ENGINES',
+        'engine_idle_timeout': 'ENGINE_IDLE_TIMEOUT',
+        'engine_pool_size': 'ENGINE_POOL_SIZE',
+        'engine_max_overflow': 'ENGINE_MAX_OVERFLOW',
+        'chunk_max_concurrency': 'CHUNK_MAX_CONCURRENCY',
+        'chunk_min_tokens': 'CHUNK_MIN_TOKENS',
+        'id_strategy': 'ID_STRATEGY',
+        'export_store_path': 'EXPORT_STORE_PATH',
+        'export_store_max_exports': 'EXPORT_STORE_MAX_EXPORTS',
+        'multi_schema_llm_concurrency': 'MULTI_SCHEMA_LLM_CONCURRENCY',
+        'multi_schema_max_llm_concurrency': 'MULTI_SCHEMA_MAX_LLM_CONCURRENCY',
+        'llm_tokens_per_minute': 'LLM_TOKENS_PER_MINUTE',
+        'job_workers': 'JOB_WORKERS',
+        'job_queue_max': 'JOB_QUEUE_MAX',
+        'job_store_path': 'JOB_STORE_PATH',
+        'job_lease_seconds': 'JOB_LEASE_SECONDS',
+        'stream_workers': 'STREAM_WORKERS',
+        'startup_warmup': 'STARTUP_WARMUP',
+        'health_probe_db_interval': 'HEALTH_PROBE_DB_INTERVAL',
+        'health_probe_db_timeout': 'HEALTH_PROBE_DB_TIMEOUT',
+        'health_probe_llm_interval': 'HEALTH_PROBE_LLM_INTERVAL',
+        'health_probe_llm_timeout': 'HEALTH_PROBE_LLM_TIMEOUT',
+        'profile_admin_key': 'PROFILE_ADMIN_KEY',
+        'profile_store_dir': 'PROFILE_STORE_DIR',
+        'profile_store_max_profiles': 'PROFILE_STORE_MAX_PROFILES',
+        'profile_top_n': 'PROFILE_TOP_N',
+        'analysis_cache_enabled': 'ANALYSIS_CACHE_ENABLED',
+        'analysis_cache_path': 'ANALYSIS_CACHE_PATH',
+        'analysis_cache_ttl': 'ANALYSIS_CACHE_TTL',
+        'analysis_cache_max_bytes': 'ANALYSIS_CACHE_MAX_BYTES',
+        'summary_token_budget': 'SUMMARY_TOKEN_BUDGET',
+        'summary_strategies': 'SUMMARY_STRATEGIES',
+        'schema_snapshot_enabled': 'SCHEMA_SNAPSHOT_ENABLED',
+        'schema_snapshot_path': 'SCHEMA_SNAPSHOT_PATH',
+        'schema_snapshot_check_interval': 'SCHEMA_SNAPSHOT_CHECK_INTERVAL',
+        'schema_cluster_min_members': 'SCHEMA_CLUSTER_MIN_MEMBERS',
+        'column_profiling_enabled': 'COLUMN_PROFILING_ENABLED',
+        'column_profiling_sample_rows': 'COLUMN_PROFILING_SAMPLE_ROWS',
+        'column_profiling_max_tables': 'COLUMN_PROFILING_MAX_TABLES',
+        'column_profiling_concurrency': 'COLUMN_PROFILING_CONCURRENCY',
+        'column_profiling_statement_timeout': 'COLUMN_PROFILING_STATEMENT_TIMEOUT',
+        'column_profiling_cache_ttl': 'COLUMN_PROFILING_CACHE_TTL',
         'port': 'PORT'
     }
     
@@ -688,6 +5033,9 @@ def show_config():
         # Apply security masking
         if value is None or value == '':
             masked_value = "NOT_SET"
+        elif key == 'profile_admin_key':
+            # Authorizes profiling on this unauthenticated endpoint's server: reveal nothing of it
+            masked_value = "***"
         elif 'password' in key.lower() or 'key' in key.lower():
             if len(str(value)) > 8:
                 masked_value = str(value)[:4] + "***" + str(value)[-4:]
@@ -736,7 +5084,24 @@ def show_config():
             "optional_env_vars": [
                 "DATABASE_SCHEMA", "API_DEPLOYMENT_ID", "API_VERSION",
                 "API_MAX_TOKENS", "API_TEMPERATURE", "API_TIMEOUT", 
-                "API_MAX_RETRIES", "PORT"
+                "API_MAX_RETRIES", "API_STREAM", "PROMPTS_PATH", "PROMPTS_RELOAD_INTERVAL",
+                "RETRY_BASE_DELAY", "RETRY_MAX_DELAY",
+                "RETRY_MAX_RETRY_AFTER", "RETRY_BUDGET_RATIO", "RETRY_BUDGET_MIN_PER_SECOND",
+                "CIRCUIT_FAILURE_THRESHOLD", "CIRCUIT_RESET_TIMEOUT", "API_CONNECT_TIMEOUT", "HTTP_MAX_CONNECTIONS",
+                "HTTP_MAX_KEEPALIVE_CONNECTIONS", "HTTP_KEEPALIVE_EXPIRY", "HTTP2_ENABLED", "ASGI_WSGI_WORKERS",
+                "ENGINE_REGISTRY_MAX_ENGINES", "ENGINE_IDLE_TIMEOUT", "ENGINE_POOL_SIZE",
+                "ENGINE_MAX_OVERFLOW", "CHUNK_MAX_CONCURRENCY", "CHUNK_MIN_TOKENS", "ID_STRATEGY", "EXPORT_STORE_PATH",
+                "EXPORT_STORE_MAX_EXPORTS", "MULTI_SCHEMA_LLM_CONCURRENCY", "MULTI_SCHEMA_MAX_LLM_CONCURRENCY",
+                "LLM_TOKENS_PER_MINUTE", "JOB_WORKERS", "JOB_QUEUE_MAX", "JOB_STORE_PATH", "JOB_LEASE_SECONDS",
+                "STREAM_WORKERS",
+                "STARTUP_WARMUP", "HEALTH_PROBE_DB_INTERVAL", "HEALTH_PROBE_DB_TIMEOUT",
+                "HEALTH_PROBE_LLM_INTERVAL", "HEALTH_PROBE_LLM_TIMEOUT", "PROFILE_ADMIN_KEY", "PROFILE_STORE_DIR", "PROFILE_STORE_MAX_PROFILES", "PROFILE_TOP_N",
+                "ANALYSIS_CACHE_ENABLED", "ANALYSIS_CACHE_PATH",
+                "ANALYSIS_CACHE_TTL", "ANALYSIS_CACHE_MAX_BYTES", "SUMMARY_TOKEN_BUDGET", "SUMMARY_STRATEGIES",
+                "SCHEMA_SNAPSHOT_ENABLED",
+                "SCHEMA_SNAPSHOT_PATH", "SCHEMA_SNAPSHOT_CHECK_INTERVAL", "SCHEMA_CLUSTER_MIN_MEMBERS",
+                "COLUMN_PROFILING_ENABLED", "COLUMN_PROFILING_SAMPLE_ROWS", "COLUMN_PROFILING_MAX_TABLES",
+                "COLUMN_PROFILING_CONCURRENCY", "COLUMN_PROFILING_STATEMENT_TIMEOUT", "COLUMN_PROFILING_CACHE_TTL", "PORT"
             ],
             "local_development": "Copy .env.example to .env and edit with your values",
             "production": "Set environment variables in your deployment platform"
@@ -748,26 +5113,20 @@ def show_config():
 def get_prompt_templates():
     """Get available prompt templates"""
     try:
-        prompts = load_prompts()
-        if not prompts:
+        registry = get_prompt_registry()
+        templates = registry.catalog()
+        if not templates:
             return jsonify({
                 "error": "Failed to load prompt templates",
-                "details": "prompts.json file not found or invalid"
+                "details": registry.last_error or "prompts.json file not found or invalid"
             }), 500
         
-        # Format for API response
-        templates = {}
-        for key, value in prompts.items():
-            templates[key] = {
-                "name": value["name"],
-                "description": value["description"]
-            }
-        
         return jsonify({
             "prompt_templates": templates,
             "available_routes": list(templates.keys()),
-            "usage": "Each route automatically uses its corresponding prompt template",
-            "count": len(templates)
+            "usage": "Each route automatically uses its corresponding prompt template; pin an /analyze version with prompt_version",
+            "count": len(templates),
+            "registry": registry.snapshot()
         })
     except Exception as e:
         logger.error(f"Error getting prompt templates: {e}")
@@ -776,6 +5135,60 @@ def get_prompt_templates():
             "details": str(e)
         }), 500
 
+def prepare_generate_export(request_data: dict, accept_encoding: str = '') -> dict:
+    """Validate a /generate request and set up its lazily generated CSV rows.
+    
+    Shared by the Flask and ASGI /generate handlers. accept_encoding is the request's
+    Accept-Encoding header; streamed exports are gzip-compressed when it allows gzip
+    (unless the body sets "gzip": false). Returns a dict with the row iterator and
+    response headers, or a dict with a "result" (body, status code) tuple when the
+    request is invalid.
+    """
+    if not request_data:
+        return {"result": ({
+            "success": False,
+            "error": "Request body is required",
+            "details": "Provide JSON data to transform"
+        }, 400)}
+    
+    # Extract the input data (should be the output from /analyze)
+    input_data = request_data.get('data')
+    if not input_data:
+        return {"result": ({
+            "success": False,
+            "error": "Missing 'data' field",
+            "details": "Provide the glossary data to transform in the 'data' field"
+        }, 400)}
+    
+    # Node ID strategy (random by default, stable UUIDv5 for diff-friendly re-exports)
+    config = load_config() or {}
+    id_strategy = request_data.get('id_strategy', config.get('id_strategy', 'random'))
+    if id_strategy not in ID_STRATEGIES:
+        return {"result": ({
+            "success": False,
+            "error": "Invalid ID strategy",
+            "details": f"id_strategy must be one of: {', '.join(ID_STRATEGIES)}"
+        }, 400)}
+    id_factory = make_id_factory(id_strategy, request_data.get('id_namespace'))
+    
+    logger.info(f"Starting direct glossary data transformation to CSV (id_strategy={id_strategy})...")
+    
+    headers = {'Content-Disposition': 'attachment; filename="glossary_export.csv"'}
+    
+    rows = iter_glossary_rows(input_data, id_factory)
+    if request_data.get('store', False):
+        # Keep the export so a later /generate/delta can diff against it by id
+        export_id = create_export()
+        rows = record_export_rows(rows, export_id)
+        headers['X-Export-Id'] = export_id
+    
+    return {
+        "rows": rows,
+        "headers": headers,
+        "stream": bool(request_data.get('stream', False)),
+        "gzip": request_data.get('gzip', True) is not False and accepts_gzip(accept_encoding)
+    }
+
 @app.route('/generate', methods=['POST'])
 def generate_output():
     """Transform glossary data directly into CSV format (no AI)."""
@@ -783,38 +5196,42 @@ def generate_output():
         start_time = time.time()
         
         # Get input data from request body
-        request_data = request.get_json()
-        if not request_data:
-            return jsonify({
-                "success": False,
-                "error": "Request body is required",
-                "details": "Provide JSON data to transform"
-            }), 400
-        
-        # Extract the input data (should be the output from /analyze)
-        input_data = request_data.get('data')
-        if not input_data:
-            return jsonify({
-                "success": False,
-                "error": "Missing 'data' field",
-                "details": "Provide the glossary data to transform in the 'data' field"
-            }), 400
+        export = prepare_generate_export(request.get_json(), request.headers.get('Accept-Encoding', ''))
+        if "result" in export:
+            response_body, status_code = export["result"]
+            return jsonify(response_body), status_code
+        headers = export["headers"]
         
-        logger.info("Starting direct glossary data transformation to CSV...")
+        if export["stream"]:
+            # Stream CSV chunks while walking the hierarchy instead of building the whole export
+            chunks = write_csv_chunks(export["rows"])
+            headers['Vary'] = 'Accept-Encoding'
+            if export["gzip"]:
+                chunks = gzip_stream(chunks)
+                headers['Content-Encoding'] = 'gzip'
+            
+            def log_completion(chunks):
+                yield from chunks
+                logger.info(f"Streaming transformation completed successfully in {round(time.time() - start_time, 2)}s")
+            
+            return Response(
+                stream_with_context(log_completion(chunks)),
+                content_type='text/csv',
+                headers=headers
+            )
         
         # Transform data directly to CSV format
-        csv_content = transform_to_csv(input_data)
+        csv_content = ''.join(write_csv_chunks(export["rows"]))
         
         processing_time = round(time.time() - start_time, 2)
         
         logger.info(f"Direct transformation completed successfully in {processing_time}s")
         
         # Return CSV content with proper headers
-        from flask import Response
         return Response(
             csv_content,
             content_type='text/csv',
-            headers={'Content-Disposition': 'attachment; filename="glossary_export.csv"'}
+            headers=headers
         )
             
     except json.JSONDecodeError:
@@ -826,15 +5243,194 @@ def generate_output():
         }), 400
     except Exception as e:
         logger.error(f"Error in generate endpoint: {e}")
+        ERRORS.inc(route=current_route(), type=f"generate_{type(e).__name__}")
+        return jsonify({
+            "success": False,
+            "error": "Internal server error",
+            "details": str(e)
+        }), 500
+
+@app.route('/generate/delta', methods=['POST'])
+def generate_delta():
+    """Emit only the rows that changed between a previous export and a new glossary hierarchy."""
+    try:
+        start_time = time.time()
+        
+        request_data = request.get_json()
+        if not request_data:
+            return jsonify({
+                "success": False,
+                "error": "Request body is required",
+                "details": "Provide JSON data to transform"
+            }), 400
+        
+        input_data = request_data.get('data')
+        if not input_data:
+            return jsonify({
+                "success": False,
+                "error": "Missing 'data' field",
+                "details": "Provide the new glossary data in the 'data' field"
+            }), 400
+        
+        # Previous export: inline CSV or a stored export id
+        previous_csv = request_data.get('previous_csv')
+        previous_export_id = request_data.get('previous_export_id')
+        if previous_csv:
+            try:
+                previous_index = parse_export_csv(previous_csv)
+            except ValueError as e:
+                return jsonify({
+                    "success": False,
+                    "error": "Invalid previous export",
+                    "details": str(e)
+                }), 400
+        elif previous_export_id:
+            previous_index = load_export_index(previous_export_id)
+            if previous_index is None:
+                return jsonify({
+                    "success": False,
+                    "error": "Previous export not found",
+                    "details": f"No complete stored export with id '{previous_export_id}'"
+                }), 404
+        else:
+            return jsonify({
+                "success": False,
+                "error": "Missing previous export",
+                "details": "Provide the previous export as 'previous_csv' or 'previous_export_id'"
+            }), 400
+        
+        # IDs for nodes that are new in this export
+        config = load_config() or {}
+        id_strategy = request_data.get('id_strategy', config.get('id_strategy', 'random'))
+        if id_strategy not in ID_STRATEGIES:
+            return jsonify({
+                "success": False,
+                "error": "Invalid ID strategy",
+                "details": f"id_strategy must be one of: {', '.join(ID_STRATEGIES)}"
+            }), 400
+        id_factory = make_id_factory(id_strategy, request_data.get('id_namespace'))
+        
+        logger.info(f"Starting delta export against {len(previous_index)} previous rows...")
+        
+        # Optionally store the new full export so the next delta can chain from it
+        export_id = None
+        record = finish = None
+        if request_data.get('store', False):
+            export_id = create_export()
+            record, finish = open_export_recorder(export_id)
+        
+        summary = {}
+        delta_chunks = write_csv_chunks(
+            iter_delta_rows(input_data, previous_index, id_factory, summary, on_row=record),
+            headers=DELTA_CSV_HEADERS
+        )
+        
+        def stream_delta_response():
+            # The CSV is streamed into the JSON string chunk by chunk; summary and
+            # metadata are only known once it is complete, so they follow it
+            yield '{"success": true, "delta_csv": "'
+            for chunk in delta_chunks:
+                yield json.dumps(chunk)[1:-1]
+            if finish:
+                finish()
+            processing_time = round(time.time() - start_time, 2)
+            logger.info(f"Delta export completed in {processing_time}s: {summary}")
+            yield '", ' + json.dumps({
+                "summary": summary,
+                "metadata": {
+                    "previous_rows": len(previous_index),
+                    "export_id": export_id,
+                    "id_strategy": id_strategy,
+                    "processing_time": processing_time
+                }
+            })[1:]
+        
+        return Response(stream_with_context(stream_delta_response()), content_type='application/json')
+    
+    except Exception as e:
+        logger.error(f"Error in generate delta endpoint: {e}")
         return jsonify({
             "success": False,
             "error": "Internal server error",
             "details": str(e)
         }), 500
 
+# Page sizes for /database/tables and the batch /database/schema endpoint
+TABLE_PAGE_DEFAULT_LIMIT = 100
+TABLE_PAGE_MAX_LIMIT = 1000
+TABLE_PATTERN_MAX_LENGTH = 200
+
+def encode_table_cursor(table_name: str) -> str:
+    """Opaque pagination cursor pointing just after a table name."""
+    return base64.urlsafe_b64encode(json.dumps({"after": table_name}).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_table_cursor(cursor: str) -> str:
+    """Table name a cursor points after; raises ValueError for a malformed cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))["after"]
+    except Exception:
+        raise ValueError("cursor is not a valid pagination cursor")
+    if not isinstance(after, str):
+        raise ValueError("cursor is not a valid pagination cursor")
+    return after
+
+def select_table_page(table_names, args) -> dict:
+    """Filter table names by prefix and glob, then take one keyset-paginated page in name order.
+    
+    args holds the query parameters prefix, pattern (a case-sensitive glob matched
+    against the whole name), cursor and limit. Raises ValueError for invalid parameters.
+    """
+    try:
+        limit = int(args.get('limit', TABLE_PAGE_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= TABLE_PAGE_MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {TABLE_PAGE_MAX_LIMIT}")
+    
+    names = sorted(table_names)
+    prefix = args.get('prefix')
+    if prefix:
+        start = bisect.bisect_left(names, prefix)
+        end = start
+        while end < len(names) and names[end].startswith(prefix):
+            end += 1
+        names = names[start:end]
+    pattern = args.get('pattern')
+    if pattern:
+        if len(pattern) > TABLE_PATTERN_MAX_LENGTH:
+            raise ValueError(f"pattern must be at most {TABLE_PATTERN_MAX_LENGTH} characters")
+        # A glob, not a regex: fnmatch's translation cannot backtrack catastrophically on these unauthenticated routes
+        names = [name for name in names if fnmatch.fnmatchcase(name, pattern)]
+    
+    start = bisect.bisect_right(names, decode_table_cursor(args['cursor'])) if args.get('cursor') else 0
+    page = names[start:start + limit]
+    return {
+        "tables": page,
+        "total": len(names),
+        "next_cursor": encode_table_cursor(page[-1]) if start + limit < len(names) else None
+    }
+
+def schema_etag(snapshot: dict, *request_parts) -> str:
+    """ETag for a response derived from a schema snapshot; changes whenever the snapshot is reflected again."""
+    fingerprint = json.dumps(
+        [snapshot.get("key"), snapshot["fingerprint"], snapshot["reflected_at"], request_parts], default=str
+    )
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()[:32]
+
+def conditional_json(etag: str, build_body):
+    """JSON response with a weak ETag; answers 304 without building the body when If-None-Match matches."""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build_body())
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/database/tables')
 def list_tables():
-    """List all tables in the configured database schema"""
+    """List tables in the configured database schema, filtered and paginated (from the schema snapshot)"""
     try:
         engine = get_database_engine()
         if not engine:
@@ -842,35 +5438,114 @@ def list_tables():
         
         config = load_config()
         schema_name = config.get('database_schema') if config else None
+        refresh = request.args.get('refresh', '').lower() in ('true', '1', 'yes')
         
-        with engine.connect() as conn:
-            inspector = inspect(engine)
-            
-            if schema_name:
-                tables = inspector.get_table_names(schema=schema_name)
-                return jsonify({
-                    "schema": schema_name,
-                    "tables": sorted(tables),
-                    "count": len(tables)
-                })
-            else:
-                tables = inspector.get_table_names()
-                return jsonify({
-                    "schema": "default",
-                    "tables": sorted(tables),
-                    "count": len(tables)
-                })
+        snapshot = get_schema_snapshot(engine, schema_name, refresh)
+        try:
+            page = select_table_page(all_table_names(snapshot["tables"]), request.args)
+        except ValueError as e:
+            return jsonify({"error": "Invalid query parameters", "details": str(e)}), 400
+        
+        etag = schema_etag(snapshot, 'tables', sorted(request.args.items(multi=True)))
+        return conditional_json(etag, lambda: {
+            "schema": schema_name or "default",
+            "tables": page["tables"],
+            "count": len(page["tables"]),
+            "total": page["total"],
+            "next_cursor": page["next_cursor"],
+            "snapshot": schema_snapshot_info(snapshot)
+        })
                 
     except Exception as e:
-        logger.error(f"Error listing tables: {e}")
+        logger.error(f"Error listing tables: {e}")
+        return jsonify({
+            "error": "Failed to list tables",
+            "details": str(e)
+        }), 500
+
+@app.route('/database/schema')
+def get_table_schemas():
+    """Full metadata for many tables in one request: named tables, or a filtered page of the schema"""
+    try:
+        engine = get_database_engine()
+        if not engine:
+            return jsonify({"error": "Database connection not available"}), 503
+        
+        config = load_config()
+        schema_name = config.get('database_schema') if config else None
+        refresh = request.args.get('refresh', '').lower() in ('true', '1', 'yes')
+        requested = [
+            name.strip() for value in request.args.getlist('tables') for name in value.split(',') if name.strip()
+        ]
+        requested = list(dict.fromkeys(requested))
+        if len(requested) > TABLE_PAGE_MAX_LIMIT:
+            return jsonify({
+                "error": "Invalid query parameters",
+                "details": f"at most {TABLE_PAGE_MAX_LIMIT} tables per request"
+            }), 400
+        
+        snapshot = get_schema_snapshot(engine, schema_name, refresh)
+        tables = snapshot["tables"]
+        page = None
+        if not requested:
+            try:
+                page = select_table_page(all_table_names(tables), request.args)
+            except ValueError as e:
+                return jsonify({"error": "Invalid query parameters", "details": str(e)}), 400
+            requested = page["tables"]
+        
+        def build_body():
+            details = {}
+            missing = []
+            unreflected = [name for name in requested if name not in tables]
+            representatives = table_representatives(tables)
+            members = [name for name in unreflected if name in representatives]
+            reflected = {}
+            inspector = None
+            with contextlib.ExitStack() as stack:
+                if unreflected:
+                    conn = stack.enter_context(engine.connect())
+                    # Cluster members left out of the snapshot: one bulk pass for the whole page
+                    if members:
+                        reflected = _reflect_tables(conn, engine.dialect.name, schema_name, members)
+                    inspector = sqlalchemy.inspect(conn)
+                for name in requested:
+                    if name in tables:
+                        table_info = tables[name]
+                    elif name in reflected:
+                        table_info = reflected[name]
+                    else:
+                        # Other tables outside the snapshot (views) are inspected one by one
+                        try:
+                            table_info = _reflect_table(inspector, name, schema_name)
+                        except sqlalchemy.exc.NoSuchTableError:
+                            missing.append(name)
+                            continue
+                    details[name] = {**table_details(table_info), "column_count": len(table_info["columns"])}
+            body = {
+                "schema": schema_name or "default",
+                "tables": details,
+                "count": len(details),
+                "missing": missing
+            }
+            if page is not None:
+                body.update(total=page["total"], next_cursor=page["next_cursor"])
+            body["snapshot"] = schema_snapshot_info(snapshot)
+            return body
+        
+        etag = schema_etag(snapshot, 'schema', requested)
+        return conditional_json(etag, build_body)
+    
+    except Exception as e:
+        logger.error(f"Error getting table schemas: {e}")
         return jsonify({
-            "error": "Failed to list tables",
+            "error": "Failed to get table schemas",
             "details": str(e)
         }), 500
 
 @app.route('/database/schema/<table_name>')
 def get_table_schema(table_name):
-    """Get schema information for a specific table"""
+    """Get schema information for a specific table (from the schema snapshot)"""
     try:
         engine = get_database_engine()
         if not engine:
@@ -878,62 +5553,23 @@ def get_table_schema(table_name):
         
         config = load_config()
         schema_name = config.get('database_schema') if config else None
+        refresh = request.args.get('refresh', '').lower() in ('true', '1', 'yes')
         
-        with engine.connect() as conn:
-            inspector = inspect(engine)
-            
-            # Get columns with proper serialization
-            columns = inspector.get_columns(table_name, schema=schema_name)
-            serialized_columns = []
-            
-            for col in columns:
-                col_info = {
-                    "name": col["name"],
-                    "type": str(col["type"]),
-                    "nullable": col.get("nullable", True),
-                    "default": str(col["default"]) if col.get("default") is not None else None,
-                    "comment": col.get("comment")
-                }
-                serialized_columns.append(col_info)
-            
-            # Get primary keys
-            pk_constraint = inspector.get_pk_constraint(table_name, schema=schema_name)
-            
-            # Get foreign keys with proper serialization
-            foreign_keys = inspector.get_foreign_keys(table_name, schema=schema_name)
-            serialized_fks = []
-            
-            for fk in foreign_keys:
-                fk_info = {
-                    "name": fk.get("name"),
-                    "constrained_columns": fk.get("constrained_columns", []),
-                    "referred_table": fk.get("referred_table"),
-                    "referred_columns": fk.get("referred_columns", []),
-                    "referred_schema": fk.get("referred_schema")
-                }
-                serialized_fks.append(fk_info)
-            
-            # Get indexes with proper serialization
-            indexes = inspector.get_indexes(table_name, schema=schema_name)
-            serialized_indexes = []
-            
-            for idx in indexes:
-                idx_info = {
-                    "name": idx.get("name"),
-                    "column_names": idx.get("column_names", []),
-                    "unique": idx.get("unique", False)
-                }
-                serialized_indexes.append(idx_info)
-            
+        try:
+            details, snapshot = get_table_details(engine, table_name, schema_name, refresh)
+        except sqlalchemy.exc.NoSuchTableError:
             return jsonify({
-                "table_name": table_name,
-                "schema": schema_name or "default",
-                "columns": serialized_columns,
-                "primary_keys": pk_constraint.get('constrained_columns', []),
-                "foreign_keys": serialized_fks,
-                "indexes": serialized_indexes,
-                "column_count": len(serialized_columns)
-            })
+                "error": f"Table '{table_name}' not found",
+                "details": f"No table named '{table_name}' in schema '{schema_name or 'default'}'"
+            }), 404
+        
+        return conditional_json(schema_etag(snapshot, 'schema', [table_name]), lambda: {
+            "table_name": table_name,
+            "schema": schema_name or "default",
+            **details,
+            "column_count": len(details["columns"]),
+            "snapshot": schema_snapshot_info(snapshot)
+        })
             
     except Exception as e:
         logger.error(f"Error getting table schema for {table_name}: {e}")
@@ -942,124 +5578,1101 @@ def get_table_schema(table_name):
             "details": str(e)
         }), 500
 
-@app.route('/analyze', methods=['POST'])
-def analyze_schema():
-    """Main endpoint to analyze database schema and generate AI-powered business glossary."""
-    try:
-        start_time = time.time()
+class TokenRateLimiter:
+    """Token bucket limiting estimated LLM tokens per minute across threads."""
+    
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self.available = float(tokens_per_minute)
+        self.refill_per_second = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self, tokens: int, cancel_check=None) -> float:
+        """Block until tokens are available and take them; returns the time spent waiting.
         
-        # Get configuration from request body (optional)
-        request_data = request.get_json() or {}
+        cancel_check, if given, is called at least once a second while waiting and may
+        raise AnalysisCancelled to give up.
+        """
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            if cancel_check:
+                cancel_check()
+            with self.lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.refill_per_second)
+                self.updated = now
+                if self.available >= tokens:
+                    self.available -= tokens
+                    return waited
+                delay = min((tokens - self.available) / self.refill_per_second, 1.0)
+            time.sleep(delay)
+            waited += delay
+
+def resolve_multi_schema_options(multi_schema: dict = None) -> dict:
+    """Fan-out settings from a request's "multi_schema" object over the configured defaults.
+    
+    llm_concurrency is capped at MULTI_SCHEMA_MAX_LLM_CONCURRENCY, and a request can
+    only tighten a configured LLM_TOKENS_PER_MINUTE budget, not raise or disable it.
+    reflection_workers stays None unless given; the caller caps it at the engine's
+    pool size. Raises ValueError for a malformed object or non-positive values.
+    """
+    config = load_config() or {}
+    multi_schema = multi_schema or {}
+    if not isinstance(multi_schema, dict):
+        raise ValueError("multi_schema must be an object with optional reflection_workers, llm_concurrency "
+                         "and tokens_per_minute")
+    options = {
+        "reflection_workers": multi_schema.get('reflection_workers'),
+        "llm_concurrency": int(multi_schema.get('llm_concurrency', config.get('multi_schema_llm_concurrency', 2))),
+        "tokens_per_minute": int(multi_schema.get('tokens_per_minute', config.get('llm_tokens_per_minute', 0)))
+    }
+    if options["reflection_workers"] is not None:
+        options["reflection_workers"] = int(options["reflection_workers"])
+        if options["reflection_workers"] < 1:
+            raise ValueError("multi_schema.reflection_workers must be a positive integer")
+    if options["llm_concurrency"] < 1:
+        raise ValueError("multi_schema.llm_concurrency must be a positive integer")
+    if options["tokens_per_minute"] < 0:
+        raise ValueError("multi_schema.tokens_per_minute must be 0 (no limit) or a positive number of tokens")
+    options["llm_concurrency"] = min(options["llm_concurrency"], config.get('multi_schema_max_llm_concurrency', 8))
+    configured_tpm = config.get('llm_tokens_per_minute', 0)
+    if configured_tpm > 0:
+        options["tokens_per_minute"] = min(options["tokens_per_minute"] or configured_tpm, configured_tpm)
+    return options
+
+def combine_schema_glossaries(glossaries: dict) -> tuple:
+    """Combine per-schema glossaries into one document keyed by schema name.
+    
+    Each schema becomes a top-level glossary holding its own categories and terms
+    (its roots, normally one, deep-merged as merge_glossaries does), so every term
+    keeps the schema it came from. Returns (combined glossary, dict of schema name ->
+    the root name the AI gave that schema's glossary).
+    """
+    combined = OrderedDict()
+    roots = {}
+    for schema_name, glossary in glossaries.items():
+        merged = merge_glossaries([glossary])
+        if merged is None:
+            continue
+        (root_name, items), = merged.items()
+        combined[schema_name] = items
+        roots[schema_name] = root_name
+    return dict(combined), roots
+
+def resolve_schema_names(engine, schemas=None, schema_pattern: str = None) -> list:
+    """Resolve an explicit schema list and/or a glob pattern against the database's schemas."""
+    resolved = list(schemas or [])
+    if schema_pattern:
+        with engine.connect() as conn:
+            available = sqlalchemy.inspect(conn).get_schema_names()
+        resolved.extend(name for name in sorted(available) if fnmatch.fnmatchcase(name, schema_pattern))
+    # Keep first occurrence order, drop duplicates
+    return list(dict.fromkeys(resolved))
+
+def run_multi_schema_analysis(engine, request_data: dict, chunk_options: dict, start_time: float,
+                              database_source: str, prompt: PromptTemplate, progress_callback=None,
+                              cancel_check=None, summary_options: dict = None, profiling_options: dict = None,
+                              multi_options: dict = None):
+    """Analyze several schemas concurrently and combine their glossaries, keyed by schema.
+    
+    Schemas are reflected (and column-profiled when profiling_options enable it) in
+    parallel on a thread pool sized to the engine's connection pool; LLM calls run on a
+    separate, smaller pool. Every AI call, including each chunk and merge call of a
+    chunked schema, takes one of llm_concurrency call slots and its own share of the
+    tokens-per-minute budget (multi_options from resolve_multi_schema_options).
+    A failing schema is reported in the metadata without affecting the others.
+    Every schema is analyzed with the same prompt template version.
+    Returns a tuple of (response body dict, HTTP status code).
+    """
+    config = load_config() or {}
+    multi_options = multi_options or resolve_multi_schema_options()
+    schema_names = resolve_schema_names(engine, request_data.get('schemas'), request_data.get('schema_pattern'))
+    if not schema_names:
+        return {
+            "success": False,
+            "error": "No schemas matched",
+            "details": "The 'schemas' list is empty or 'schema_pattern' matched no schemas"
+        }, 400
+    
+    pool_size = getattr(engine.pool, 'size', None)
+    max_reflection_workers = pool_size() if callable(pool_size) else 4
+    reflection_workers = max(1, min(multi_options["reflection_workers"] or max_reflection_workers,
+                                    max_reflection_workers, len(schema_names)))
+    llm_concurrency = min(multi_options["llm_concurrency"], len(schema_names))
+    tokens_per_minute = multi_options["tokens_per_minute"]
+    rate_limiter = TokenRateLimiter(tokens_per_minute) if tokens_per_minute > 0 else None
+    # In-flight AI calls across all schemas and their chunks
+    llm_slots = threading.BoundedSemaphore(llm_concurrency)
+    llm_wait_lock = threading.Lock()
+    
+    api_config = request_data.get('api', {}) or {}
+    merged_api_config = get_api_config(api_config)
+    prompt_template_name = prompt.key
+    cache_enabled = bool(config.get('analysis_cache_enabled'))
+    refresh_cache = bool(request_data.get('refresh_cache', False))
+    refresh_schema = bool(request_data.get('refresh_schema', False))
+    
+    logger.info(f"Multi-schema analysis of {len(schema_names)} schemas "
+                f"(reflection workers {reflection_workers}, LLM concurrency {llm_concurrency}, "
+                f"TPM limit {tokens_per_minute or 'none'})")
+    
+    schema_results = {name: {"status": "pending"} for name in schema_names}
+    schema_profiles = {}
+    glossaries = {}
+    
+    def llm_call_gate(result):
+        @contextlib.contextmanager
+        def gate(estimated_tokens):
+            if rate_limiter:
+                waited = rate_limiter.acquire(estimated_tokens + merged_api_config.get('max_tokens', 8192), cancel_check)
+                with llm_wait_lock:
+                    result["rate_limit_wait"] = round(result.get("rate_limit_wait", 0) + waited, 2)
+            with llm_slots:
+                yield
+        return gate
+    
+    def analyze_schema_summary(schema_name, tables, schema_summary):
+        if cancel_check:
+            cancel_check()
+        result = schema_results[schema_name]
+        cache_key = analysis_cache_key(schema_summary, prompt.text, merged_api_config, chunk_options, prompt.version)
+        glossary = None
+        if cache_enabled and not refresh_cache:
+            glossary = analysis_cache_get(cache_key)
+        result["cache"] = "disabled" if not cache_enabled else ("refresh" if refresh_cache else ("hit" if glossary else "miss"))
+        ANALYSIS_CACHE_LOOKUPS.inc(route=current_route(), result=result["cache"])
         
-        logger.info("Starting database schema analysis for glossary generation...")
+        if glossary is None:
+            gate = llm_call_gate(result)
+            llm_start = time.time()
+            if chunk_options:
+                glossary, result["chunks"] = run_chunked_analysis(
+                    tables, schema_name, api_config or None, prompt_template_name,
+                    prompt_version=prompt.version, profiles=schema_profiles.get(schema_name),
+                    cancel_check=cancel_check, call_gate=gate,
+                    **{**chunk_options, "concurrency": min(chunk_options["concurrency"], llm_concurrency)}
+                )
+            else:
+                with gate(estimate_tokens(schema_summary)):
+                    glossary = make_api_call(
+                        schema_summary, api_config or None, prompt_template_name, prompt_version=prompt.version
+                    )
+            result["llm_time"] = round(time.time() - llm_start, 2)
+            if glossary and cache_enabled:
+                analysis_cache_put(cache_key, glossary)
+        return glossary
+    
+    with ThreadPoolExecutor(max_workers=reflection_workers, thread_name_prefix='schema-reflect') as reflect_pool, \
+            ThreadPoolExecutor(max_workers=llm_concurrency, thread_name_prefix='schema-llm') as llm_pool:
         
-        # Check if database configuration is provided in request
-        request_db_config = request_data.get('database', {})
-        if request_db_config:
-            # Use database config from request
-            db_url = request_db_config.get('url')
-            schema_name = request_db_config.get('schema')
-            
-            if not db_url:
-                return jsonify({
-                    "success": False,
-                    "error": "Database URL is required when providing database configuration",
-                    "details": "Include 'url' in the database configuration object"
-                }), 400
-            
-            # Create engine with request database config
-            try:
-                logger.info(f"Using database configuration from request")
-                engine = create_engine(
-                    db_url,
-                    pool_timeout=10,
-                    pool_recycle=3600,
-                    pool_pre_ping=True,
-                    connect_args={"connect_timeout": 10}
+        def reflect(schema_name):
+            if cancel_check:
+                cancel_check()
+            reflect_start = time.time()
+            snapshot = get_schema_snapshot(engine, schema_name, refresh_schema)
+            tables = snapshot["tables"]
+            schema_results[schema_name]["reflection_time"] = round(time.time() - reflect_start, 2)
+            schema_results[schema_name]["schema_snapshot"] = snapshot["status"]
+            schema_results[schema_name]["tables_analyzed"] = count_tables(tables)
+            schema_results[schema_name]["tables_reflected"] = len(tables)
+            if profiling_options and profiling_options["enabled"]:
+                if cancel_check:
+                    cancel_check()
+                schema_profiles[schema_name], schema_results[schema_name]["profiling"] = profile_columns(
+                    engine, tables, schema_name, profiling_options
                 )
-                
-                # Test the connection
-                with engine.connect() as conn:
-                    conn.execute(text("SELECT 1"))
-                logger.info("Database connection from request config established successfully")
-                
-            except Exception as e:
-                logger.error(f"Database connection failed with request config: {e}")
-                return jsonify({
-                    "success": False,
-                    "error": "Database connection failed",
-                    "details": f"Could not connect to database with provided configuration: {str(e)}"
-                }), 503
-        else:
-            # Use default database engine
-            engine = get_database_engine()
-            if not engine:
-                return jsonify({
-                    "success": False,
-                    "error": "Database connection not available",
-                    "details": "Could not establish database connection. Check your DATABASE_URL configuration or provide database config in request."
-                }), 503
-            
-            # Get schema name from default config
-            config = load_config()
-            schema_name = config.get('database_schema') if config else None
+            summary_stats = {}
+            schema_summary = create_schema_summary(engine, schema_name, tables, summary_options, summary_stats,
+                                                   schema_profiles.get(schema_name))
+            if summary_stats and not chunk_options:
+                schema_results[schema_name]["summary_tokens"] = summary_stats["summary_tokens"]
+                schema_results[schema_name]["compression_ratio"] = summary_stats["compression_ratio"]
+            return tables, schema_summary
         
-        # Create schema summary for API call
-        schema_summary = create_schema_summary(engine, schema_name)
-        logger.info("Schema summary created for AI analysis")
+        reflect_futures = {
+            reflect_pool.submit(contextvars.copy_context().run, run_profiled, reflect, name): name for name in schema_names
+        }
+        llm_futures = {}
+        for future in as_completed(reflect_futures):
+            schema_name = reflect_futures[future]
+            try:
+                tables, schema_summary = future.result()
+            except AnalysisCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Reflection failed for schema '{schema_name}': {e}")
+                schema_results[schema_name].update({"status": "failed", "error": f"Reflection failed: {e}"})
+                continue
+            llm_futures[llm_pool.submit(
+                contextvars.copy_context().run, run_profiled, analyze_schema_summary, schema_name, tables, schema_summary
+            )] = schema_name
         
-        # Extract API configuration from request or use defaults
-        api_config = request_data.get('api', {}) if request_data else {}
+        for future in as_completed(llm_futures):
+            schema_name = llm_futures[future]
+            try:
+                glossary = future.result()
+            except AnalysisCancelled:
+                raise
+            except Exception as e:
+                logger.error(f"Analysis failed for schema '{schema_name}': {e}")
+                glossary = None
+                schema_results[schema_name]["error"] = str(e)
+            if glossary:
+                glossaries[schema_name] = glossary
+                schema_results[schema_name]["status"] = "completed"
+            else:
+                schema_results[schema_name]["status"] = "failed"
+                schema_results[schema_name].setdefault("error", "AI analysis failed after all retry attempts")
+            logger.info(f"Schema '{schema_name}' {schema_results[schema_name]['status']}")
+            if progress_callback:
+                progress_callback({"schema": schema_name, **schema_results[schema_name]})
+    
+    processing_time = round(time.time() - start_time, 2)
+    failed_schemas = [name for name in schema_names if schema_results[name]["status"] != "completed"]
+    metadata = {
+        "tables_analyzed": sum(result.get("tables_analyzed", 0) for result in schema_results.values()),
+        "schema_names": schema_names,
+        "processing_time": processing_time,
+        "ai_model_used": api_config.get('model', 'model-router'),
+        "database_source": database_source,
+        "prompt_template": prompt_template_name,
+        "prompt_version": prompt.version,
+        "mode": "multi_schema",
+        "schemas": schema_results,
+        "failed_schemas": failed_schemas
+    }
+    
+    if not glossaries:
+        return {
+            "success": False,
+            "error": "AI analysis failed for every schema",
+            "details": "No schema produced a glossary. See metadata.schemas for per-schema errors.",
+            "metadata": metadata
+        }, 500
+    
+    # One glossary per schema, in request order, so terms keep their schema
+    combined, metadata["glossary_roots"] = combine_schema_glossaries(
+        OrderedDict((name, glossaries[name]) for name in schema_names if name in glossaries)
+    )
+    return {
+        "success": True,
+        "data": combined,
+        "metadata": metadata
+    }, 200
+
+def prepare_analysis(request_data: dict, progress_callback=None, cancel_check=None) -> dict:
+    """Resolve the database, reflect the schema and look up the analysis cache.
+    
+    First stage of run_analysis and run_analysis_async. Returns a dict describing the
+    analysis; if it has a "result" key the analysis is already finished (validation
+    error or multi-schema run) and that (body, status code) tuple should be returned.
+    """
+    start_time = time.time()
+    
+    logger.info("Starting database schema analysis for glossary generation...")
+    
+    # Check if database configuration is provided in request
+    request_db_config = request_data.get('database', {})
+    if request_db_config:
+        # Use database config from request
+        db_url = request_db_config.get('url')
+        schema_name = request_db_config.get('schema')
         
-        # Use route-based prompt template (analyze endpoint uses "analyze" prompt)
-        prompt_template_name = 'analyze'
+        if not db_url:
+            return {"result": ({
+                "success": False,
+                "error": "Database URL is required when providing database configuration",
+                "details": "Include 'url' in the database configuration object"
+            }, 400)}
         
-        # Make API call with schema summary
-        api_response = make_api_call(schema_summary, api_config if api_config else None, prompt_template_name)
+        # Get a pooled engine for the request database config from the registry
+        try:
+            logger.info(f"Using database configuration from request")
+            engine = get_registered_engine(db_url)
+            logger.info("Database connection from request config established successfully")
+            
+        except Exception as e:
+            logger.error(f"Database connection failed with request config: {e}")
+            return {"result": ({
+                "success": False,
+                "error": "Database connection failed",
+                "details": f"Could not connect to database with provided configuration: {str(e)}"
+            }, 503)}
+    else:
+        # Use default database engine
+        engine = get_database_engine()
+        if not engine:
+            return {"result": ({
+                "success": False,
+                "error": "Database connection not available",
+                "details": "Could not establish database connection. Check your DATABASE_URL configuration or provide database config in request."
+            }, 503)}
         
-        processing_time = round(time.time() - start_time, 2)
+        # Get schema name from default config
+        config = load_config()
+        schema_name = config.get('database_schema') if config else None
+    
+    # Map-reduce mode for schemas too large for a single prompt
+    try:
+        chunk_options = resolve_chunk_options(request_data.get('chunking'))
+    except (TypeError, ValueError) as e:
+        return {"result": ({
+            "success": False,
+            "error": "Invalid chunking options",
+            "details": str(e)
+        }, 400)}
+    chunking_enabled = chunk_options is not None
+    
+    # Schema summary compression and token budget
+    try:
+        summary_options = resolve_summary_options(request_data.get('summary'))
+    except (TypeError, ValueError) as e:
+        return {"result": ({
+            "success": False,
+            "error": "Invalid summary options",
+            "details": str(e)
+        }, 400)}
+    
+    # Optional sampled column profiling folded into the prompt
+    try:
+        profiling_options = resolve_profiling_options(request_data.get('profiling'))
+    except (TypeError, ValueError) as e:
+        return {"result": ({
+            "success": False,
+            "error": "Invalid profiling options",
+            "details": str(e)
+        }, 400)}
+    
+    # Use route-based prompt template (analyze endpoint uses "analyze" prompt), optionally pinned to a version
+    prompt_template_name = 'analyze'
+    prompt = get_prompt_template(prompt_template_name, request_data.get('prompt_version'))
+    if prompt is None:
+        available = get_prompt_registry().catalog().get(prompt_template_name, {}).get('versions', [])
+        return {"result": ({
+            "success": False,
+            "error": "Unknown prompt version",
+            "details": f"prompt_version must be one of: {', '.join(available) or 'none (no analyze template loaded)'}"
+        }, 400)}
+    
+    # Multi-schema mode: fan out over a list of schemas or a glob pattern
+    if request_data.get('schemas') or request_data.get('schema_pattern'):
+        try:
+            multi_options = resolve_multi_schema_options(request_data.get('multi_schema'))
+        except (TypeError, ValueError) as e:
+            return {"result": ({
+                "success": False,
+                "error": "Invalid multi-schema options",
+                "details": str(e)
+            }, 400)}
+        return {"result": run_multi_schema_analysis(
+            engine, request_data, chunk_options, start_time,
+            "request_override" if request_db_config else "environment_config",
+            prompt, progress_callback, cancel_check, summary_options, profiling_options, multi_options
+        )}
+    
+    # Create schema summary for API call
+    if cancel_check:
+        cancel_check()
+    if progress_callback:
+        progress_callback({"stage": "reflecting"})
+    snapshot = get_schema_snapshot(engine, schema_name, bool(request_data.get('refresh_schema', False)))
+    tables = snapshot["tables"]
+    profiles, profiling_stats = None, None
+    if profiling_options["enabled"]:
+        if cancel_check:
+            cancel_check()
+        if progress_callback:
+            progress_callback({"stage": "profiling"})
+        profiles, profiling_stats = profile_columns(engine, tables, schema_name, profiling_options)
+    summary_stats = {}
+    schema_summary = create_schema_summary(engine, schema_name, tables, summary_options, summary_stats, profiles)
+    logger.info("Schema summary created for AI analysis")
+    
+    # Extract API configuration from request or use defaults
+    api_config = request_data.get('api', {}) if request_data else {}
+    
+    # Look up a cached glossary for this exact schema, prompt version and model configuration
+    cache_key = analysis_cache_key(schema_summary, prompt.text, get_api_config(api_config), chunk_options, prompt.version)
+    refresh_cache = bool(request_data.get('refresh_cache', False))
+    
+    config = load_config()
+    api_response = None
+    if not config or not config.get('analysis_cache_enabled'):
+        cache_status = "disabled"
+    elif refresh_cache:
+        cache_status = "refresh"
+    else:
+        api_response = analysis_cache_get(cache_key)
+        cache_status = "hit" if api_response is not None else "miss"
+    ANALYSIS_CACHE_LOOKUPS.inc(route=current_route(), result=cache_status)
+    
+    return {
+        "start_time": start_time,
+        "engine": engine,
+        "schema_name": schema_name,
+        "request_db_config": request_db_config,
+        "chunking_enabled": chunking_enabled,
+        "chunk_options": chunk_options,
+        "tables": tables,
+        "schema_snapshot": snapshot["status"],
+        "table_clusters": table_clusters_info(tables),
+        "profiles": profiles,
+        "profiling": profiling_stats,
+        "schema_summary": schema_summary,
+        "summary_stats": summary_stats or None,
+        "api_config": api_config,
+        "prompt_template_name": prompt_template_name,
+        "prompt_version": prompt.version,
+        "cache_key": cache_key,
+        "cache_status": cache_status,
+        "api_response": api_response,
+        "chunk_progress": None
+    }
+
+def finish_analysis(analysis: dict):
+    """Cache a fresh glossary and build the /analyze response for a prepared analysis.
+    
+    Final stage of run_analysis and run_analysis_async. Returns a tuple of
+    (response body dict, HTTP status code).
+    """
+    api_response = analysis["api_response"]
+    cache_key = analysis["cache_key"]
+    if analysis["cache_status"] == "hit":
+        logger.info(f"Analysis cache hit for key {cache_key[:12]}")
+    elif api_response and not analysis["schema_summary"].startswith("Error:"):
+        analysis_cache_put(cache_key, api_response)
+    
+    schema_name = analysis["schema_name"]
+    api_config = analysis["api_config"]
+    processing_time = round(time.time() - analysis["start_time"], 2)
+    table_count = count_tables(analysis["tables"])
+    
+    mode = "map_reduce" if analysis["chunking_enabled"] else "single"
+    if api_response:
+        logger.info("AI-powered glossary generation completed successfully")
+        return {
+            "success": True,
+            "data": api_response,
+            "metadata": {
+                "tables_analyzed": table_count,
+                "schema_name": schema_name or "default",
+                "processing_time": processing_time,
+                "ai_model_used": api_config.get('model', 'model-router') if api_config else 'model-router',
+                "database_source": "request_override" if analysis["request_db_config"] else "environment_config",
+                "prompt_template": analysis["prompt_template_name"],
+                "prompt_version": analysis["prompt_version"],
+                "cache": analysis["cache_status"],
+                "cache_key": cache_key,
+                "schema_snapshot": analysis["schema_snapshot"],
+                "table_clusters": analysis["table_clusters"],
+                "profiling": analysis["profiling"],
+                "summary": analysis["summary_stats"] if mode == "single" else None,
+                "mode": mode,
+                "chunks": analysis["chunk_progress"]
+            }
+        }, 200
+    else:
+        return {
+            "success": False,
+            "error": "AI analysis failed after all retry attempts",
+            "details": "The AI service could not generate a valid glossary. Check your API configuration and try again.",
+            "metadata": {
+                "tables_analyzed": table_count,
+                "schema_name": schema_name or "default",
+                "processing_time": processing_time,
+                "prompt_template": analysis["prompt_template_name"],
+                "prompt_version": analysis["prompt_version"],
+                "mode": mode,
+                "chunks": analysis["chunk_progress"]
+            }
+        }, 500
+
+def run_analysis(request_data: dict, progress_callback=None, cancel_check=None, node_callback=None):
+    """Analyze a database schema and generate an AI-powered business glossary.
+    
+    Shared by POST /analyze and the background job workers. request_data is the
+    /analyze request body. cancel_check, if given, is called between stages and
+    should raise AnalysisCancelled to stop the analysis. node_callback, if given,
+    streams the completion and receives partial glossary nodes (single-prompt mode).
+    Returns a tuple of (response body dict, HTTP status code).
+    """
+    try:
+        analysis = prepare_analysis(request_data, progress_callback, cancel_check)
+        if "result" in analysis:
+            return analysis["result"]
         
-        # Get table count for metadata
-        with engine.connect() as conn:
-            inspector = inspect(engine)
-            if schema_name:
-                tables = inspector.get_table_names(schema=schema_name)
+        if analysis["api_response"] is None:
+            if cancel_check:
+                cancel_check()
+            if progress_callback:
+                progress_callback({"stage": "analyzing"})
+            api_config = analysis["api_config"] or None
+            if analysis["chunking_enabled"]:
+                # Analyze table chunks concurrently and merge the chunk glossaries
+                analysis["api_response"], analysis["chunk_progress"] = run_chunked_analysis(
+                    analysis["tables"], analysis["schema_name"], api_config, analysis["prompt_template_name"],
+                    progress_callback=progress_callback, prompt_version=analysis["prompt_version"],
+                    profiles=analysis["profiles"], cancel_check=cancel_check, **analysis["chunk_options"]
+                )
             else:
-                tables = inspector.get_table_names()
-            table_count = len(tables)
+                # Make API call with schema summary
+                analysis["api_response"] = make_api_call(
+                    analysis["schema_summary"], api_config, analysis["prompt_template_name"],
+                    on_node=node_callback, prompt_version=analysis["prompt_version"]
+                )
         
-        if api_response:
-            logger.info("AI-powered glossary generation completed successfully")
-            return jsonify({
-                "success": True,
-                "data": api_response,
-                "metadata": {
-                    "tables_analyzed": table_count,
-                    "schema_name": schema_name or "default",
-                    "processing_time": processing_time,
-                    "ai_model_used": api_config.get('model', 'model-router') if api_config else 'model-router',
-                    "database_source": "request_override" if request_db_config else "environment_config"
-                }
-            })
-        else:
-            return jsonify({
-                "success": False,
-                "error": "AI analysis failed after all retry attempts",
-                "details": "The AI service could not generate a valid glossary. Check your API configuration and try again.",
-                "metadata": {
-                    "tables_analyzed": table_count,
-                    "schema_name": schema_name or "default",
-                    "processing_time": processing_time
-                }
-            }), 500
+        return finish_analysis(analysis)
             
+    except AnalysisCancelled:
+        raise
     except Exception as e:
         logger.error(f"Error in analyze_schema: {e}")
-        return jsonify({
+        ERRORS.inc(route=current_route(), type=f"analysis_{type(e).__name__}")
+        return {
             "success": False,
             "error": "Internal server error during analysis",
             "details": str(e)
-        }), 500
+        }, 500
+
+async def run_analysis_async(request_data: dict, progress_callback=None, node_callback=None, cancel_check=None):
+    """Async counterpart of run_analysis used by the ASGI entry point.
+    
+    Reflection, cache access and map-reduce runs stay on worker threads, but the
+    single-prompt AI call is awaited on the async HTTP client so a slow completion
+    does not hold a thread. cancel_check works as in run_analysis; cancelling the
+    awaiting task also abandons the AI call.
+    """
+    try:
+        analysis = await asyncio.to_thread(prepare_analysis, request_data, progress_callback, cancel_check)
+        if "result" in analysis:
+            return analysis["result"]
+        
+        if analysis["api_response"] is None:
+            if cancel_check:
+                cancel_check()
+            if progress_callback:
+                progress_callback({"stage": "analyzing"})
+            api_config = analysis["api_config"] or None
+            if analysis["chunking_enabled"]:
+                analysis["api_response"], analysis["chunk_progress"] = await asyncio.to_thread(
+                    run_chunked_analysis, analysis["tables"], analysis["schema_name"], api_config,
+                    analysis["prompt_template_name"], progress_callback=progress_callback,
+                    prompt_version=analysis["prompt_version"], profiles=analysis["profiles"],
+                    cancel_check=cancel_check, **analysis["chunk_options"]
+                )
+            else:
+                analysis["api_response"] = await make_api_call_async(
+                    analysis["schema_summary"], api_config, analysis["prompt_template_name"],
+                    on_node=node_callback, prompt_version=analysis["prompt_version"]
+                )
+        
+        return await asyncio.to_thread(finish_analysis, analysis)
+    
+    except AnalysisCancelled:
+        raise
+    except Exception as e:
+        logger.error(f"Error in analyze_schema: {e}")
+        ERRORS.inc(route=current_route(), type=f"analysis_{type(e).__name__}")
+        return {
+            "success": False,
+            "error": "Internal server error during analysis",
+            "details": str(e)
+        }, 500
+
+# Seconds between server-sent event keep-alive comments while an analysis is running
+SSE_KEEPALIVE_INTERVAL = 15
+
+def format_sse(event: str, data) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def get_stream_executor() -> ThreadPoolExecutor:
+    """Get the worker pool running streamed (SSE) analyses, at most STREAM_WORKERS at once."""
+    global _stream_executor
+    if _stream_executor is not None:
+        return _stream_executor
+    
+    with _stream_executor_lock:
+        if _stream_executor is None:
+            config = load_config() or {}
+            _stream_executor = ThreadPoolExecutor(
+                max_workers=config.get('stream_workers', 16),
+                thread_name_prefix='analysis-sse'
+            )
+        return _stream_executor
+
+def analysis_event_stream(request_data: dict):
+    """Run an analysis on the stream worker pool and yield its progress as server-sent events.
+    
+    Emits "progress" events for stages and chunks, "node" events for partial
+    glossary nodes as the completion streams in, and a final "result" event with
+    the /analyze response body and its status code. Closing the generator (the
+    client went away) cancels the analysis: a queued one never starts, a running
+    one stops at its next stage boundary or streamed node.
+    """
+    events = queue.Queue()
+    cancelled = threading.Event()
+    
+    def cancel_check():
+        if cancelled.is_set():
+            raise AnalysisCancelled("stream closed")
+    
+    def on_progress(progress):
+        if not cancelled.is_set():
+            events.put(("progress", progress))
+    
+    def on_node(node):
+        # Raising here abandons the streamed completion, which cuts the generation short
+        cancel_check()
+        events.put(("node", node))
+    
+    def run():
+        try:
+            response_body, status_code = run_analysis(
+                request_data, progress_callback=on_progress, cancel_check=cancel_check, node_callback=on_node
+            )
+        except AnalysisCancelled:
+            logger.info("Streamed analysis cancelled: the client disconnected")
+            return
+        except Exception as e:
+            logger.error(f"Error in streamed analysis: {e}")
+            response_body, status_code = {
+                "success": False,
+                "error": "Internal server error during analysis",
+                "details": str(e)
+            }, 500
+        events.put(("result", {**response_body, "status_code": status_code}))
+    
+    future = get_stream_executor().submit(contextvars.copy_context().run, run_profiled, run)
+    try:
+        while True:
+            try:
+                event, data = events.get(timeout=SSE_KEEPALIVE_INTERVAL)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event, data)
+            if event == "result":
+                return
+    finally:
+        # GeneratorExit on client disconnect lands here too
+        cancelled.set()
+        future.cancel()
+
+@app.route('/analyze', methods=['POST'])
+def analyze_schema():
+    """Main endpoint to analyze database schema and generate AI-powered business glossary."""
+    # Get configuration from request body (optional)
+    request_data = request.get_json() or {}
+    if request_data.get('stream', False):
+        # Server-sent events with partial glossary nodes as the AI response streams in
+        return Response(
+            analysis_event_stream(request_data),
+            content_type='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+    response_body, status_code = run_analysis(request_data)
+    return jsonify(response_body), status_code
+
+class AnalysisCancelled(Exception):
+    """Raised inside a background analysis when its job has been cancelled."""
+
+# Job states whose owner must keep renewing its lease
+ACTIVE_JOB_STATUSES = ('queued', 'running', 'cancelling')
+
+def _get_job_store_connection():
+    """Open the job store database, creating (or upgrading) it on first use."""
+    global _job_store_initialized
+    config = load_config() or {}
+    store_path = config.get('job_store_path', 'data/jobs.db')
+    if not _job_store_initialized:
+        store_dir = os.path.dirname(store_path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+    
+    conn = sqlite3.connect(store_path, timeout=5)
+    if not _job_store_initialized:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, job_type TEXT NOT NULL, status TEXT NOT NULL, "
+            "request TEXT NOT NULL, progress TEXT, result TEXT, status_code INTEGER, error TEXT, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+            "owner TEXT, lease_expires REAL, cancel_requested INTEGER NOT NULL DEFAULT 0)"
+        )
+        # Stores created before jobs had owners
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, definition in (('owner', 'TEXT'), ('lease_expires', 'REAL'),
+                                   ('cancel_requested', 'INTEGER NOT NULL DEFAULT 0')):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        # Request bodies (database URLs, API keys) are only kept while a job may still run
+        conn.execute(f"UPDATE jobs SET request = '{{}}' WHERE status NOT IN {ACTIVE_JOB_STATUSES} AND request <> '{{}}'")
+        conn.commit()
+        _job_store_initialized = True
+    return conn
+
+def _get_job_owner() -> str:
+    """This process's owner token for job leases (new after every fork, so PID reuse cannot alias it)."""
+    global _job_owner
+    with _job_lock:
+        if _job_owner is None:
+            _job_owner = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        return _job_owner
+
+def _job_lease_expiry() -> float:
+    """Lease deadline for jobs this process owns, renewed from now."""
+    config = load_config() or {}
+    return time.time() + config.get('job_lease_seconds', 30.0)
+
+def _update_job(job_id: str, unless_cancelled: bool = False, **fields) -> bool:
+    """Persist changed fields of a job record (dict/list values are stored as JSON).
+    
+    With unless_cancelled the update is skipped once a cancel was requested. Returns
+    whether the record was updated.
+    """
+    columns = ', '.join(f"{name} = ?" for name in fields)
+    values = [json.dumps(value) if isinstance(value, (dict, list)) else value for value in fields.values()]
+    condition = " AND cancel_requested = 0" if unless_cancelled else ""
+    with _job_lock:
+        conn = _get_job_store_connection()
+        try:
+            updated = conn.execute(f"UPDATE jobs SET {columns} WHERE job_id = ?{condition}", values + [job_id]).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+    return bool(updated)
+
+def _finish_job(job_id: str, status: str, unless_cancelled: bool = False, **fields) -> bool:
+    """Record a job's final status and drop its stored request body (it may hold credentials)."""
+    return _update_job(job_id, unless_cancelled, status=status, request='{}', finished_at=time.time(), **fields)
+
+def get_job(job_id: str):
+    """Load a job record, or None if it does not exist."""
+    with _job_lock:
+        conn = _get_job_store_connection()
+        try:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+    if row is None:
+        return None
+    
+    def timestamp(value):
+        return datetime.utcfromtimestamp(value).isoformat() + "Z" if value else None
+    
+    return {
+        "job_id": row["job_id"],
+        "job_type": row["job_type"],
+        "status": row["status"],
+        "created_at": timestamp(row["created_at"]),
+        "started_at": timestamp(row["started_at"]),
+        "finished_at": timestamp(row["finished_at"]),
+        "progress": json.loads(row["progress"]) if row["progress"] else None,
+        "status_code": row["status_code"],
+        "error": row["error"],
+        "result": json.loads(row["result"]) if row["result"] else None
+    }
+
+def _job_cancel_requested(job_id: str) -> bool:
+    """Whether any worker process has asked for this job to be cancelled."""
+    with _job_lock:
+        conn = _get_job_store_connection()
+        try:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+    return bool(row and row[0])
+
+def _run_analysis_job(job_id: str, request_data: dict):
+    """Worker body: run one queued analysis job and persist its outcome."""
+    cancel_event = _job_cancel_events.get(job_id)
+    _metrics_route.set('/jobs/analyze')
+    try:
+        # Claim the job; a cancel from any worker (or a recovery by another one) makes this a no-op
+        with _job_lock:
+            conn = _get_job_store_connection()
+            try:
+                claimed = conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ? "
+                    "WHERE job_id = ? AND status = 'queued' AND owner = ? AND cancel_requested = 0",
+                    (time.time(), job_id, _get_job_owner())
+                ).rowcount
+                conn.commit()
+            finally:
+                conn.close()
+        if not claimed:
+            logger.info(f"Job {job_id} was cancelled or taken over before it started")
+            return
+        logger.info(f"Job {job_id} started")
+        
+        progress = {"stage": "queued", "chunks": []}
+        
+        def on_progress(record):
+            if "stage" in record:
+                progress["stage"] = record["stage"]
+            else:
+                progress["chunks"].append(record)
+            _update_job(job_id, progress=progress)
+        
+        def cancel_check():
+            # Cancels from other worker processes arrive through the store, polled at each stage boundary
+            if (cancel_event is not None and cancel_event.is_set()) or _job_cancel_requested(job_id):
+                raise AnalysisCancelled(job_id)
+        
+        response_body, status_code = run_analysis(request_data, on_progress, cancel_check)
+        cancel_check()
+        progress["stage"] = "finished"
+        # Only if no cancel arrived since the last poll; a cancelled job stays cancelled
+        finished = _finish_job(
+            job_id, "completed" if status_code == 200 else "failed", unless_cancelled=True,
+            progress=progress, result=response_body, status_code=status_code,
+            error=None if status_code == 200 else response_body.get("error")
+        )
+        if not finished:
+            raise AnalysisCancelled(job_id)
+        logger.info(f"Job {job_id} finished with status {status_code}")
+    except AnalysisCancelled:
+        logger.info(f"Job {job_id} cancelled")
+        _finish_job(job_id, "cancelled")
+    except Exception as e:
+        if _finish_job(job_id, "failed", unless_cancelled=True, error=str(e)):
+            logger.error(f"Job {job_id} failed: {e}")
+        else:
+            logger.info(f"Job {job_id} cancelled (failed after the cancel: {e})")
+            _finish_job(job_id, "cancelled")
+    finally:
+        with _job_lock:
+            _job_futures.pop(job_id, None)
+            _job_cancel_events.pop(job_id, None)
+
+def _submit_job(job_id: str, request_data: dict):
+    """Hand a queued job this process owns to the worker pool."""
+    with _job_lock:
+        _job_cancel_events[job_id] = threading.Event()
+        _job_futures[job_id] = _job_executor.submit(_run_analysis_job, job_id, request_data)
+
+def _recover_orphaned_jobs() -> list:
+    """Settle jobs whose owner stopped renewing its lease; returns the queued ones claimed for this process.
+    
+    Only jobs with an expired lease are touched, so jobs owned by other live worker
+    processes are left alone: running ones are marked failed, cancelling ones
+    cancelled, and queued ones are taken over to run here.
+    """
+    now = time.time()
+    expired = "(lease_expires IS NULL OR lease_expires < ?)"
+    with _job_lock:
+        conn = _get_job_store_connection()
+        try:
+            # IMMEDIATE: no other process can claim the same queued jobs in between
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted: the worker running it stopped', "
+                f"request = '{{}}', finished_at = ? WHERE status = 'running' AND {expired}", (now, now)
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'cancelled', request = '{}', finished_at = ? "
+                f"WHERE status = 'cancelling' AND {expired}",
+                (now, now)
+            )
+            orphaned = conn.execute(
+                f"SELECT job_id, request FROM jobs WHERE status = 'queued' AND {expired} ORDER BY created_at", (now,)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET owner = ?, lease_expires = ? WHERE job_id = ?",
+                [(_get_job_owner(), _job_lease_expiry(), job_id) for job_id, _ in orphaned]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    return [(job_id, json.loads(request_json)) for job_id, request_json in orphaned]
+
+def _renew_job_leases():
+    """Extend the leases of the active jobs this process owns."""
+    with _job_lock:
+        conn = _get_job_store_connection()
+        try:
+            conn.execute(
+                f"UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status IN {ACTIVE_JOB_STATUSES}",
+                (_job_lease_expiry(), _get_job_owner())
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+def _requeue_orphaned_jobs():
+    recovered = _recover_orphaned_jobs()
+    for job_id, request_data in recovered:
+        _submit_job(job_id, request_data)
+    if recovered:
+        logger.info(f"Took over {len(recovered)} queued analysis jobs from stopped workers")
+
+def _job_lease_loop():
+    """Renew this process's job leases and pick up jobs orphaned by stopped workers."""
+    config = load_config() or {}
+    interval = max(config.get('job_lease_seconds', 30.0) / 3, 0.05)
+    while True:
+        time.sleep(interval)
+        try:
+            _renew_job_leases()
+            _requeue_orphaned_jobs()
+        except Exception as e:
+            logger.warning(f"Job lease renewal failed: {e}")
+
+def get_job_executor() -> ThreadPoolExecutor:
+    """Get this process's background job worker pool, recovering orphaned jobs on first use.
+    
+    Several worker processes (gunicorn) share the job store. Each job row carries its
+    owner process and a lease the owner renews every JOB_LEASE_SECONDS / 3; only jobs
+    whose lease has expired (their owner stopped) are recovered by another process.
+    """
+    global _job_executor, _job_lease_thread
+    if _job_executor is not None:
+        return _job_executor
+    
+    with _job_executor_lock:
+        if _job_executor is not None:
+            return _job_executor
+        
+        config = load_config() or {}
+        _job_executor = ThreadPoolExecutor(
+            max_workers=config.get('job_workers', 2),
+            thread_name_prefix='analysis-job'
+        )
+        _requeue_orphaned_jobs()
+        _job_lease_thread = threading.Thread(target=_job_lease_loop, name='job-leases', daemon=True)
+        _job_lease_thread.start()
+        return _job_executor
+
+def submit_analysis_job(request_data: dict):
+    """Persist and enqueue an analysis job; returns the job id, or None when the queue is full.
+    
+    The queue limit counts queued jobs across all worker processes sharing the store.
+    """
+    config = load_config() or {}
+    get_job_executor()
+    with _job_lock:
+        job_id = uuid.uuid4().hex
+        conn = _get_job_store_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= config.get('job_queue_max', 20):
+                conn.rollback()
+                return None
+            conn.execute(
+                "INSERT INTO jobs (job_id, job_type, status, request, created_at, owner, lease_expires) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, 'analyze', 'queued', json.dumps(request_data), time.time(),
+                 _get_job_owner(), _job_lease_expiry())
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        _submit_job(job_id, request_data)
+    logger.info(f"Job {job_id} queued")
+    return job_id
+
+def cancel_job(job_id: str) -> str:
+    """Cancel a queued or running job from any worker process.
+    
+    Returns the resulting status, or None if the job is unknown. A queued job is
+    cancelled in the store at once (its owner skips it); a running job is flagged
+    and its owner stops at the next stage boundary.
+    """
+    with _job_lock:
+        conn = _get_job_store_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            status = row[0]
+            if status == 'queued':
+                status = 'cancelled'
+                conn.execute(
+                    "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, request = '{}', finished_at = ? "
+                    "WHERE job_id = ?",
+                    (time.time(), job_id)
+                )
+            elif status in ('running', 'cancelling'):
+                status = 'cancelling'
+                conn.execute("UPDATE jobs SET status = 'cancelling', cancel_requested = 1 WHERE job_id = ?", (job_id,))
+            conn.commit()
+        finally:
+            conn.close()
+        
+        # Fast path when this process owns the job
+        cancel_event = _job_cancel_events.get(job_id)
+        if cancel_event:
+            cancel_event.set()
+        future = _job_futures.get(job_id)
+        if status == 'cancelled' and future is not None and future.cancel():
+            _job_futures.pop(job_id, None)
+            _job_cancel_events.pop(job_id, None)
+    return status
+
+@app.route('/jobs/analyze', methods=['POST'])
+def submit_analyze_job():
+    """Queue a schema analysis to run in the background and return its job id immediately."""
+    request_data = request.get_json(silent=True) or {}
+    job_id = submit_analysis_job(request_data)
+    if job_id is None:
+        response = jsonify({
+            "success": False,
+            "error": "Job queue is full",
+            "details": "Too many analysis jobs are waiting. Retry later."
+        })
+        response.headers['Retry-After'] = '30'
+        return response, 429
+    
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/jobs/{job_id}"
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get the status, progress and (when finished) result of a background job."""
+    get_job_executor()
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found",
+            "details": f"No job with id '{job_id}'"
+        }), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def delete_job(job_id):
+    """Cancel a queued or running background job."""
+    get_job_executor()
+    status = cancel_job(job_id)
+    if status is None:
+        return jsonify({
+            "success": False,
+            "error": "Job not found",
+            "details": f"No job with id '{job_id}'"
+        }), 404
+    if status not in ('cancelled', 'cancelling'):
+        return jsonify({
+            "success": False,
+            "error": "Job already finished",
+            "details": f"Job '{job_id}' is {status} and can no longer be cancelled"
+        }), 409
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "status": status
+    })
 
 @app.route('/docs', methods=['GET'])
 def documentation():
@@ -1140,4 +6753,5 @@ def documentation():
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
+    start_warmup()
     app.run(host='0.0.0.0', port=port, debug=False)
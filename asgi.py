@@ -0,0 +1,279 @@
+"""ASGI entry point for the glossary service.
+
+POST /analyze and POST /generate are served by async handlers: the AI call is
+awaited on a pooled httpx.AsyncClient, so thousands of slow upstream completions
+cost coroutines instead of OS threads. Every other route is served by the Flask
+app through a WSGI bridge running on a small thread pool.
+
+Run with:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+
+from app import (
+    PROFILE_HEADER,
+    REQUEST_SECONDS,
+    SSE_KEEPALIVE_INTERVAL,
+    AnalysisCancelled,
+    _metrics_route,
+    app,
+    close_async_http_client,
+    close_http_client,
+    format_sse,
+    gzip_stream,
+    load_config,
+    logger,
+    prepare_generate_export,
+    run_analysis_async,
+    start_warmup,
+    write_csv_chunks,
+)
+
+_config = load_config() or {}
+wsgi_application = WSGIMiddleware(app, workers=_config.get('asgi_wsgi_workers', 10))
+
+
+async def read_json_body(receive):
+    """Read the full request body and decode it as JSON (None if empty)."""
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    if not body.strip():
+        return None
+    return json.loads(body)
+
+
+async def send_response(send, status_code: int, body: bytes, content_type: str, headers: dict = None):
+    """Send a complete (non-streaming) HTTP response."""
+    response_headers = [(b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode())]
+    response_headers.extend((name.lower().encode(), value.encode()) for name, value in (headers or {}).items())
+    await send({"type": "http.response.start", "status": status_code, "headers": response_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send, body: dict, status_code: int):
+    """Send a JSON response serialized the same way as Flask's jsonify."""
+    await send_response(send, status_code, (app.json.dumps(body) + '\n').encode(), 'application/json')
+
+
+async def analyze_schema(scope, receive, send):
+    """Async POST /analyze."""
+    try:
+        request_data = await read_json_body(receive) or {}
+    except json.JSONDecodeError:
+        await send_json(send, {
+            "success": False,
+            "error": "Invalid JSON format",
+            "details": "Request body must be valid JSON"
+        }, 400)
+        return
+    if request_data.get('stream', False):
+        await stream_analysis_events(request_data, receive, send)
+        return
+    response_body, status_code = await run_analysis_async(request_data)
+    await send_json(send, response_body, status_code)
+
+
+async def stream_analysis_events(request_data: dict, receive, send):
+    """Async POST /analyze with "stream": true, sent as server-sent events (see analysis_event_stream).
+
+    A client disconnect (or a failing send) cancels the analysis task, which abandons
+    the AI call; work already on worker threads stops at its next stage boundary.
+    """
+    events = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+    loop_thread = threading.get_ident()
+    cancelled = threading.Event()
+
+    def cancel_check():
+        if cancelled.is_set():
+            raise AnalysisCancelled("stream closed")
+
+    def put(event, data):
+        # Progress callbacks may run on worker threads during reflection and map-reduce;
+        # those are handed to the loop in order, ahead of the thread's own completion
+        if cancelled.is_set():
+            return
+        if threading.get_ident() == loop_thread:
+            events.put_nowait((event, data))
+        else:
+            loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    async def run():
+        try:
+            response_body, status_code = await run_analysis_async(
+                request_data,
+                progress_callback=lambda progress: put("progress", progress),
+                node_callback=lambda node: put("node", node),
+                cancel_check=cancel_check
+            )
+        except AnalysisCancelled:
+            logger.info("Streamed analysis cancelled: the client disconnected")
+            return
+        # Queued at once (we are on the loop), so it is in the queue before the task counts as done
+        put("result", {**response_body, "status_code": status_code})
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        cancelled.set()
+        analysis.cancel()
+
+    analysis = asyncio.create_task(run())
+    watcher = asyncio.create_task(watch_disconnect())
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                        (b'x-accel-buffering', b'no')]
+        })
+        while True:
+            getter = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait({getter, analysis}, timeout=SSE_KEEPALIVE_INTERVAL,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                if analysis.done() and events.empty():
+                    # Cancelled before producing a result
+                    break
+                if not done:
+                    await send({"type": "http.response.body", "body": b': keepalive\n\n', "more_body": True})
+                continue
+            event, data = getter.result()
+            await send({"type": "http.response.body", "body": format_sse(event, data).encode(), "more_body": True})
+            if event == "result":
+                break
+        await send({"type": "http.response.body", "body": b''})
+    finally:
+        watcher.cancel()
+        if not analysis.done():
+            cancelled.set()
+            analysis.cancel()
+
+
+async def generate_output(scope, receive, send):
+    """Async POST /generate; the CSV is built on worker threads so the event loop stays free."""
+    try:
+        start_time = time.time()
+        try:
+            request_data = await read_json_body(receive)
+        except json.JSONDecodeError:
+            logger.error("Invalid JSON in request body")
+            await send_json(send, {
+                "success": False,
+                "error": "Invalid JSON format",
+                "details": "Request body must be valid JSON"
+            }, 400)
+            return
+
+        accept_encoding = b', '.join(value for name, value in scope['headers'] if name == b'accept-encoding')
+        export = await asyncio.to_thread(prepare_generate_export, request_data, accept_encoding.decode('latin-1'))
+        if "result" in export:
+            response_body, status_code = export["result"]
+            await send_json(send, response_body, status_code)
+            return
+        headers = export["headers"]
+
+        if not export["stream"]:
+            csv_content = await asyncio.to_thread(lambda: ''.join(write_csv_chunks(export["rows"])))
+            logger.info(f"Direct transformation completed successfully in {round(time.time() - start_time, 2)}s")
+            await send_response(send, 200, csv_content.encode(), 'text/csv; charset=utf-8', headers)
+            return
+
+        # Stream CSV chunks, producing each one on a worker thread
+        chunks = write_csv_chunks(export["rows"])
+        headers['Vary'] = 'Accept-Encoding'
+        if export["gzip"]:
+            chunks = gzip_stream(chunks)
+            headers['Content-Encoding'] = 'gzip'
+        response_headers = [(b'content-type', b'text/csv; charset=utf-8')]
+        response_headers.extend((name.lower().encode(), value.encode()) for name, value in headers.items())
+        await send({"type": "http.response.start", "status": 200, "headers": response_headers})
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None:
+                break
+            await send({
+                "type": "http.response.body",
+                "body": chunk.encode() if isinstance(chunk, str) else chunk,
+                "more_body": True
+            })
+        await send({"type": "http.response.body", "body": b''})
+        logger.info(f"Streaming transformation completed successfully in {round(time.time() - start_time, 2)}s")
+
+    except Exception as e:
+        logger.error(f"Error in generate endpoint: {e}")
+        await send_json(send, {
+            "success": False,
+            "error": "Internal server error",
+            "details": str(e)
+        }, 500)
+
+
+def profiling_requested(scope) -> bool:
+    """Whether a request asked to be profiled; those are served by Flask, whose hooks run the profiler."""
+    profile_header = PROFILE_HEADER.lower().encode()
+    if any(name == profile_header for name, _ in scope['headers']):
+        return True
+    return 'profile' in parse_qs(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True)
+
+
+ASYNC_ROUTES = {
+    ('POST', '/analyze'): analyze_schema,
+    ('POST', '/generate'): generate_output,
+}
+
+
+async def lifespan(scope, receive, send):
+    """Start the warm-up on server startup and close pooled HTTP clients on shutdown."""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Background warm-up returns at once, so the server binds while pools warm
+            await asyncio.to_thread(start_warmup)
+            await send({"type": "lifespan.startup.complete"})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_async_http_client()
+            close_http_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI application: async handlers for the AI routes, Flask for the rest."""
+    if scope['type'] == 'lifespan':
+        await lifespan(scope, receive, send)
+        return
+
+    handler = None
+    if scope['type'] == 'http' and not profiling_requested(scope):
+        handler = ASYNC_ROUTES.get((scope['method'], scope['path'].rstrip('/') or '/'))
+    if handler is None:
+        await wsgi_application(scope, receive, send)
+        return
+    
+    # Flask's request hooks record metrics for bridged routes; async routes record their own
+    route = scope['path'].rstrip('/') or '/'
+    _metrics_route.set(route)
+    status = {"code": 500}
+    
+    async def send_with_status(message):
+        if message['type'] == 'http.response.start':
+            status["code"] = message['status']
+        await send(message)
+    
+    start = time.perf_counter()
+    try:
+        await handler(scope, receive, send_with_status)
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, route=route, method=scope['method'], status=str(status["code"]))
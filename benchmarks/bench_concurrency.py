@@ -0,0 +1,212 @@
+"""Load test: concurrent /analyze capacity of the Flask dev server, gunicorn and the ASGI entry point.
+
+Starts a local fake LLM server that answers every completion after a fixed
+delay, a small SQLite database, and then the service in each mode as a
+subprocess: ``python app.py``, ``gunicorn -c gunicorn.conf.py`` with the shipped
+config (gthread workers, or uvicorn workers serving asgi:application for
+``gunicorn-asgi``) and ``uvicorn asgi:application``. Waits for /readyz, fires N
+concurrent POST /analyze requests per mode and reports completed requests, wall
+time, throughput, and the server's peak OS thread count and peak RSS summed over
+its processes (sampled from /proc, so thread and RSS figures are Linux-only).
+
+Usage:
+    python benchmarks/bench_concurrency.py [--requests 1000] [--delay 2.0] [--modes flask,gunicorn,gunicorn-asgi,asgi]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+FAKE_COMPLETION = json.dumps({
+    "choices": [{"message": {"content": json.dumps({"Glossary": [{"Orders": ["Order", "Order Line"]}]})}}]
+}).encode()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_fake_llm(port, delay):
+    """Minimal HTTP/1.1 keep-alive server answering every request after `delay` seconds."""
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = 0
+                for line in head.split(b'\r\n'):
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':', 1)[1])
+                await reader.readexactly(length)
+                await asyncio.sleep(delay)
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             b'Content-Length: ' + str(len(FAKE_COMPLETION)).encode() + b'\r\n\r\n' + FAKE_COMPLETION)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, '127.0.0.1', port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def create_database(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER REFERENCES customers(id))")
+    conn.commit()
+    conn.close()
+
+
+def child_pids(pid):
+    """Direct children of a process (gunicorn workers), found by scanning /proc."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                # The command name may contain spaces; the parent pid follows its closing parenthesis
+                if int(stat.read().rsplit(')', 1)[1].split()[1]) == pid:
+                    children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            pass
+    return children
+
+
+def sample_process(pid):
+    """Current thread count and peak RSS (MB) of a process and its children from /proc."""
+    threads, peak_rss = 0, 0.0
+    for process in [pid] + child_pids(pid):
+        try:
+            with open(f'/proc/{process}/status') as status:
+                for line in status:
+                    if line.startswith('Threads:'):
+                        threads += int(line.split()[1])
+                    elif line.startswith('VmHWM:'):
+                        peak_rss += int(line.split()[1]) / 1024
+        except OSError:
+            pass
+    return threads, peak_rss
+
+
+async def wait_until_up(base_url, timeout=30):
+    """Wait for /readyz to answer 200 (with several workers it is polled until one of them is warm)."""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f'{base_url}/readyz')).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+async def load(base_url, pid, requests, delay):
+    # Keep the idle pool small: httpcore's pool maintenance is quadratic in idle connections
+    limits = httpx.Limits(max_connections=requests, max_keepalive_connections=20)
+    timeout = httpx.Timeout(delay * 20 + 60)
+    peak_threads = 0
+    done = asyncio.Event()
+
+    async def monitor():
+        nonlocal peak_threads
+        while not done.is_set():
+            peak_threads = max(peak_threads, sample_process(pid)[0])
+            await asyncio.sleep(0.05)
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        async def one():
+            try:
+                response = await client.post(f'{base_url}/analyze', json={})
+                return response.status_code == 200
+            except httpx.HTTPError:
+                return False
+
+        monitor_task = asyncio.create_task(monitor())
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await monitor_task
+    return sum(results), elapsed, peak_threads, sample_process(pid)[1]
+
+
+def run_mode(mode, requests, delay, llm_port, db_path):
+    port = free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        DATABASE_URL=f'sqlite:///{db_path}',
+        API_BASE_URL=f'127.0.0.1:{llm_port}',
+        API_KEY='bench',
+        API_MAX_RETRIES='1',
+        API_TIMEOUT=str(delay * 20 + 60),
+        HTTP_MAX_CONNECTIONS=str(requests),
+        ANALYSIS_CACHE_ENABLED='false',
+        HEALTH_PROBE_LLM_INTERVAL='0',
+    )
+    if mode == 'flask':
+        command = [sys.executable, 'app.py']
+    elif mode in ('gunicorn', 'gunicorn-asgi'):
+        if mode == 'gunicorn-asgi':
+            env['GUNICORN_WORKER_CLASS'] = 'uvicorn.workers.UvicornWorker'
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '/dev/null']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(port),
+                   '--backlog', '4096', '--log-level', 'warning']
+    server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base_url = f'http://127.0.0.1:{port}'
+        asyncio.run(wait_until_up(base_url))
+        completed, elapsed, peak_threads, peak_rss = asyncio.run(load(base_url, server.pid, requests, delay))
+    finally:
+        server.terminate()
+        server.wait()
+    print(f"{mode:<13} completed={completed:5d}/{requests}  wall={elapsed:7.2f}s  "
+          f"throughput={completed / elapsed:8.1f} req/s  peak_threads={peak_threads:5d}  peak_rss={peak_rss:7.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000, help="concurrent /analyze requests per mode")
+    parser.add_argument("--delay", type=float, default=2.0, help="fake LLM response delay in seconds")
+    parser.add_argument("--modes", default="flask,gunicorn,gunicorn-asgi,asgi")
+    parser.add_argument("--fake-llm-port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.fake_llm_port:
+        run_fake_llm(args.fake_llm_port, args.delay)
+        return
+
+    llm_port = free_port()
+    fake_llm = subprocess.Popen([sys.executable, __file__, "--fake-llm-port", str(llm_port), "--delay", str(args.delay)])
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.db')
+            create_database(db_path)
+            for mode in args.modes.split(','):
+                run_mode(mode, args.requests, args.delay, llm_port, db_path)
+    finally:
+        fake_llm.terminate()
+        fake_llm.wait()
+
+
+if __name__ == "__main__":
+    main()
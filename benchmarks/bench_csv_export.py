@@ -0,0 +1,130 @@
+"""Benchmark: full-string CSV export vs streaming CSV export.
+
+Builds a synthetic glossary (default 1,000,000 terms: 100 categories x 100
+sub-categories x 100 terms) and exports it with the original full-string
+transform_to_csv (kept below: every row materialized in a list, then the whole
+CSV written to one string) and with stream_csv (chunked generator), each in a
+fresh subprocess so peak RSS is measured independently. app.transform_to_csv is
+now a join over stream_csv, so it is not the baseline. Reports peak RSS growth
+over the loaded input, time-to-first-byte and total time.
+
+Usage:
+    python benchmarks/bench_csv_export.py [--terms 1000000]
+"""
+import argparse
+import csv
+import io
+import os
+import resource
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def build_glossary(terms):
+    fanout = max(1, round(terms ** (1 / 3)))
+    return {
+        "Synthetic Glossary": [
+            {f"Category {c}": [
+                {f"Category {c}.{s}": [f"Term {c}.{s}.{t}" for t in range(fanout)]}
+                for s in range(fanout)
+            ]}
+            for c in range(fanout)
+        ]
+    }
+
+
+def baseline_transform_to_csv(hierarchical_data):
+    """The original transform_to_csv: recursive walk into a row list, then one CSV string."""
+    headers = ['_id', 'name', 'type', 'fqdn', 'parentId', 'rootId', 'resourceId', 'createdAt', 'updatedAt',
+               'createdBy', 'updatedBy', 'attributes']
+    rows = []
+    current_time = datetime.utcnow().isoformat() + 'Z'
+    attributes = '{"info":{"status":"Draft"}}'
+
+    def process_hierarchy(data, parent_id=None, root_id=None, parent_fqdn=""):
+        if isinstance(data, dict):
+            for key, value in data.items():
+                item_id = str(uuid.uuid4())
+                current_root_id = root_id if root_id else item_id
+                fqdn = f"{parent_fqdn}/{key}" if parent_fqdn else key
+                if parent_id is None:
+                    item_type = "glossary"
+                elif isinstance(value, list) and any(isinstance(item, dict) for item in value):
+                    item_type = "category"
+                else:
+                    item_type = "term"
+                rows.append([item_id, key, item_type, fqdn, parent_id or '', current_root_id, '',
+                             current_time, current_time, 'system', 'system', attributes])
+                if isinstance(value, list):
+                    for item in value:
+                        process_hierarchy(item, item_id, current_root_id, fqdn)
+                elif isinstance(value, dict):
+                    process_hierarchy(value, item_id, current_root_id, fqdn)
+        elif isinstance(data, list):
+            for item in data:
+                process_hierarchy(item, parent_id, root_id, parent_fqdn)
+        elif isinstance(data, str):
+            item_id = str(uuid.uuid4())
+            fqdn = f"{parent_fqdn}/{data}" if parent_fqdn else data
+            rows.append([item_id, data, "term", fqdn, parent_id or '', root_id if root_id else item_id, '',
+                         current_time, current_time, 'system', 'system', attributes])
+
+    process_hierarchy(hierarchical_data)
+    output = io.StringIO()
+    writer = csv.writer(output, quoting=csv.QUOTE_MINIMAL)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def run_mode(mode, terms):
+    import logging
+    logging.disable(logging.INFO)
+    import app
+
+    glossary = build_glossary(terms)
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    first_byte = None
+    output_bytes = 0
+    if mode == "string":
+        csv_content = baseline_transform_to_csv(glossary)
+        first_byte = time.perf_counter() - start
+        output_bytes = len(csv_content)
+        del csv_content
+    else:
+        for chunk in app.stream_csv(glossary):
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            output_bytes += len(chunk)
+    total = time.perf_counter() - start
+    print(f"{mode:<8} output={output_bytes / 1e6:8.1f}MB  peak_rss_growth={peak_rss_mb() - baseline:8.1f}MB  "
+          f"ttfb={first_byte * 1000:9.1f}ms  total={total:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terms", type=int, default=1_000_000)
+    parser.add_argument("--mode", choices=["string", "stream"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.terms)
+        return
+    for mode in ("string", "stream"):
+        subprocess.run([sys.executable, __file__, "--mode", mode, "--terms", str(args.terms)], check=True)
+
+
+if __name__ == "__main__":
+    main()
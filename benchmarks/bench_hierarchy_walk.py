@@ -0,0 +1,104 @@
+"""Benchmark: recursive process_hierarchy vs the iterative walk_glossary engine.
+
+The recursive reference below is the original transform_to_csv traversal
+(any(isinstance(...)) rescans of each child list, recursion per level).
+Both use the same cheap sequential ID factory so only traversal cost is
+measured. Trees:
+  wide  - 1 glossary, 1000 categories x 1000 terms (1M nodes)
+  bushy - fanout 8, depth 6 (~300k nodes)
+  deep  - a single chain 20,000 levels deep
+
+Usage:
+    python benchmarks/bench_hierarchy_walk.py
+"""
+import gc
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app  # noqa: E402
+
+
+def recursive_walk(data, id_factory):
+    nodes = []
+
+    def process_hierarchy(data, parent_id=None, root_id=None, parent_fqdn=""):
+        if isinstance(data, dict):
+            for key, value in data.items():
+                fqdn = f"{parent_fqdn}/{key}" if parent_fqdn else key
+                item_id = id_factory(fqdn)
+                current_root_id = root_id if root_id else item_id
+                if parent_id is None:
+                    item_type = "glossary"
+                elif isinstance(value, list) and any(isinstance(item, dict) for item in value):
+                    item_type = "category"
+                else:
+                    item_type = "term"
+                nodes.append((item_id, key, item_type, fqdn, parent_id, current_root_id))
+                if isinstance(value, list):
+                    for item in value:
+                        process_hierarchy(item, item_id, current_root_id, fqdn)
+                elif isinstance(value, dict):
+                    process_hierarchy(value, item_id, current_root_id, fqdn)
+        elif isinstance(data, list):
+            for item in data:
+                process_hierarchy(item, parent_id, root_id, parent_fqdn)
+        elif isinstance(data, str):
+            fqdn = f"{parent_fqdn}/{data}" if parent_fqdn else data
+            item_id = id_factory(fqdn)
+            nodes.append((item_id, data, "term", fqdn, parent_id, root_id if root_id else item_id))
+
+    process_hierarchy(data)
+    return nodes
+
+
+def iterative_walk(data, id_factory):
+    return list(app.walk_glossary(data, id_factory))
+
+
+def wide_tree():
+    return {"Wide": [{f"Category {c}": [f"Term {c}.{t}" for t in range(1000)]} for c in range(1000)]}
+
+
+def bushy_tree(fanout=8, depth=6):
+    def build(level, prefix):
+        if level == depth:
+            return [f"{prefix}.{i}" for i in range(fanout)]
+        return [{f"{prefix}.{i}": build(level + 1, f"{prefix}.{i}")} for i in range(fanout)]
+    return {"Bushy": build(1, "N")}
+
+
+def deep_tree(depth=20000):
+    node = "Leaf"
+    for level in range(depth):
+        node = {f"L{level}": [node]}
+    return node
+
+
+def measure(label, walk, tree):
+    counter = itertools.count()
+    # Keep cyclic GC passes over the large input trees out of the timings
+    gc.collect()
+    gc.disable()
+    start = time.perf_counter()
+    try:
+        nodes = walk(tree, lambda fqdn: next(counter))
+        outcome = f"nodes={len(nodes):>8}  time={time.perf_counter() - start:7.3f}s"
+    except RecursionError:
+        outcome = f"RecursionError after {time.perf_counter() - start:.3f}s"
+    finally:
+        gc.enable()
+    print(f"{label:<22} {outcome}")
+
+
+def main():
+    for name, tree in (("wide", wide_tree()), ("bushy", bushy_tree()), ("deep", deep_tree())):
+        measure(f"{name} / recursive", recursive_walk, tree)
+        measure(f"{name} / iterative", iterative_walk, tree)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Benchmark: node ID generation throughput per ID strategy.
+
+Generates N IDs (default 1,000,000) with each make_id_factory strategy,
+feeding realistic FQDNs so the stable (UUIDv5) mode hashes real names.
+
+Usage:
+    python benchmarks/bench_id_generation.py [--nodes 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    fqdns = [f"Synthetic Glossary/Category {i // 10000}/Category {i // 100}/Term {i}" for i in range(args.nodes)]
+    for strategy in app.ID_STRATEGIES:
+        id_factory = app.make_id_factory(strategy)
+        start = time.perf_counter()
+        for fqdn in fqdns:
+            id_factory(fqdn)
+        elapsed = time.perf_counter() - start
+        print(f"{strategy:<8} nodes={args.nodes:>8}  time={elapsed:6.2f}s  throughput={args.nodes / elapsed / 1e6:5.2f}M ids/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Import-time breakdown of the app module, and a regression check for deferred imports.
+
+Runs ``python -X importtime -c "import app"`` in fresh interpreters and reports
+the median total import time, the heaviest top-level packages (self time summed
+over their submodules), and the cost of the deferred imports (SQLAlchemy, httpx)
+that the startup warm-up or first request pays instead.
+
+Exits non-zero if a module that should be deferred (SQLAlchemy, httpx or a
+database driver) is imported at startup, or if the median import time exceeds
+--budget-ms, so it can run as a CI regression check.
+
+Usage:
+    python benchmarks/bench_import_time.py [--runs 5] [--top 15] [--budget-ms 400]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Top-level packages that must stay off the import path of `import app`
+DEFERRED_PACKAGES = ('sqlalchemy', 'httpx', 'httpcore', 'psycopg2', 'pymysql', 'pyodbc', 'cx_Oracle', 'oracledb')
+
+STARTUP = "import app"
+WARMED = "import app; app.sqlalchemy._load(); app.httpx._load()"
+
+
+def import_times(code):
+    """Parse one -X importtime run into {module: (self_us, cumulative_us)}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def total_ms(modules):
+    """Total import time: sum of self times of every module imported."""
+    return sum(self_us for self_us, _ in modules.values()) / 1000
+
+
+def package_breakdown(modules):
+    packages = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        packages[name.split('.')[0]] += self_us
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages to list in the breakdown")
+    parser.add_argument("--budget-ms", type=float, help="fail if the median startup import time exceeds this")
+    args = parser.parse_args()
+
+    startup_runs = [import_times(STARTUP) for _ in range(args.runs)]
+    warmed_runs = [import_times(WARMED) for _ in range(args.runs)]
+    startup_ms = statistics.median(total_ms(run) for run in startup_runs)
+    warmed_ms = statistics.median(total_ms(run) for run in warmed_runs)
+
+    print(f"import app (startup)          median={startup_ms:8.1f}ms over {args.runs} runs")
+    print(f"import app + deferred modules median={warmed_ms:8.1f}ms  (deferred to warm-up: {warmed_ms - startup_ms:.1f}ms)")
+    print(f"\nHeaviest packages at startup (self time, last run):")
+    for package, self_us in package_breakdown(startup_runs[-1])[:args.top]:
+        print(f"  {package:<28} {self_us / 1000:8.1f}ms")
+
+    failures = []
+    imported = sorted({name.split('.')[0] for name in startup_runs[-1]} & set(DEFERRED_PACKAGES))
+    if imported:
+        failures.append(f"deferred packages imported at startup: {', '.join(imported)}")
+    if args.budget_ms is not None and startup_ms > args.budget_ms:
+        failures.append(f"startup import time {startup_ms:.1f}ms exceeds budget {args.budget_ms:.1f}ms")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark: per-table inspector reflection vs bulk reflection.
+
+Generates a SQLite database with N tables (default 5000), each with a handful of
+columns, a primary key and a foreign key to its predecessor, then reflects it
+with each strategy and reports catalog round trips and wall time.
+
+Usage:
+    python benchmarks/bench_schema_reflection.py [--tables 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app  # noqa: E402
+
+
+def build_schema(engine, table_count):
+    with engine.begin() as conn:
+        for i in range(table_count):
+            fk = f", parent_id INTEGER REFERENCES t_{i - 1:05d}(id)" if i else ""
+            conn.execute(text(
+                f"CREATE TABLE t_{i:05d} (id INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+                f"created_at TIMESTAMP, amount NUMERIC, status VARCHAR(20){fk})"
+            ))
+
+
+def measure(engine, label, reflect):
+    round_trips = [0]
+
+    def count(*_args):
+        round_trips[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        start = time.perf_counter()
+        tables = reflect()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    print(f"{label:<28} tables={len(tables):>6}  round_trips={round_trips[0]:>7}  wall={elapsed:8.3f}s")
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        print(f"Building SQLite schema with {args.tables} tables...")
+        build_schema(engine, args.tables)
+
+        def per_table():
+            with engine.connect() as conn:
+                return app._reflect_per_table(conn)
+
+        def inspector_multi():
+            with engine.connect() as conn:
+                return app._reflect_with_inspector(conn)
+
+        baseline = measure(engine, "per-table inspector", per_table)
+        measure(engine, "inspector get_multi_*", inspector_multi)
+        bulk = measure(engine, "reflect_schema (bulk)", lambda: app.reflect_schema(engine))
+
+        assert baseline == bulk, "bulk reflection result differs from per-table reflection"
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark: schema summary size per compression strategy, and fitting a token budget.
+
+Builds a synthetic warehouse-style schema in memory (no database needed):
+entity tables with audit columns and shared column prefixes, monthly
+partitioned event tables and hash-sharded tables, with foreign keys that
+concentrate on a few hub tables. Reports the estimated prompt tokens of the
+uncompressed summary, of each strategy added in turn, and of the full
+strategy set under --budget, with the compression ratio and how many tables
+were described, named or omitted.
+
+Usage:
+    python benchmarks/bench_schema_summary.py [--tables 4000] [--budget 24000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app  # noqa: E402
+
+AUDIT_COLUMNS = ['created_at', 'created_by', 'updated_at', 'updated_by', 'etl_batch_id', '_loaded_at']
+ENTITY_FIELDS = ['name', 'code', 'status', 'type', 'description', 'start_date', 'end_date', 'amount']
+ADDRESS_FIELDS = ['address_line1', 'address_line2', 'address_city', 'address_region', 'address_postcode']
+
+
+def column(name):
+    return {"name": name, "type": "VARCHAR(100)", "nullable": True, "default": None, "comment": None}
+
+
+def build_schema(table_count, seed=42):
+    """Entity tables (60%), monthly partitions (30%) and shards (10%) with hub-heavy foreign keys."""
+    rng = random.Random(seed)
+    tables = {}
+    entity_count = int(table_count * 0.6)
+    entities = []
+    for index in range(entity_count):
+        name = f"entity_{index:04d}"
+        columns = [column('id')] + [column(f"{name}_{field}") for field in rng.sample(ENTITY_FIELDS, rng.randint(3, 8))]
+        if rng.random() < 0.3:
+            columns += [column(field) for field in ADDRESS_FIELDS]
+        foreign_keys = []
+        for _ in range(rng.randint(0, 3) if entities else 0):
+            # Low indexes are referenced far more often: a handful of hub tables
+            referred = entities[int(len(entities) * rng.random() ** 3)]
+            fk_column = f"{referred}_id"
+            if any(col["name"] == fk_column for col in columns):
+                continue
+            columns.append(column(fk_column))
+            foreign_keys.append({"name": None, "constrained_columns": [fk_column], "referred_schema": None,
+                                 "referred_table": referred, "referred_columns": ["id"]})
+        columns += [column(name) for name in AUDIT_COLUMNS]
+        tables[name] = {"columns": columns, "primary_key": ["id"], "foreign_keys": foreign_keys, "indexes": []}
+        entities.append(name)
+
+    def add_family(stem, suffixes):
+        columns = [column('id'), column('event_type'), column('event_payload'), column('entity_id')]
+        columns += [column(name) for name in AUDIT_COLUMNS]
+        for suffix in suffixes:
+            tables[f"{stem}_{suffix}"] = {"columns": columns, "primary_key": ["id"], "foreign_keys": [], "indexes": []}
+
+    partitioned = int(table_count * 0.3)
+    for family in range(partitioned // 48):
+        add_family(f"events_{family:02d}", [f"{2021 + month // 12}_{month % 12 + 1:02d}" for month in range(48)])
+    sharded = table_count - len(tables)
+    for family in range((sharded + 31) // 32):
+        remaining = table_count - len(tables)
+        add_family(f"ledger_{family:02d}_shard", [f"{shard:02d}" for shard in range(min(32, remaining))])
+    return dict(sorted(tables.items()))
+
+
+def report(label, tables, budget, strategies):
+    start = time.perf_counter()
+    summary, stats = app.summarize_schema(tables, 'warehouse', budget, strategies)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} tokens={stats['summary_tokens']:7d}  ratio={stats['compression_ratio']:6.2f}x  "
+          f"detailed={stats['tables_detailed']:5d}  named={stats['tables_named_only']:5d}  "
+          f"omitted={stats['tables_omitted']:5d}  time={elapsed * 1000:7.1f}ms")
+    return summary, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tables", type=int, default=4000)
+    parser.add_argument("--budget", type=int, default=24000, help="token budget for the final run")
+    args = parser.parse_args()
+
+    tables = build_schema(args.tables)
+    print(f"Synthetic schema: {len(tables)} tables, {sum(len(t['columns']) for t in tables.values())} columns")
+    report("uncompressed", tables, 0, [])
+    enabled = []
+    for strategy in app.SUMMARY_STRATEGIES:
+        enabled.append(strategy)
+        report(f"+ {strategy}", tables, 0, enabled)
+    summary, stats = report(f"all strategies, budget {args.budget}", tables, args.budget, app.SUMMARY_STRATEGIES)
+    if stats["summary_tokens"] > args.budget:
+        print(f"\nFAIL: summary ({stats['summary_tokens']} tokens) exceeds the budget of {args.budget}")
+        sys.exit(1)
+    print("\nSample lines:")
+    for line in summary.splitlines()[:6]:
+        print(f"  {line[:160]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Benchmark: reflecting a partition-heavy warehouse with and without table clustering.
+
+Generates a SQLite database of --families table families: each has a base table with a
+few columns and a foreign key to the previous family, --partitions monthly partitions
+(family_NNN_YYYY_MM), a _bak copy and a _tmp copy; every tenth family is also sharded
+per tenant (tenant_NN_family_NNN). Reflects it with clustering off and on, and reports
+catalog round trips, wall time, reflected tables and the schema summary size (all
+summary strategies, no token budget).
+
+Usage:
+    python benchmarks/bench_table_clustering.py [--families 100] [--partitions 48] [--tenants 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app  # noqa: E402
+
+
+def build_schema(engine, families, partitions, tenants):
+    table_count = 0
+    with engine.begin() as conn:
+        for f in range(families):
+            fk = f", prev_id INTEGER REFERENCES family_{f - 1:03d}(id)" if f else ""
+            columns = (f"(id INTEGER PRIMARY KEY, name TEXT NOT NULL, status VARCHAR(20), amount NUMERIC, "
+                       f"col_{f}_a TEXT, col_{f}_b TEXT, created_at TIMESTAMP, updated_at TIMESTAMP{fk})")
+            names = [f"family_{f:03d}", f"family_{f:03d}_bak", f"family_{f:03d}_tmp"]
+            names += [f"family_{f:03d}_{2020 + month // 12}_{month % 12 + 1:02d}" for month in range(partitions)]
+            if f % 10 == 0:
+                names += [f"tenant_{t:02d}_family_{f:03d}" for t in range(tenants)]
+            for name in names:
+                conn.execute(text(f"CREATE TABLE {name} {columns}"))
+                conn.execute(text(f"CREATE INDEX ix_{name}_status ON {name} (status)"))
+            table_count += len(names)
+    return table_count
+
+
+def measure(engine, label, cluster_min_members):
+    round_trips = [0]
+
+    def count(*_args):
+        round_trips[0] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        start = time.perf_counter()
+        tables = app.reflect_schema(engine, None, cluster_min_members)
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    summary, stats = app.summarize_schema(tables)
+    print(f"{label:<22} reflected={len(tables):>6}  round_trips={round_trips[0]:>3}  wall={elapsed:7.3f}s  "
+          f"summary_tokens={stats['summary_tokens']:>7}  (uncompressed {stats['baseline_tokens']})")
+    return tables
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--families", type=int, default=100)
+    parser.add_argument("--partitions", type=int, default=48)
+    parser.add_argument("--tenants", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        table_count = build_schema(engine, args.families, args.partitions, args.tenants)
+        print(f"SQLite schema with {table_count} tables in {args.families} families")
+
+        full = measure(engine, "clustering off", 0)
+        clustered = measure(engine, "clustering on", 2)
+
+        assert app.count_tables(clustered) == len(full), "clusters do not cover every table"
+        for table_name, table_info in clustered.items():
+            assert {key: value for key, value in table_info.items() if key != "cluster"} == full[table_name]
+        info = app.table_clusters_info(clustered)
+        print(f"{info['clusters']} clusters, {info['tables_collapsed']} tables collapsed")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
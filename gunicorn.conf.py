@@ -0,0 +1,57 @@
+"""Gunicorn configuration for production serving.
+
+Run with:
+    gunicorn -c gunicorn.conf.py
+
+The app is imported once in the master (preload_app) so workers fork with the
+modules already loaded and share their memory pages. The master never connects
+to anything: database engines, HTTP clients and background threads are created
+in each worker after the fork (app.reset_after_fork drops anything inherited,
+and post_worker_init starts the warm-up), and /readyz answers 503 on a worker
+until its pools are warm.
+
+Settings come from the environment (and .env):
+    PORT                       listen port (default 5000)
+    GUNICORN_WORKERS           worker processes (default: CPU count + 1, at most 8)
+    GUNICORN_THREADS           request threads per worker (default 32)
+    GUNICORN_WORKER_CLASS      gthread (default) or uvicorn.workers.UvicornWorker to serve asgi:application
+    GUNICORN_TIMEOUT           seconds a silent worker may run before it is restarted (default 120)
+    GUNICORN_MAX_REQUESTS      recycle a worker after this many requests (default 0 = never)
+"""
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+wsgi_app = 'asgi:application' if 'uvicorn' in worker_class.lower() else 'app:app'
+
+# AI calls spend seconds waiting on the upstream API, so a few processes with many
+# threads each beat many single-threaded processes. Every worker has its own
+# database pool and HTTP pool, so total connections scale with the worker count;
+# threads beyond HTTP_MAX_CONNECTIONS only queue for an upstream connection.
+# For thousands of concurrent slow completions use the uvicorn worker class.
+workers = int(os.getenv('GUNICORN_WORKERS', min(multiprocessing.cpu_count() + 1, 8)))
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+preload_app = True
+
+# With gthread the heartbeat comes from the worker's main thread, so long AI calls
+# do not trip the timeout; it only catches workers that are truly stuck.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+backlog = 2048
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    """Warm the worker's own pools (the master only imported the app)."""
+    from app import start_warmup
+    start_warmup()
@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# app reads its configuration from the environment; point every store at scratch paths
+_scratch = tempfile.mkdtemp(prefix='glossary-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_scratch, 'test.db')}")
+os.environ.setdefault('API_BASE_URL', 'llm.test')
+os.environ.setdefault('API_KEY', 'test-key')
+os.environ.setdefault('ANALYSIS_CACHE_ENABLED', 'false')
+os.environ.setdefault('SCHEMA_SNAPSHOT_PATH', os.path.join(_scratch, 'schema_snapshots.db'))
+os.environ.setdefault('JOB_STORE_PATH', os.path.join(_scratch, 'jobs.db'))
+os.environ.setdefault('EXPORT_STORE_PATH', os.path.join(_scratch, 'exports.db'))
+
+import app  # noqa: E402
+
+
+
+@pytest.fixture
+def config(monkeypatch):
+    """Set environment variables for one test and reload the cached configuration."""
+    def apply(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        app._config = None
+        return app.load_config()
+    yield apply
+    app._config = None
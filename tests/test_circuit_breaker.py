@@ -0,0 +1,136 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+import app
+
+
+def completion_response(status_code):
+    request = httpx.Request("POST", "http://llm.test/chat/completions")
+    if status_code != 200:
+        return httpx.Response(status_code, text="upstream error", request=request)
+    content = json.dumps({"G": [{"C": ["t1"]}]})
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]}, request=request)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """A breaker with threshold 1 and a fast reset, and a scripted upstream returning the queued statuses."""
+    breaker = app.CircuitBreaker("llm.test", failure_threshold=1, reset_timeout=0.05)
+    statuses = []
+    calls = []
+
+    def post(url, api_config, **kwargs):
+        calls.append(url)
+        return completion_response(statuses.pop(0))
+
+    async def post_async(url, api_config, **kwargs):
+        return post(url, api_config, **kwargs)
+
+    monkeypatch.setattr(app, "get_circuit_breaker", lambda base_url: breaker)
+    monkeypatch.setattr(app, "api_post", post)
+    monkeypatch.setattr(app, "api_post_async", post_async)
+    return breaker, statuses, calls
+
+
+def open_then_wait(breaker):
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(breaker.reset_timeout + 0.01)
+
+
+@pytest.mark.parametrize("status_code", [400, 401, 404])
+def test_fatal_probe_response_closes_breaker(upstream, status_code):
+    breaker, statuses, calls = upstream
+    open_then_wait(breaker)
+
+    statuses.append(status_code)
+    assert app.make_api_call("schema", {"max_retries": 1}, "analyze") is None
+    assert breaker.state == "closed"
+    assert not breaker.probe_in_flight
+
+    statuses.append(200)
+    assert app.make_api_call("schema", {"max_retries": 1}, "analyze") == {"G": [{"C": ["t1"]}]}
+    assert len(calls) == 2
+
+
+def test_fatal_probe_response_async(upstream):
+    breaker, statuses, calls = upstream
+    open_then_wait(breaker)
+
+    statuses.extend([400, 200])
+    assert asyncio.run(app.make_api_call_async("schema", {"max_retries": 1}, "analyze")) is None
+    assert asyncio.run(app.make_api_call_async("schema", {"max_retries": 1}, "analyze")) is not None
+    assert breaker.state == "closed"
+    assert len(calls) == 2
+
+
+def test_fatal_probe_response_generate(upstream):
+    breaker, statuses, calls = upstream
+    open_then_wait(breaker)
+
+    statuses.extend([401, 200])
+    assert app.make_api_call_for_generate("rows", {"max_retries": 1}) is None
+    assert app.make_api_call_for_generate("rows", {"max_retries": 1}) is not None
+    assert breaker.state == "closed"
+    assert len(calls) == 2
+
+
+def test_probe_released_when_call_is_interrupted(upstream, monkeypatch):
+    breaker, statuses, calls = upstream
+    open_then_wait(breaker)
+
+    def interrupted(url, api_config, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(app, "api_post", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        app.make_api_call("schema", {"max_retries": 1}, "analyze")
+    assert breaker.state == "half_open"
+    assert not breaker.probe_in_flight
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_breaker(upstream):
+    breaker, statuses, calls = upstream
+    open_then_wait(breaker)
+
+    statuses.append(503)
+    assert app.make_api_call("schema", {"max_retries": 1}, "analyze") is None
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+    assert len(calls) == 1
+
+
+def test_only_the_probe_token_releases_the_probe():
+    breaker = app.CircuitBreaker("llm.test", failure_threshold=1, reset_timeout=0.05)
+    admitted_while_closed = breaker.allow_request()
+    open_then_wait(breaker)
+
+    probe = breaker.allow_request()
+    assert probe and breaker.probe_in_flight
+    breaker.release_probe(admitted_while_closed)
+    assert breaker.probe_in_flight
+    assert not breaker.allow_request()
+
+    breaker.release_probe(probe)
+    assert breaker.allow_request()
+
+
+def test_request_supplied_upstreams_are_bounded_and_not_listed(monkeypatch):
+    monkeypatch.setattr(app, "_circuit_breakers", app.OrderedDict())
+    configured = app.load_config()['api_base_url']
+    app.get_circuit_breaker(configured)
+    for i in range(app.CIRCUIT_BREAKER_MAX_UPSTREAMS + 10):
+        app.get_circuit_breaker(f"tenant-{i}.example")
+    assert len(app._circuit_breakers) == app.CIRCUIT_BREAKER_MAX_UPSTREAMS + 1
+    assert configured in app._circuit_breakers
+
+    stats = app.get_retry_stats()
+    assert list(stats["circuit_breakers"]) == [configured]
+    assert stats["request_upstream_breakers"]["tracked"] == app.CIRCUIT_BREAKER_MAX_UPSTREAMS
+    health = app.app.test_client().get('/health').get_json()
+    assert not any("tenant-" in upstream for upstream in health["circuit_breakers"])
@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def endless_view():
+    engine = app.get_database_engine()
+    with engine.begin() as conn:
+        conn.execute(app.sqlalchemy.text(
+            "CREATE VIEW endless_rows AS WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r) SELECT i FROM r"
+        ))
+    yield engine
+    with engine.begin() as conn:
+        conn.execute(app.sqlalchemy.text("DROP VIEW endless_rows"))
+
+
+def test_cancelled_profile_stops_and_releases_its_connection(endless_view):
+    engine = endless_view
+    cancellation = app.ProfilingCancellation(engine)
+    table_info = {"columns": [{"name": "i", "type": "INTEGER"}]}
+    outcome = []
+
+    def profile():
+        try:
+            app.profile_table(engine, "endless_rows", table_info, sample_rows=10 ** 12, cancellation=cancellation)
+        except TimeoutError as e:
+            outcome.append(e)
+
+    worker = threading.Thread(target=profile)
+    worker.start()
+    time.sleep(0.2)
+    assert worker.is_alive()
+
+    cancellation.cancel()
+    worker.join(timeout=2)
+    assert not worker.is_alive()
+    assert len(outcome) == 1
+    assert engine.pool.checkedout() == 0
+
+
+def test_request_cannot_raise_configured_profiling_limits(config):
+    config(COLUMN_PROFILING_SAMPLE_ROWS="500", COLUMN_PROFILING_MAX_TABLES="20",
+           COLUMN_PROFILING_CONCURRENCY="4", COLUMN_PROFILING_STATEMENT_TIMEOUT="5")
+    options = app.resolve_profiling_options(
+        {"sample_rows": 10 ** 9, "max_tables": 10 ** 6, "concurrency": 1000, "statement_timeout": 0}
+    )
+    assert (options["sample_rows"], options["max_tables"], options["concurrency"]) == (500, 20, 4)
+    assert options["statement_timeout"] == 5
+
+    options = app.resolve_profiling_options({"sample_rows": 10, "concurrency": 2, "statement_timeout": 1})
+    assert (options["sample_rows"], options["concurrency"], options["statement_timeout"]) == (10, 2, 1)
@@ -0,0 +1,40 @@
+import csv
+import io
+import sqlite3
+
+import app
+
+DATA = {"Sales": [{"Orders": ["id", "id", "total"]}, {"Orders": ["id"]}]}
+
+
+def delta(body):
+    response = app.app.test_client().post('/generate/delta', json=body)
+    assert response.status_code == 200
+    result = response.get_json()
+    rows = list(csv.reader(io.StringIO(result["delta_csv"])))[1:]
+    return result, rows
+
+
+def test_stored_export_keeps_duplicate_fqdns():
+    response = app.app.test_client().post('/generate', json={"data": DATA, "store": True})
+    export_id = response.headers['X-Export-Id']
+    exported = list(csv.reader(io.StringIO(response.get_data(as_text=True))))[1:]
+    assert len(exported) == 7
+
+    conn = sqlite3.connect(app.load_config()['export_store_path'])
+    assert conn.execute("SELECT row_count FROM exports WHERE export_id = ?", (export_id,)).fetchone()[0] == 7
+    conn.close()
+
+    result, rows = delta({"data": DATA, "previous_export_id": export_id})
+    assert rows == []
+    assert result["summary"] == {"added": 0, "changed": 0, "removed": 0, "unchanged": 7}
+
+
+def test_inline_previous_export_matches_repeated_names():
+    previous_csv = app.transform_to_csv(DATA)
+    changed = {"Sales": [{"Orders": ["id", "total"]}, {"Orders": ["id", "tax"]}]}
+    result, rows = delta({"data": changed, "previous_csv": previous_csv})
+    assert result["summary"] == {"added": 1, "changed": 0, "removed": 1, "unchanged": 6}
+    assert [(row[3], row[-1]) for row in rows] == [("Sales/Orders/tax", "added"), ("Sales/Orders/id", "removed")]
+    previous_ids = {row[0] for row in csv.reader(io.StringIO(previous_csv))}
+    assert all(row[0] in previous_ids for row in rows if row[-1] != "added")
@@ -0,0 +1,63 @@
+import tracemalloc
+import uuid
+
+import app
+
+NAMESPACE = uuid.UUID("6ba7b811-9dad-11d1-80b4-00c04fd430c8")
+
+
+def stable_walk(data):
+    return list(app.walk_glossary(data, app.make_id_factory('stable', str(NAMESPACE))))
+
+
+def test_stable_ids_are_uuid5_of_the_fqdn():
+    nodes = stable_walk({"Sales": [{"Orders": ["order_id", "total"]}]})
+    assert [(node[0], node[3]) for node in nodes] == [
+        (str(uuid.uuid5(NAMESPACE, fqdn)), fqdn)
+        for fqdn in ("Sales", "Sales/Orders", "Sales/Orders/order_id", "Sales/Orders/total")
+    ]
+
+
+def test_duplicate_fqdns_get_distinct_deterministic_ids():
+    data = {"G": [{"C": ["x", "x", "x#2"]}, {"C": ["x"]}], "H": ["x"]}
+    nodes = stable_walk(data)
+    ids = [node[0] for node in nodes]
+    assert len(set(ids)) == len(ids)
+    assert ids == [node[0] for node in stable_walk(data)]
+    # Duplicates keep their real FQDN; only the ID key is suffixed
+    assert [node[3] for node in nodes].count("G/C/x") == 3
+    assert ids[3] == str(uuid.uuid5(NAMESPACE, "G/C/x#2"))
+    assert ids[4] == str(uuid.uuid5(NAMESPACE, "G/C/x#2#2"))
+    assert ids[6] == str(uuid.uuid5(NAMESPACE, "G/C#2/x"))
+
+
+def test_stable_factory_keeps_no_per_node_state():
+    id_factory = app.make_id_factory('stable')
+    data = {"G": [{f"C{c}": [f"t{t}" for t in range(100)]} for c in range(200)]}
+    for _ in app.walk_glossary(data, id_factory):
+        pass
+    tracemalloc.start()
+    for _ in app.walk_glossary(data, id_factory):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # 20k nodes: only the open path's sibling names are held, far below one ID per node
+    assert peak < 200_000
+
+
+def test_node_types_are_decided_in_one_pass_over_children():
+    class CountingList(list):
+        iterations = 0
+
+        def __iter__(self):
+            CountingList.iterations += 1
+            return super().__iter__()
+
+    from collections import OrderedDict
+    data = {"G": [{"C": CountingList(["t1", "t2", OrderedDict(S=["t3"])]), "T": CountingList(["x", "y"])}]}
+    nodes = [(node[3], node[2]) for node in app.walk_glossary(data)]
+    assert nodes == [
+        ("G", "glossary"), ("G/C", "category"), ("G/C/t1", "term"), ("G/C/t2", "term"),
+        ("G/C/S", "term"), ("G/C/S/t3", "term"), ("G/T", "term"), ("G/T/x", "term"), ("G/T/y", "term"),
+    ]
+    assert CountingList.iterations == 2
@@ -0,0 +1,55 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+import app
+import asgi
+
+BODY = {"data": {"Sales": [{"Orders": ["id", "total"]}]}, "stream": True}
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate, br", True),
+    ("br;q=1.0, gzip;q=0.5", True),
+    ("gzip;q=0", False),
+    ("*", True),
+    ("*;q=0.1, gzip;q=0", False),
+    ("identity", False),
+    ("", False),
+])
+def test_accepts_gzip(accept_encoding, expected):
+    assert app.accepts_gzip(accept_encoding) is expected
+
+
+def test_flask_stream_is_compressed_only_when_accepted():
+    client = app.app.test_client()
+    plain = client.post('/generate', json={**BODY, "gzip": True})
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_data(as_text=True).startswith("_id,name")
+
+    compressed = client.post('/generate', json=BODY, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(compressed.get_data()).decode().startswith("_id,name")
+
+    opted_out = client.post('/generate', json={**BODY, "gzip": False}, headers={"Accept-Encoding": "gzip"})
+    assert 'Content-Encoding' not in opted_out.headers
+
+
+def test_asgi_stream_negotiates_from_accept_encoding():
+    sent = []
+    body = json.dumps(BODY).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/generate", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(asgi.generate_output(scope, receive, send))
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert gzip.decompress(b"".join(message.get("body", b"") for message in sent[1:])).startswith(b"_id,name")
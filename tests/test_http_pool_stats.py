@@ -0,0 +1,31 @@
+import httpx
+import pytest
+
+import app
+
+
+@pytest.fixture
+def http_client(monkeypatch):
+    def install(client):
+        monkeypatch.setattr(app, "_http_client", client)
+        return client
+    yield install
+    if app._http_client is not None:
+        app._http_client.close()
+
+
+def test_default_transport_reports_connections(http_client):
+    http_client(httpx.Client())
+    assert app.get_http_pool_stats()["connections"] == {"total": 0, "idle": 0, "active": 0, "http2": 0}
+
+
+def test_custom_transport_without_pool_reports_null(http_client):
+    http_client(httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200))))
+    stats = app.get_http_pool_stats()
+    assert stats["connections"] is None
+    assert stats["client_initialized"]
+
+
+def test_no_client_yet(http_client):
+    http_client(None)
+    assert app.get_http_pool_stats()["connections"]["total"] == 0
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+import app
+
+GLOSSARY = '{"Sales": {"Orders": ["order_id", "total"], "Customers": {"Contacts": ["email"]}}, "Finance": []}'
+
+VALID_DOCUMENTS = [
+    GLOSSARY,
+    '```json\n' + GLOSSARY + '\n```',
+    '```\n' + GLOSSARY + '\n```\n',
+    '  \n' + GLOSSARY + '  ',
+    '[]',
+    '{}',
+    '[1, -2.5e3, true, false, null, "x"]',
+    '{"a": {"b": {"c": [0.5, null, {"d": "e"}]}}}',
+    '{"esc\\"aped": ["tab\\there", "slash\\/", "nl\\n", "\\u00e9t\\u00E9"]}',
+    '{"Emoji \\ud83d\\ude00 term": ["\\uD83D\\uDE80 launch", "lone \\ud83d"]}',
+    '{"raw é and \U0001f600": ["café"]}',
+]
+
+MALFORMED_DOCUMENTS = [
+    'Here is the glossary: {"a": []}',
+    '{"a": [}',
+    '{"a" []}',
+    '{"a": ["b",]',
+    '{"a": tru}',
+    '{"a": "unterminated',
+    '{"a": "bad \\x escape"}',
+    '{"a": "bad \\u12G4"}',
+    '{"a": []} trailing',
+    '{"a": "control\u0001char"}',
+    '{"a": [1, 2]',
+    '``json\n{}',
+]
+
+
+def unfenced(document):
+    """The JSON value of a document, with any markdown fence removed."""
+    text = document.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1].rstrip('`')
+    return json.loads(text)
+
+
+def expected_nodes(value):
+    """Glossary nodes as walk_glossary reports them: object keys and string array items, in document order."""
+    nodes = []
+
+    def walk(value, parents):
+        if isinstance(value, dict):
+            for key, child in value.items():
+                nodes.append({"name": key, "fqdn": '/'.join(parents + [key]), "level": len(parents)})
+                walk(child, parents + [key])
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, str):
+                    nodes.append({"name": item, "fqdn": '/'.join(parents + [item]), "level": len(parents)})
+                else:
+                    walk(item, parents)
+
+    walk(value, [])
+    return nodes
+
+
+def parse(chunks):
+    nodes = []
+    parser = app.IncrementalJSONParser(on_node=nodes.append)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close(), nodes
+
+
+def splits(document):
+    """The document split at every chunk boundary, plus fixed chunk sizes."""
+    yield [document]
+    for boundary in range(1, len(document)):
+        yield [document[:boundary], document[boundary:]]
+    for size in (1, 3, 100):
+        yield [document[i:i + size] for i in range(0, len(document), size)]
+
+
+@pytest.mark.parametrize("document", VALID_DOCUMENTS)
+def test_valid_documents_at_every_split(document):
+    expected_value = unfenced(document)
+    expected = expected_nodes(expected_value)
+    for chunks in splits(document):
+        value, nodes = parse(chunks)
+        assert value == expected_value, chunks
+        assert nodes == expected, chunks
+
+
+@pytest.mark.parametrize("document", MALFORMED_DOCUMENTS)
+def test_malformed_documents_fail_at_every_split(document):
+    for chunks in splits(document):
+        with pytest.raises(app.StreamedJSONError):
+            parse(chunks)
+
+
+@pytest.mark.parametrize("document", MALFORMED_DOCUMENTS[:4])
+def test_structural_error_reported_before_the_stream_ends(document):
+    # Aborting early is the point of the parser: the error must surface from feed(), not close()
+    parser = app.IncrementalJSONParser()
+    with pytest.raises(app.StreamedJSONError) as error:
+        parser.feed(document)
+    assert error.value.position <= len(document)
+
+
+def test_surrogate_pair_escapes_combine_into_one_character():
+    _, nodes = parse(['{"x": ["\\ud83d', '\\ude00"]}'])
+    assert nodes[-1]["name"] == '\U0001f600'
+    nodes[-1]["name"].encode('utf-8')
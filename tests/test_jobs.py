@@ -0,0 +1,130 @@
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture(autouse=True)
+def empty_store():
+    conn = app._get_job_store_connection()
+    conn.execute("DELETE FROM jobs")
+    conn.commit()
+    conn.close()
+    yield
+
+
+def insert_job(job_id, status, owner, lease_expires, request='{}'):
+    """A job row as another worker process (or this one) would have written it."""
+    conn = app._get_job_store_connection()
+    conn.execute(
+        "INSERT INTO jobs (job_id, job_type, status, request, created_at, owner, lease_expires) "
+        "VALUES (?, 'analyze', ?, ?, ?, ?, ?)",
+        (job_id, status, request, time.time(), owner, lease_expires)
+    )
+    conn.commit()
+    conn.close()
+
+
+def row(job_id):
+    conn = app._get_job_store_connection()
+    result = conn.execute(
+        "SELECT status, owner, cancel_requested FROM jobs WHERE job_id = ?", (job_id,)
+    ).fetchone()
+    conn.close()
+    return result
+
+
+def test_recovery_leaves_jobs_of_live_workers_alone():
+    lease = time.time() + 60
+    insert_job("running-elsewhere", "running", "other-worker", lease)
+    insert_job("queued-elsewhere", "queued", "other-worker", lease)
+
+    assert app._recover_orphaned_jobs() == []
+    assert row("running-elsewhere")[:2] == ("running", "other-worker")
+    assert row("queued-elsewhere")[:2] == ("queued", "other-worker")
+
+
+def test_recovery_takes_over_jobs_with_expired_lease():
+    expired = time.time() - 1
+    insert_job("running-orphan", "running", "dead-worker", expired)
+    insert_job("cancelling-orphan", "cancelling", "dead-worker", expired)
+    insert_job("queued-orphan", "queued", "dead-worker", expired)
+
+    assert app._recover_orphaned_jobs() == [("queued-orphan", {})]
+    assert row("running-orphan")[0] == "failed"
+    assert row("cancelling-orphan")[0] == "cancelled"
+    assert row("queued-orphan")[:2] == ("queued", app._get_job_owner())
+    # Claimed once: a second pass (another worker) finds nothing left
+    assert app._recover_orphaned_jobs() == []
+
+
+def test_cancel_of_a_job_running_in_another_worker_is_recorded():
+    insert_job("remote", "running", "other-worker", time.time() + 60)
+
+    assert app.cancel_job("remote") == "cancelling"
+    assert row("remote") == ("cancelling", "other-worker", 1)
+    assert app._job_cancel_requested("remote")
+    assert app.cancel_job("missing") is None
+
+
+def test_owner_does_not_start_or_complete_a_cancelled_job(monkeypatch):
+    owner = app._get_job_owner()
+    insert_job("cancelled-while-queued", "queued", owner, time.time() + 60)
+    assert app.cancel_job("cancelled-while-queued") == "cancelled"
+
+    monkeypatch.setattr(app, "run_analysis", lambda *args: pytest.fail("cancelled job was started"))
+    app._run_analysis_job("cancelled-while-queued", {})
+    assert row("cancelled-while-queued")[0] == "cancelled"
+
+    insert_job("cancelled-while-running", "queued", owner, time.time() + 60)
+
+    def run_analysis(request_data, on_progress, cancel_check):
+        # Another worker serves the DELETE while this one is mid-analysis
+        app.cancel_job("cancelled-while-running")
+        return {"success": True}, 200
+
+    monkeypatch.setattr(app, "run_analysis", run_analysis)
+    app._run_analysis_job("cancelled-while-running", {})
+    assert row("cancelled-while-running")[0] == "cancelled"
+
+
+def test_job_that_fails_after_a_cancel_stays_cancelled(monkeypatch):
+    insert_job("fails-after-cancel", "queued", app._get_job_owner(), time.time() + 60)
+
+    def run_analysis(request_data, on_progress, cancel_check):
+        app.cancel_job("fails-after-cancel")
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(app, "run_analysis", run_analysis)
+    app._run_analysis_job("fails-after-cancel", {})
+    assert row("fails-after-cancel")[0] == "cancelled"
+
+
+def test_finished_jobs_do_not_keep_request_credentials(monkeypatch):
+    secret_request = '{"database": {"url": "postgresql://app:hunter2@db/sales"}, "api": {"api_key": "sk-live"}}'
+    owner = app._get_job_owner()
+    insert_job("completes", "queued", owner, time.time() + 60, secret_request)
+    insert_job("fails", "queued", owner, time.time() + 60, secret_request)
+    insert_job("cancelled", "queued", owner, time.time() + 60, secret_request)
+    insert_job("orphaned", "running", "dead-worker", time.time() - 1, secret_request)
+
+    monkeypatch.setattr(app, "run_analysis", lambda request_data, on_progress, cancel_check: ({"success": True}, 200))
+    app._run_analysis_job("completes", {})
+    monkeypatch.setattr(app, "run_analysis", lambda *args: {}["boom"])
+    app._run_analysis_job("fails", {})
+    app.cancel_job("cancelled")
+    app._recover_orphaned_jobs()
+
+    conn = app._get_job_store_connection()
+    requests = dict(conn.execute("SELECT job_id, request FROM jobs").fetchall())
+    conn.close()
+    assert requests == {"completes": "{}", "fails": "{}", "cancelled": "{}", "orphaned": "{}"}
+
+
+def test_queue_limit_counts_jobs_of_all_workers(config):
+    config(JOB_QUEUE_MAX="2")
+    insert_job("queued-a", "queued", "worker-a", time.time() + 60)
+    insert_job("queued-b", "queued", "worker-b", time.time() + 60)
+
+    assert app.submit_analysis_job({}) is None
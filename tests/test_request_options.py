@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def test_chunking_off_unless_requested():
+    assert app.resolve_chunk_options(None) is None
+    assert app.resolve_chunk_options({}) is None
+    assert app.resolve_chunk_options({"enabled": False, "concurrency": 2}) is None
+
+
+def test_chunking_clamped_to_configured_limits(config):
+    config(CHUNK_MAX_CONCURRENCY=3, CHUNK_MIN_TOKENS=500)
+    options = app.resolve_chunk_options({"chunk_tokens": 1, "concurrency": 10000})
+    assert options == {"chunk_tokens": 500, "concurrency": 3, "merge_strategy": "deep"}
+    assert app.resolve_chunk_options({"chunk_tokens": 8000, "concurrency": 2})["concurrency"] == 2
+
+
+@pytest.mark.parametrize("chunking", [
+    {"concurrency": 0},
+    {"concurrency": "many"},
+    {"chunk_tokens": -5},
+    {"chunk_tokens": None},
+    {"merge_strategy": "union"},
+    ["chunk_tokens", 6000],
+])
+def test_invalid_chunking_rejected(client, chunking):
+    response = client.post('/analyze', json={"chunking": chunking})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid chunking options"
+
+
+def test_multi_schema_concurrency_and_rate_clamped(config):
+    config(MULTI_SCHEMA_MAX_LLM_CONCURRENCY=4, LLM_TOKENS_PER_MINUTE=100000)
+    options = app.resolve_multi_schema_options({"llm_concurrency": 500, "tokens_per_minute": 10 ** 9})
+    assert options == {"reflection_workers": None, "llm_concurrency": 4, "tokens_per_minute": 100000}
+    # A request may tighten the configured budget but not switch it off
+    assert app.resolve_multi_schema_options({"tokens_per_minute": 5000})["tokens_per_minute"] == 5000
+    assert app.resolve_multi_schema_options({"tokens_per_minute": 0})["tokens_per_minute"] == 100000
+
+
+def test_multi_schema_rate_unlimited_unless_configured(config):
+    config(LLM_TOKENS_PER_MINUTE=0)
+    assert app.resolve_multi_schema_options({"tokens_per_minute": 20000})["tokens_per_minute"] == 20000
+    assert app.resolve_multi_schema_options({})["tokens_per_minute"] == 0
+
+
+@pytest.mark.parametrize("multi_schema", [
+    {"llm_concurrency": 0},
+    {"llm_concurrency": "2x"},
+    {"tokens_per_minute": -1},
+    {"reflection_workers": 0},
+    "fast",
+])
+def test_invalid_multi_schema_rejected(client, multi_schema):
+    response = client.post('/analyze', json={"schemas": ["main"], "multi_schema": multi_schema})
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid multi-schema options"
+
+
+def test_multi_schema_glossary_keyed_by_schema(client, monkeypatch):
+    with app.get_database_engine().begin() as conn:
+        conn.execute(app.sqlalchemy.text("CREATE TABLE IF NOT EXISTS customers (id INTEGER PRIMARY KEY, email TEXT)"))
+
+    def fake_call(schema_summary, api_config=None, prompt_template_name='analyze', **kwargs):
+        term = "Order" if "Schema 'temp'" in schema_summary else "Customer"
+        return {"Business Glossary": [{"Sales": [term]}]}
+
+    monkeypatch.setattr(app, "make_api_call", fake_call)
+    response = client.post('/analyze', json={"schemas": ["main", "temp"], "refresh_schema": True})
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert body["data"] == {"main": [{"Sales": ["Customer"]}], "temp": [{"Sales": ["Order"]}]}
+    assert body["metadata"]["glossary_roots"] == {"main": "Business Glossary", "temp": "Business Glossary"}
+
+
+def test_multi_schema_chunk_calls_share_the_llm_budget(client, config, monkeypatch):
+    config(CHUNK_MIN_TOKENS=1, LLM_TOKENS_PER_MINUTE=0)
+    with app.get_database_engine().begin() as conn:
+        for name in ("budget_a", "budget_b", "budget_c"):
+            conn.execute(app.sqlalchemy.text(f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY)"))
+
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0, "calls": 0}
+
+    def fake_call(schema_summary, api_config=None, prompt_template_name='analyze', **kwargs):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["calls"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        time.sleep(0.02)
+        with lock:
+            in_flight["now"] -= 1
+        return {"Business Glossary": [{"Sales": ["Term"]}]}
+
+    acquired = []
+    acquire = app.TokenRateLimiter.acquire
+    monkeypatch.setattr(app, "make_api_call", fake_call)
+    monkeypatch.setattr(app.TokenRateLimiter, "acquire",
+                        lambda self, tokens, cancel_check=None: acquired.append(tokens) or acquire(self, tokens, cancel_check))
+    response = client.post('/analyze', json={
+        "schemas": ["main"],
+        "refresh_schema": True,
+        "chunking": {"chunk_tokens": 1, "concurrency": 4},
+        "multi_schema": {"llm_concurrency": 1, "tokens_per_minute": 10 ** 9}
+    })
+    assert response.status_code == 200, response.get_json()
+    assert in_flight["calls"] >= 3
+    assert in_flight["peak"] == 1
+    assert len(acquired) == in_flight["calls"]
+
+
+def test_rate_limiter_wait_is_cancellable():
+    limiter = app.TokenRateLimiter(60)
+    limiter.acquire(60)
+
+    def cancel_check():
+        raise app.AnalysisCancelled("stop")
+
+    start = time.monotonic()
+    with pytest.raises(app.AnalysisCancelled):
+        limiter.acquire(60, cancel_check)
+    assert time.monotonic() - start < 1
@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+import app
+
+ADMIN_KEY = "zq7x-profiling-admin-key-k9w2"
+
+
+@pytest.fixture
+def client(config, tmp_path):
+    config(PROFILE_ADMIN_KEY=ADMIN_KEY, PROFILE_STORE_DIR=str(tmp_path), PROFILE_TOP_N="5000", CHUNK_MIN_TOKENS="1")
+    return app.app.test_client()
+
+
+def test_profile_includes_chunk_worker_threads(client, monkeypatch):
+    with app.get_database_engine().begin() as conn:
+        for name in ("profiled_a", "profiled_b"):
+            conn.execute(app.sqlalchemy.text(f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY)"))
+
+    def slow_chunk_call(schema_summary, api_config=None, prompt_template_name='analyze', **kwargs):
+        time.sleep(0.01)
+        return {"Business Glossary": [{"Sales": ["Term"]}]}
+
+    monkeypatch.setattr(app, "make_api_call", slow_chunk_call)
+    response = client.post(
+        '/analyze', json={"refresh_schema": True, "chunking": {"chunk_tokens": 1, "concurrency": 2}},
+        headers={"X-Profile": "1", "X-Admin-Key": ADMIN_KEY}
+    )
+    profile = response.get_json()["profile"]
+    assert profile["worker_threads_profiled"] >= 2
+    assert any("slow_chunk_call" in entry["function"] for entry in profile["top_functions"])
+
+
+def test_config_hides_the_profile_admin_key(client):
+    body = client.get('/config').get_data(as_text=True)
+    assert ADMIN_KEY[:4] not in body
+    assert ADMIN_KEY[-4:] not in body
@@ -0,0 +1,43 @@
+import pytest
+
+import app
+
+SHARDS = ["shard_events_2024_01", "shard_events_2024_02", "shard_events_2024_03"]
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+@pytest.fixture
+def shards():
+    with app.get_database_engine().begin() as conn:
+        for name in SHARDS:
+            conn.execute(app.sqlalchemy.text(f"CREATE TABLE {name} (id INTEGER PRIMARY KEY, kind TEXT)"))
+            conn.execute(app.sqlalchemy.text(f"CREATE INDEX ix_{name} ON {name} (kind)"))
+        conn.execute(app.sqlalchemy.text("CREATE VIEW shard_events_view AS SELECT * FROM shard_events_2024_01"))
+    yield SHARDS
+    with app.get_database_engine().begin() as conn:
+        conn.execute(app.sqlalchemy.text("DROP VIEW shard_events_view"))
+        for name in SHARDS:
+            conn.execute(app.sqlalchemy.text(f"DROP TABLE {name}"))
+
+
+def test_cluster_members_reflected_in_one_bulk_pass(client, shards, monkeypatch):
+    inspected = []
+    reflect_table = app._reflect_table
+
+    def counting_reflect_table(inspector, table_name, schema_name=None):
+        inspected.append(table_name)
+        return reflect_table(inspector, table_name, schema_name)
+
+    monkeypatch.setattr(app, "_reflect_table", counting_reflect_table)
+    response = client.get('/database/schema?refresh=true&tables=' + ','.join(shards + ["shard_events_view"]))
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert set(body["tables"]) == set(shards) | {"shard_events_view"}
+    # Only the view is inspected table by table; the unreflected members come from the bulk pass
+    assert inspected == ["shard_events_view"]
+    for name in shards:
+        assert [index["name"] for index in body["tables"][name]["indexes"]] == [f"ix_{name}"]
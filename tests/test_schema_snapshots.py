@@ -0,0 +1,39 @@
+import app
+
+
+def make_engine(tmp_path, name='snapshots.db'):
+    engine = app.create_database_engine(f"sqlite:///{tmp_path / name}")
+    with engine.begin() as conn:
+        conn.execute(app.sqlalchemy.text("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT)"))
+    return engine
+
+
+def test_snapshot_status_transitions(config, tmp_path):
+    config(SCHEMA_SNAPSHOT_CHECK_INTERVAL="60")
+    engine = make_engine(tmp_path)
+    assert app.get_schema_snapshot(engine)["status"] == "miss"
+    assert app.get_schema_snapshot(engine)["status"] == "fresh"
+
+    config(SCHEMA_SNAPSHOT_CHECK_INTERVAL="0")
+    assert app.get_schema_snapshot(engine)["status"] == "unchanged"
+
+    with engine.begin() as conn:
+        conn.execute(app.sqlalchemy.text("CREATE INDEX idx_customers_name ON customers (name)"))
+    snapshot = app.get_schema_snapshot(engine)
+    assert snapshot["status"] == "changed"
+    assert snapshot["tables"]["customers"]["indexes"]
+    assert app.get_schema_snapshot(engine)["status"] == "unchanged"
+
+
+def test_in_memory_snapshots_are_bounded(config, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "SCHEMA_SNAPSHOT_MAX_CACHED", 2)
+    monkeypatch.setattr(app, "_schema_snapshots", {})
+    monkeypatch.setattr(app, "_schema_snapshot_key_locks", app.OrderedDict())
+    config(SCHEMA_SNAPSHOT_CHECK_INTERVAL="60")
+    engines = [make_engine(tmp_path, f"bounded{i}.db") for i in range(4)]
+    for engine in engines:
+        app.get_schema_snapshot(engine)
+    assert len(app._schema_snapshots) == 2
+    assert len(app._schema_snapshot_key_locks) == 2
+    # The dropped schema is served from the persistent store again
+    assert app.get_schema_snapshot(engines[0])["status"] == "unchanged"
@@ -0,0 +1,13 @@
+import app
+
+
+def test_drop_audit_columns_keeps_business_columns_with_a_leading_underscore():
+    columns = ["id", "_status", "_amount", "created_at", "etl_batch_id",
+               "_airbyte_raw_id", "_fivetran_synced", "_sdc_batched_at", "_loaded_at"]
+    tables = {"orders": {"columns": [{"name": name, "type": "TEXT"} for name in columns],
+                         "primary_key": ["id"], "foreign_keys": [], "indexes": []}}
+    summary, _ = app.summarize_schema(tables, strategies=("drop_audit_columns",))
+    for kept in ("id", "_status", "_amount"):
+        assert kept in summary
+    for dropped in ("created_at", "etl_batch_id", "_airbyte_raw_id", "_fivetran_synced", "_sdc_batched_at", "_loaded_at"):
+        assert dropped not in summary
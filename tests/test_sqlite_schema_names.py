@@ -0,0 +1,30 @@
+import pytest
+
+import app
+
+ODD_SCHEMA = 'we"ird'
+
+
+@pytest.fixture
+def conn():
+    with app.get_database_engine().connect() as conn:
+        conn.execute(app.sqlalchemy.text("ATTACH DATABASE ':memory:' AS \"we\"\"ird\""))
+        conn.execute(app.sqlalchemy.text('CREATE TABLE "we""ird".accounts (id INTEGER PRIMARY KEY, name TEXT)'))
+        conn.execute(app.sqlalchemy.text('INSERT INTO "we""ird".accounts (name) VALUES (\'secret\')'))
+        yield conn
+        conn.rollback()
+        conn.execute(app.sqlalchemy.text("DETACH DATABASE \"we\"\"ird\""))
+
+
+def test_schema_name_with_quotes_is_one_identifier(conn):
+    tables = app._reflect_sqlite(conn, ODD_SCHEMA)
+    assert list(tables) == ["accounts"]
+    assert [col["name"] for col in tables["accounts"]["columns"]] == ["id", "name"]
+    assert list(app._table_signatures(conn, "sqlite", ODD_SCHEMA)) == ["accounts"]
+    assert app.schema_fingerprint(conn, "sqlite", ODD_SCHEMA) is not None
+
+
+def test_injected_schema_name_is_not_executed(conn):
+    injected = 'main".sqlite_master WHERE 0 UNION SELECT name, name FROM "we""ird".accounts --'
+    with pytest.raises(app.sqlalchemy.exc.OperationalError):
+        app._table_signatures(conn, "sqlite", injected)
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+import pytest
+
+import app
+import asgi
+
+
+@pytest.fixture
+def endless_analysis(monkeypatch):
+    """An analysis that reports progress, then runs until its cancel_check fires."""
+    stopped = threading.Event()
+
+    def run_analysis(request_data, progress_callback=None, cancel_check=None, node_callback=None):
+        progress_callback({"stage": "analyzing"})
+        try:
+            while True:
+                cancel_check()
+                threading.Event().wait(0.01)
+        finally:
+            stopped.set()
+
+    async def run_analysis_async(request_data, progress_callback=None, node_callback=None, cancel_check=None):
+        progress_callback({"stage": "analyzing"})
+        try:
+            await asyncio.Event().wait()
+        finally:
+            stopped.set()
+
+    monkeypatch.setattr(app, "run_analysis", run_analysis)
+    monkeypatch.setattr(asgi, "run_analysis_async", run_analysis_async)
+    return stopped
+
+
+def test_closing_the_event_stream_cancels_the_analysis(endless_analysis):
+    stream = app.analysis_event_stream({"stream": True})
+    assert next(stream).startswith("event: progress")
+    stream.close()
+    assert endless_analysis.wait(timeout=2)
+
+
+def test_asgi_disconnect_cancels_the_analysis(endless_analysis):
+    sent = []
+
+    async def scenario():
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message.get("body", b"").startswith(b"event: progress"):
+                disconnect.set()
+
+        await asyncio.wait_for(asgi.stream_analysis_events({"stream": True}, receive, send), timeout=30)
+
+    asyncio.run(scenario())
+    assert endless_analysis.is_set()
+    assert sent[0]["status"] == 200
+
+
+def test_cancelled_stream_is_not_an_upstream_failure(monkeypatch):
+    breaker = app.CircuitBreaker("llm.test", failure_threshold=1, reset_timeout=60)
+    monkeypatch.setattr(app, "get_circuit_breaker", lambda base_url: breaker)
+
+    def stream_completion(completion, message, attempt, on_node=None):
+        on_node({"name": "Sales", "fqdn": "Sales", "level": 0})
+
+    def on_node(node):
+        raise app.AnalysisCancelled("stream closed")
+
+    monkeypatch.setattr(app, "stream_completion", stream_completion)
+    with pytest.raises(app.AnalysisCancelled):
+        app.make_api_call("schema", {"max_retries": 3}, "analyze", on_node=on_node)
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+
+def test_asgi_stream_delivers_the_result(monkeypatch):
+    async def run_analysis_async(request_data, progress_callback=None, node_callback=None, cancel_check=None):
+        progress_callback({"stage": "analyzing"})
+        return {"success": True}, 200
+
+    monkeypatch.setattr(asgi, "run_analysis_async", run_analysis_async)
+    sent = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asyncio.wait_for(asgi.stream_analysis_events({"stream": True}, receive, send), timeout=5))
+    bodies = [message.get("body", b"") for message in sent[1:]]
+    assert bodies[0].startswith(b"event: progress")
+    assert bodies[1].startswith(b"event: result")
+    assert bodies[-1] == b""
@@ -0,0 +1,76 @@
+import base64
+import json
+import time
+
+import pytest
+
+import app
+
+NAMES = ["orders", "orders_bak", "order_items", "customers", "events_2024_01", "events_2024_02", "events_2025_01"]
+
+
+def page(**args):
+    return app.select_table_page(NAMES, args)
+
+
+def cursor(value):
+    return base64.urlsafe_b64encode(json.dumps({"after": value}).encode('utf-8')).decode('ascii')
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def test_prefix_filter():
+    assert page(prefix="order")["tables"] == ["order_items", "orders", "orders_bak"]
+    assert page(prefix="zzz")["tables"] == []
+
+
+def test_pattern_is_a_whole_name_glob():
+    assert page(pattern="events_2024_*")["tables"] == ["events_2024_01", "events_2024_02"]
+    assert page(pattern="orders?bak")["tables"] == ["orders_bak"]
+    assert page(pattern="order")["tables"] == []
+    assert page(prefix="events", pattern="*_01")["tables"] == ["events_2024_01", "events_2025_01"]
+
+
+def test_pattern_matching_time_is_linear():
+    start = time.perf_counter()
+    app.select_table_page(["a" * 190], {"pattern": "*a" * 90 + "b"})
+    assert time.perf_counter() - start < 0.5
+
+
+def test_cursor_pages_cover_every_name_once():
+    seen = []
+    args = {"limit": "3"}
+    while True:
+        result = page(**args)
+        seen.extend(result["tables"])
+        assert result["total"] == len(NAMES)
+        if result["next_cursor"] is None:
+            break
+        args["cursor"] = result["next_cursor"]
+    assert seen == sorted(NAMES)
+
+
+@pytest.mark.parametrize("value", ["not-base64!", cursor(1), cursor(None), cursor(["orders"])])
+def test_malformed_cursor_rejected(value):
+    with pytest.raises(ValueError):
+        page(cursor=value)
+
+
+def test_tables_endpoint_answers_304_for_matching_etag(client):
+    response = client.get('/database/tables')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    cached = client.get('/database/tables', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+    assert client.get('/database/tables?limit=1', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_tables_endpoint_rejects_bad_cursor_with_400(client):
+    response = client.get('/database/tables?cursor=' + cursor(1))
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid query parameters"